@@ -1,14 +1,25 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Float, Date, Enum
-from sqlalchemy.orm import declarative_base, sessionmaker
-import enum
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-import csv
 import os
+import time
+
+from sqlalchemy.exc import IntegrityError
+
+from database import (engine, Base, get_session, verify_db_connection, ensure_default_settings,
+                      EmploymentType, ChangeType, Employee, ProjectAllocation, Settings,
+                      PlannedChange, Forecast, ScenarioPlannedChange, MONTH_COLUMNS)
+import change_tracking
+import chart_data
+import employee_import
+import ga01_calendar
+import scenarios
+import snapshot
+import sql_stats
+from chart_cache import ChartCache, CachedChart
+from migrate_db import migrate_database
+from virtual_grid import VirtualTreeview
+from task_runner import TaskRunner
 
 # Define modern color scheme with better cross-platform readability
 COLORS = {
@@ -27,6 +38,12 @@ COLORS = {
     'table_row_alt': '#eaeaea'  # Alternate row color for better readability
 }
 
+# Alternating row colors for the virtualized grids
+ROW_COLORS = {'oddrow': COLORS['white'], 'evenrow': COLORS['table_row_alt']}
+
+MONTH_HEADINGS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                  'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
 # Configure ttk styles
 def configure_styles():
     style = ttk.Style()
@@ -140,135 +157,52 @@ def configure_styles():
         background=COLORS['border']
     )
 
-# Create database engine
-engine = create_engine('sqlite:///forecast_tool.db')
-Base = declarative_base()
-Session = sessionmaker(bind=engine)
-
-def get_session():
-    return Session()
-
-def verify_db_connection():
-    """Verify database connection and reset it if necessary"""
-    try:
+def export_to_excel(widget, what, default_name, export_name, *args):
+    """Ask for a file name and stream an Excel export to it in the background.
+    
+    ``export_name`` is a function of excel_export, which loads openpyxl and is
+    therefore only imported when an export runs.
+    """
+    file_path = filedialog.asksaveasfilename(
+        title=f"Export {what}",
+        defaultextension=".xlsx",
+        initialfile=default_name,
+        filetypes=[("Excel Files", "*.xlsx"), ("All Files", "*.*")]
+    )
+    if not file_path:
+        return  # User cancelled
+    
+    def run_export(task):
+        import excel_export
         session = get_session()
-        # Try a simple query
-        session.query(Settings).first()
-        session.close()
-        return True
-    except Exception as e:
-        print(f"Database connection error: {str(e)}")
         try:
-            # Try to reset the connection
-            global engine, Session
-            engine = create_engine('sqlite:///forecast_tool.db')
-            Session = sessionmaker(bind=engine)
-            # Create tables if they don't exist
-            Base.metadata.create_all(engine)
-            return True
-        except Exception as e:
-            print(f"Failed to reset database connection: {str(e)}")
-            return False
-
-# Enums
-class EmploymentType(enum.Enum):
-    FTE = "FTE"
-    CONTRACTOR = "CONTRACTOR"
-
-class ChangeType(enum.Enum):
-    NEW_HIRE = "New Hire"
-    CONVERSION = "Conversion"
-    TERMINATION = "Termination"
-
-# Database Models
-class Employee(Base):
-    __tablename__ = 'employees'
-    
-    id = Column(Integer, primary_key=True)
-    name = Column(String, nullable=False)
-    manager_code = Column(String, nullable=False)
-    cost_center = Column(String, nullable=False)
-    employment_type = Column(String, nullable=False)
-    work_code = Column(String, nullable=True)  # Added work code field
-    start_date = Column(Date, nullable=False)
-    end_date = Column(Date)
-
-class ProjectAllocation(Base):
-    __tablename__ = 'project_allocations'
-    
-    id = Column(Integer, primary_key=True)
-    manager_code = Column(String, nullable=False)
-    cost_center = Column(String, nullable=False)
-    work_code = Column(String, nullable=False)
-    year = Column(Integer, nullable=False)
-    jan = Column(Float, default=0)
-    feb = Column(Float, default=0)
-    mar = Column(Float, default=0)
-    apr = Column(Float, default=0)
-    may = Column(Float, default=0)
-    jun = Column(Float, default=0)
-    jul = Column(Float, default=0)
-    aug = Column(Float, default=0)
-    sep = Column(Float, default=0)
-    oct = Column(Float, default=0)
-    nov = Column(Float, default=0)
-    dec = Column(Float, default=0)
-
-class Settings(Base):
-    __tablename__ = 'settings'
-    
-    id = Column(Integer, primary_key=True)
-    fte_hours = Column(Float, default=34.5)
-    contractor_hours = Column(Float, default=39.0)
-
-class GA01Week(Base):
-    __tablename__ = 'ga01_weeks'
+            return getattr(excel_export, export_name)(session, file_path, *args, progress=task.report)
+        finally:
+            session.close()
     
-    id = Column(Integer, primary_key=True)
-    year = Column(Integer, nullable=False)
-    month = Column(Integer, nullable=False)
-    weeks = Column(Float, nullable=False)
+    widget.winfo_toplevel().tasks.submit(
+        f"Exporting {what.lower()}", run_export,
+        on_done=lambda count: messagebox.showinfo("Export Complete", f"Exported {count} rows to {file_path}."),
+        on_error=lambda e: messagebox.showerror("Error", f"Failed to export {what.lower()}: {str(e)}")
+    )
 
-class PlannedChange(Base):
-    __tablename__ = 'planned_changes'
-    
-    id = Column(Integer, primary_key=True)
-    description = Column(String, nullable=False)
-    change_type = Column(String, nullable=False)
-    effective_date = Column(Date, nullable=False)
-    employee_id = Column(Integer)
-    target_type = Column(String)
-    name = Column(String)
-    team = Column(String)
-    manager_code = Column(String)
-    cost_center = Column(String)
-    employment_type = Column(String)
-    status = Column(String, nullable=False)
+def submit_write(widget, name, write, *args, on_done=None, on_error=None):
+    """Run ``write(session, *args)`` on the writer thread and commit it.
 
-class Forecast(Base):
-    __tablename__ = 'forecasts'
-    
-    id = Column(Integer, primary_key=True)
-    year = Column(Integer, nullable=False)
-    cost_center = Column(String, nullable=False)
-    manager_code = Column(String, nullable=False)
-    work_code = Column(String, nullable=False)
-    jan = Column(Float, default=0)
-    feb = Column(Float, default=0)
-    mar = Column(Float, default=0)
-    apr = Column(Float, default=0)
-    may = Column(Float, default=0)
-    jun = Column(Float, default=0)
-    jul = Column(Float, default=0)
-    aug = Column(Float, default=0)
-    sep = Column(Float, default=0)
-    oct = Column(Float, default=0)
-    nov = Column(Float, default=0)
-    dec = Column(Float, default=0)
-    total_hours = Column(Float, default=0)
+    The session is closed whether or not the write succeeds; ``on_done``
+    receives the return value of ``write`` and, like ``on_error``, runs on
+    the Tk thread so it can refresh the view.
+    """
+    def run_write(task):
+        session = get_session()
+        try:
+            result = write(session, *args)
+            session.commit()
+            return result
+        finally:
+            session.close()
 
-# Create tables
-Base.metadata.create_all(engine)
+    widget.winfo_toplevel().tasks.submit(name, run_write, on_done=on_done, on_error=on_error, write=True)
 
 class EmployeeDialog(tk.Toplevel):
     def __init__(self, parent, employee=None):
@@ -433,71 +367,53 @@ class EmployeeTab(ttk.Frame):
         ttk.Button(button_container, text="Edit Employee", command=self.edit_employee).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_container, text="Delete Employee", command=self.delete_employee).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_container, text="Import Employees", command=self.import_employees).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_container, text="Export to Excel",
+                   command=lambda: export_to_excel(self, "Employees", "employees.xlsx",
+                                                   'export_employees')).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_container, text="Refresh", command=self.load_employees).pack(side=tk.LEFT, padx=5)
         
-        # Create treeview
-        self.tree = ttk.Treeview(self, columns=("ID", "Name", "Manager Code", "Cost Center", "Type", "Start Date", "End Date"), show="headings")
+        # Create virtualized grid; only the visible rows become Tk items
+        self.tree = VirtualTreeview(self, columns=[
+            ("id", "ID", 50),
+            ("name", "Name", 200),
+            ("manager_code", "Manager Code", 100),
+            ("cost_center", "Cost Center", 100),
+            ("type", "Type", 100),
+            ("start_date", "Start Date", 100),
+            ("end_date", "End Date", 100)
+        ], formatter=self.format_employee_row, row_colors=ROW_COLORS)
         self.tree.pack(fill=tk.BOTH, expand=True)
         
-        # Configure treeview columns
-        self.tree.heading("ID", text="ID")
-        self.tree.heading("Name", text="Name")
-        self.tree.heading("Manager Code", text="Manager Code")
-        self.tree.heading("Cost Center", text="Cost Center")
-        self.tree.heading("Type", text="Type")
-        self.tree.heading("Start Date", text="Start Date")
-        self.tree.heading("End Date", text="End Date")
-        
-        # Configure column widths
-        self.tree.column("ID", width=50)
-        self.tree.column("Name", width=200)
-        self.tree.column("Manager Code", width=100)
-        self.tree.column("Cost Center", width=100)
-        self.tree.column("Type", width=100)
-        self.tree.column("Start Date", width=100)
-        self.tree.column("End Date", width=100)
-        
         # Load initial data
         self.load_employees()
     
+    @staticmethod
+    def format_employee_row(row):
+        """Format dates of an employee row for display"""
+        return tuple(row[:5]) + (
+            row[5].strftime("%m/%d/%y") if row[5] else "",
+            row[6].strftime("%m/%d/%y") if row[6] else ""
+        )
+    
     def load_employees(self):
-        """Load employees from database"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
+        """Load employees from database in the background"""
+        self.winfo_toplevel().tasks.submit(
+            "Loading employees", self.query_employees,
+            on_done=self.tree.set_rows,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load employees: {str(e)}"),
+            replace=True
+        )
+    
+    @staticmethod
+    def query_employees(task):
+        session = get_session()
         try:
-            session = get_session()
-            employees = session.query(Employee).all()
-            
-            # For alternating row colors
-            count = 0
-            
-            for emp in employees:
-                item_id = self.tree.insert("", tk.END, values=(
-                    emp.id,
-                    emp.name,
-                    emp.manager_code,
-                    emp.cost_center,
-                    emp.employment_type,
-                    emp.start_date.strftime("%m/%d/%y") if emp.start_date else "",
-                    emp.end_date.strftime("%m/%d/%y") if emp.end_date else ""
-                ))
-                
-                # Apply alternating row colors
-                if count % 2 == 1:
-                    self.tree.item(item_id, tags=('evenrow',))
-                else:
-                    self.tree.item(item_id, tags=('oddrow',))
-                count += 1
-            
-            # Configure row tags
-            self.tree.tag_configure('oddrow', background=COLORS['white'])
-            self.tree.tag_configure('evenrow', background=COLORS['table_row_alt'])
-            
+            return session.query(
+                Employee.id, Employee.name, Employee.manager_code, Employee.cost_center,
+                Employee.employment_type, Employee.start_date, Employee.end_date
+            ).all()
+        finally:
             session.close()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load employees: {str(e)}")
     
     def add_employee(self):
         """Open dialog to add a new employee"""
@@ -505,122 +421,107 @@ class EmployeeTab(ttk.Frame):
         dialog.wait_window()
         
         if dialog.result:
-            try:
-                session = get_session()
-
-                # Create new employee
-                employee = Employee(
-                    name=dialog.result["name"],
-                    manager_code=dialog.result["manager_code"],
-                    cost_center=dialog.result["cost_center"],
-                    work_code=dialog.result["work_code"],
-                    employment_type=dialog.result["employment_type"],
-                    start_date=dialog.result["start_date"],
-                    end_date=dialog.result["end_date"]
-                )
-
-                session.add(employee)
-                session.commit()
-                session.close()
-
-                # Reload data
+            def on_done(_):
                 self.load_employees()
-                
-                # Show success message
                 messagebox.showinfo("Success", "Employee added successfully.")
-                
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to add employee: {str(e)}")
+            
+            submit_write(
+                self, "Adding employee", self.insert_employee, dialog.result,
+                on_done=on_done,
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to add employee: {str(e)}")
+            )
+    
+    @staticmethod
+    def insert_employee(session, values):
+        session.add(Employee(**values))
     
     def edit_employee(self):
         """Open dialog to edit selected employee"""
-        selection = self.tree.selection()
-        if not selection:
+        selection = self.tree.selected_row()
+        if selection is None:
             messagebox.showwarning("No Selection", "Please select an employee to edit.")
             return
         
         # Get employee ID from selection
-        emp_id = self.tree.item(selection[0])["values"][0]
+        emp_id = selection[0]
         
         try:
             session = get_session()
-            
-            # Get the employee
-            employee = session.query(Employee).filter(Employee.id == emp_id).first()
-            if employee:
-                # Open dialog with current values
-                dialog = EmployeeDialog(self, employee)
-                session.close()
-                
-                dialog.wait_window()
-                
-                if dialog.result:
-                    try:
-                        session = get_session()
-                        
-                        # Update employee
-                        employee = session.query(Employee).filter(Employee.id == emp_id).first()
-                        employee.name = dialog.result["name"]
-                        employee.manager_code = dialog.result["manager_code"]
-                        employee.cost_center = dialog.result["cost_center"]
-                        employee.work_code = dialog.result["work_code"]
-                        employee.employment_type = dialog.result["employment_type"]
-                        employee.start_date = dialog.result["start_date"]
-                        employee.end_date = dialog.result["end_date"]
-                        
-                        session.commit()
-                        session.close()
-                        
-                        # Reload data
-                        self.load_employees()
-                        
-                        # Show success message
-                        messagebox.showinfo("Success", "Employee updated successfully.")
-                        
-                    except Exception as e:
-                        messagebox.showerror("Error", f"Failed to update employee: {str(e)}")
-            else:
-                messagebox.showerror("Error", "Employee not found.")
+            try:
+                employee = session.query(Employee).filter(Employee.id == emp_id).first()
+            finally:
                 session.close()
-                
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load employee: {str(e)}")
+            return
+        
+        if not employee:
+            messagebox.showerror("Error", "Employee not found.")
+            return
+        
+        # Open dialog with current values
+        dialog = EmployeeDialog(self, employee)
+        dialog.wait_window()
+        
+        if dialog.result:
+            def on_done(found):
+                self.load_employees()
+                if found:
+                    messagebox.showinfo("Success", "Employee updated successfully.")
+                else:
+                    messagebox.showerror("Error", "Employee not found.")
+            
+            submit_write(
+                self, "Updating employee", self.update_employee, emp_id, dialog.result,
+                on_done=on_done,
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to update employee: {str(e)}")
+            )
+    
+    @staticmethod
+    def update_employee(session, emp_id, values):
+        """Apply dialog values to an employee; False when it no longer exists"""
+        employee = session.query(Employee).filter(Employee.id == emp_id).first()
+        if not employee:
+            return False
+        for field, value in values.items():
+            setattr(employee, field, value)
+        return True
     
     def delete_employee(self):
         """Delete selected employee"""
-        selection = self.tree.selection()
-        if not selection:
+        selection = self.tree.selected_row()
+        if selection is None:
             messagebox.showwarning("No Selection", "Please select an employee to delete.")
             return
         
         # Get employee ID from selection
-        emp_id = self.tree.item(selection[0])["values"][0]
+        emp_id = selection[0]
         
         # Confirm deletion
         if not messagebox.askyesno("Confirm Deletion", f"Are you sure you want to delete employee with ID {emp_id}?"):
             return
         
-        # Delete employee
-        try:
-            session = get_session()
-            
-            # Get the employee
-            employee = session.query(Employee).filter(Employee.id == emp_id).first()
-            if employee:
-                session.delete(employee)
-                session.commit()
-                
-                # Reload data
-                self.load_employees()
-                
-                # Show success message
+        def on_done(found):
+            self.load_employees()
+            if found:
                 messagebox.showinfo("Success", f"Employee with ID {emp_id} deleted successfully.")
             else:
                 messagebox.showerror("Error", "Employee not found.")
-            
-            session.close()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete employee: {str(e)}")
+        
+        submit_write(
+            self, "Deleting employee", self.remove_employee, emp_id,
+            on_done=on_done,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to delete employee: {str(e)}")
+        )
+    
+    @staticmethod
+    def remove_employee(session, emp_id):
+        """Delete an employee; False when it no longer exists"""
+        employee = session.query(Employee).filter(Employee.id == emp_id).first()
+        if not employee:
+            return False
+        session.delete(employee)
+        return True
             
     def import_employees(self):
         """Import employees from a CSV file"""
@@ -633,80 +534,64 @@ class EmployeeTab(ttk.Frame):
         if not file_path:
             return  # User cancelled
         
+        # Stream the file on the writer thread; the status bar shows progress
+        self.winfo_toplevel().tasks.submit(
+            "Importing employees", self.run_import, file_path,
+            on_done=self.on_import_done,
+            on_error=self.on_import_error,
+            write=True
+        )
+    
+    @staticmethod
+    def run_import(task, file_path):
+        """Import a CSV file in chunks; runs on a worker thread"""
+        session = get_session()
         try:
-            # Read CSV file with BOM handling
-            with open(file_path, 'r', newline='', encoding='utf-8-sig') as csvfile:
-                reader = csv.DictReader(csvfile)
-                
-                # Check required columns
-                required_columns = ['name', 'manager_code', 'cost_center', 'employment_type', 'start_date']
-                headers = reader.fieldnames
-                
-                if not all(col in headers for col in required_columns):
-                    missing = [col for col in required_columns if col not in headers]
-                    messagebox.showerror("Error", f"CSV file is missing required columns: {', '.join(missing)}\n\n"
-                                       f"Required columns are: {', '.join(required_columns)}")
-                    return
-                
-                # Begin import
-                session = get_session()
-                imported_count = 0
-                error_count = 0
-                error_messages = []
-                
-                for row in reader:
-                    try:
-                        # Parse dates
-                        try:
-                            start_date = datetime.strptime(row['start_date'], "%m/%d/%y").date()
-                        except ValueError:
-                            raise ValueError(f"Invalid start date format for {row['name']}: {row['start_date']}. Use MM/DD/YY.")
-                        
-                        end_date = None
-                        if 'end_date' in row and row['end_date']:
-                            try:
-                                end_date = datetime.strptime(row['end_date'], "%m/%d/%y").date()
-                            except ValueError:
-                                raise ValueError(f"Invalid end date format for {row['name']}: {row['end_date']}. Use MM/DD/YY.")
-                        
-                        # Create employee
-                        employee = Employee(
-                            name=row['name'],
-                            manager_code=row['manager_code'],
-                            cost_center=row['cost_center'],
-                            employment_type=row['employment_type'],
-                            start_date=start_date,
-                            end_date=end_date
-                        )
-                        
-                        session.add(employee)
-                        imported_count += 1
-                    except Exception as e:
-                        error_count += 1
-                        error_messages.append(f"Row {reader.line_num}: {str(e)}")
-                        if error_count >= 5:  # Limit error messages to avoid huge dialog
-                            error_messages.append("(Additional errors not shown)")
-                            break
-                
-                # Commit changes
-                if imported_count > 0:
-                    session.commit()
-                
-                session.close()
-                
-                # Show results
-                if error_count > 0:
-                    messagebox.showwarning("Import Results", 
-                                         f"Imported {imported_count} employees with {error_count} errors.\n\n"
-                                         f"Errors:\n{chr(10).join(error_messages)}")
-                else:
-                    messagebox.showinfo("Import Success", f"Successfully imported {imported_count} employees.")
-                
-                # Reload data
-                self.load_employees()
-                
+            report = employee_import.import_employees(session, file_path, progress=task.report)
+            
+            # Commit changes
+            if report.imported > 0:
+                session.commit()
+            return report
+        finally:
+            session.close()
+    
+    def on_import_done(self, report):
+        # Show results
+        if report.error_count > 0:
+            error_lines = report.error_lines(limit=5)
+            if report.error_count > 5:
+                error_lines.append("(Additional errors not shown)")
+            if messagebox.askyesno("Import Results",
+                                   f"Imported {report.imported} employees with {report.error_count} errors.\n\n"
+                                   f"Errors:\n{chr(10).join(error_lines)}\n\n"
+                                   f"Save the full error report?", icon='warning'):
+                self.save_error_report(report)
+        else:
+            messagebox.showinfo("Import Success", f"Successfully imported {report.imported} employees.")
+        
+        # Reload data
+        self.load_employees()
+    
+    def on_import_error(self, error):
+        if isinstance(error, ValueError):
+            messagebox.showerror("Error", str(error))
+        else:
+            messagebox.showerror("Import Error", f"Failed to import employees: {str(error)}")
+    
+    def save_error_report(self, report):
+        file_path = filedialog.asksaveasfilename(
+            title="Save Error Report",
+            defaultextension=".csv",
+            initialfile="employee_import_errors.csv",
+            filetypes=[("CSV Files", "*.csv"), ("All Files", "*.*")]
+        )
+        if not file_path:
+            return
+        try:
+            report.write_errors(file_path)
         except Exception as e:
-            messagebox.showerror("Import Error", f"Failed to import employees: {str(e)}")
+            messagebox.showerror("Error", f"Failed to save error report: {str(e)}")
 
 class ProjectAllocationTab(ttk.Frame):
     def __init__(self, parent):
@@ -719,228 +604,145 @@ class ProjectAllocationTab(ttk.Frame):
         ttk.Button(toolbar, text="Add Allocation", command=self.add_allocation).pack(side=tk.LEFT, padx=2)
         ttk.Button(toolbar, text="Edit Allocation", command=self.edit_allocation).pack(side=tk.LEFT, padx=2)
         ttk.Button(toolbar, text="Delete Allocation", command=self.delete_allocation).pack(side=tk.LEFT, padx=2)
-        
-        # Create treeview with scrollbar
-        self.tree_frame = ttk.Frame(self)
-        self.tree_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        self.tree = ttk.Treeview(self.tree_frame, columns=(
-            "manager_code", "year", "cost_center", "work_code",
-            "jan", "feb", "mar", "apr", "may", "jun",
-            "jul", "aug", "sep", "oct", "nov", "dec"
-        ), show="headings")
-        
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(self.tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        
-        # Configure columns
-        self.tree.heading("manager_code", text="Manager")
-        self.tree.heading("year", text="Year")
-        self.tree.heading("cost_center", text="Cost Center")
-        self.tree.heading("work_code", text="Work Code")
-        self.tree.heading("jan", text="Jan")
-        self.tree.heading("feb", text="Feb")
-        self.tree.heading("mar", text="Mar")
-        self.tree.heading("apr", text="Apr")
-        self.tree.heading("may", text="May")
-        self.tree.heading("jun", text="Jun")
-        self.tree.heading("jul", text="Jul")
-        self.tree.heading("aug", text="Aug")
-        self.tree.heading("sep", text="Sep")
-        self.tree.heading("oct", text="Oct")
-        self.tree.heading("nov", text="Nov")
-        self.tree.heading("dec", text="Dec")
-        
-        # Set column widths
-        self.tree.column("manager_code", width=100)
-        self.tree.column("year", width=60)
-        self.tree.column("cost_center", width=100)
-        self.tree.column("work_code", width=100)
-        for month in ["jan", "feb", "mar", "apr", "may", "jun",
-                     "jul", "aug", "sep", "oct", "nov", "dec"]:
-            self.tree.column(month, width=50)
-        
-        self.tree.pack(fill=tk.BOTH, expand=True)
+        ttk.Button(toolbar, text="Export to Excel",
+                   command=lambda: export_to_excel(self, "Allocations", "allocations.xlsx",
+                                                   'export_allocations')).pack(side=tk.LEFT, padx=2)
+        
+        # Create virtualized grid; only the visible rows become Tk items
+        self.tree = VirtualTreeview(self, columns=[
+            ("manager_code", "Manager", 100),
+            ("year", "Year", 60),
+            ("cost_center", "Cost Center", 100),
+            ("work_code", "Work Code", 100)
+        ] + [(month.lower(), month, 50) for month in MONTH_HEADINGS], row_colors=ROW_COLORS)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # Load allocations
         self.load_allocations()
     
     def load_allocations(self):
-        """Load project allocations from database"""
+        """Load project allocations from database in the background"""
+        self.winfo_toplevel().tasks.submit(
+            "Loading allocations", self.query_allocations,
+            on_done=self.tree.set_rows,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load allocations: {str(e)}"),
+            replace=True
+        )
+    
+    @staticmethod
+    def query_allocations(task):
+        session = get_session()
         try:
-            # Clear existing items
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            session = get_session()
-            allocations = session.query(ProjectAllocation).all()
-            
-            # For alternating row colors
-            count = 0
-            
-            for allocation in allocations:
-                item_id = self.tree.insert("", tk.END, values=(
-                    allocation.manager_code,
-                    allocation.year,
-                    allocation.cost_center,
-                    allocation.work_code,
-                    allocation.jan,
-                    allocation.feb,
-                    allocation.mar,
-                    allocation.apr,
-                    allocation.may,
-                    allocation.jun,
-                    allocation.jul,
-                    allocation.aug,
-                    allocation.sep,
-                    allocation.oct,
-                    allocation.nov,
-                    allocation.dec
-                ))
-                
-                # Apply alternating row colors
-                if count % 2 == 1:
-                    self.tree.item(item_id, tags=('evenrow',))
-                else:
-                    self.tree.item(item_id, tags=('oddrow',))
-                count += 1
-            
-            # Configure row tags
-            self.tree.tag_configure('oddrow', background=COLORS['white'])
-            self.tree.tag_configure('evenrow', background=COLORS['table_row_alt'])
-            
+            return session.query(
+                ProjectAllocation.manager_code, ProjectAllocation.year,
+                ProjectAllocation.cost_center, ProjectAllocation.work_code,
+                *[getattr(ProjectAllocation, month) for month in MONTH_COLUMNS]
+            ).all()
+        finally:
             session.close()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load allocations: {str(e)}")
     
     def add_allocation(self):
         """Add a new project allocation"""
-        try:
-            dialog = ProjectAllocationDialog(self, None, datetime.now().year)
-            self.wait_window(dialog)
-            
-            if dialog.result:
-                session = get_session()
-                
-                # Create new allocation
-                allocation = ProjectAllocation(
-                    manager_code=dialog.result["manager_code"],
-                    year=dialog.result["year"],
-                    cost_center=dialog.result["cost_center"],
-                    work_code=dialog.result["work_code"],
-                    jan=dialog.result["jan"],
-                    feb=dialog.result["feb"],
-                    mar=dialog.result["mar"],
-                    apr=dialog.result["apr"],
-                    may=dialog.result["may"],
-                    jun=dialog.result["jun"],
-                    jul=dialog.result["jul"],
-                    aug=dialog.result["aug"],
-                    sep=dialog.result["sep"],
-                    oct=dialog.result["oct"],
-                    nov=dialog.result["nov"],
-                    dec=dialog.result["dec"]
-                )
-                
-                session.add(allocation)
-                session.commit()
-                session.close()
-                
-                # Reload allocations
-                self.load_allocations()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add allocation: {str(e)}")
+        dialog = ProjectAllocationDialog(self, None, datetime.now().year)
+        self.wait_window(dialog)
+        
+        if dialog.result:
+            submit_write(
+                self, "Adding allocation", self.insert_allocation, dialog.result,
+                on_done=lambda _: self.load_allocations(),
+                on_error=lambda e: self.show_write_error("add", e)
+            )
+    
+    @staticmethod
+    def insert_allocation(session, values):
+        session.add(ProjectAllocation(**values))
     
     def edit_allocation(self):
         """Edit selected project allocation"""
+        values = self.tree.selected_row()
+        if values is None:
+            messagebox.showwarning("Warning", "Please select an allocation to edit.")
+            return
+        key = tuple(values[:4])
+        
         try:
-            selected = self.tree.selection()
-            if not selected:
-                messagebox.showwarning("Warning", "Please select an allocation to edit.")
-                return
-            
-            # Get selected allocation
-            values = self.tree.item(selected[0])["values"]
-            
             session = get_session()
-            allocation = session.query(ProjectAllocation).filter(
-                ProjectAllocation.manager_code == values[0],
-                ProjectAllocation.year == values[1],
-                ProjectAllocation.cost_center == values[2],
-                ProjectAllocation.work_code == values[3]
-            ).first()
-            
-            if not allocation:
+            try:
+                allocation = self.find_allocation(session, key)
+            finally:
                 session.close()
-                messagebox.showerror("Error", "Selected allocation not found in database.")
-                return
-            
-            # Open dialog with current values
-            dialog = ProjectAllocationDialog(self, allocation.manager_code, allocation.year, allocation)
-            self.wait_window(dialog)
-            
-            if dialog.result:
-                # Update allocation
-                allocation.manager_code = dialog.result["manager_code"]
-                allocation.year = dialog.result["year"]
-                allocation.cost_center = dialog.result["cost_center"]
-                allocation.work_code = dialog.result["work_code"]
-                allocation.jan = dialog.result["jan"]
-                allocation.feb = dialog.result["feb"]
-                allocation.mar = dialog.result["mar"]
-                allocation.apr = dialog.result["apr"]
-                allocation.may = dialog.result["may"]
-                allocation.jun = dialog.result["jun"]
-                allocation.jul = dialog.result["jul"]
-                allocation.aug = dialog.result["aug"]
-                allocation.sep = dialog.result["sep"]
-                allocation.oct = dialog.result["oct"]
-                allocation.nov = dialog.result["nov"]
-                allocation.dec = dialog.result["dec"]
-                
-                session.commit()
-            
-            session.close()
-            
-            # Reload allocations
-            self.load_allocations()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to edit allocation: {str(e)}")
+            return
+        
+        if not allocation:
+            messagebox.showerror("Error", "Selected allocation not found in database.")
+            return
+        
+        # Open dialog with current values
+        dialog = ProjectAllocationDialog(self, allocation.manager_code, allocation.year, allocation)
+        self.wait_window(dialog)
+        
+        if dialog.result:
+            def on_done(found):
+                self.load_allocations()
+                if not found:
+                    messagebox.showerror("Error", "Selected allocation not found in database.")
+            
+            submit_write(
+                self, "Updating allocation", self.update_allocation, key, dialog.result,
+                on_done=on_done,
+                on_error=lambda e: self.show_write_error("edit", e)
+            )
+    
+    @staticmethod
+    def find_allocation(session, key):
+        """The allocation with a (manager_code, year, cost_center, work_code) key"""
+        manager_code, year, cost_center, work_code = key
+        return session.query(ProjectAllocation).filter(
+            ProjectAllocation.manager_code == manager_code,
+            ProjectAllocation.year == year,
+            ProjectAllocation.cost_center == cost_center,
+            ProjectAllocation.work_code == work_code
+        ).first()
+    
+    @staticmethod
+    def update_allocation(session, key, values):
+        """Apply dialog values to an allocation; False when it no longer exists"""
+        allocation = ProjectAllocationTab.find_allocation(session, key)
+        if not allocation:
+            return False
+        for field, value in values.items():
+            setattr(allocation, field, value)
+        return True
     
     def delete_allocation(self):
         """Delete selected project allocation"""
-        try:
-            selected = self.tree.selection()
-            if not selected:
-                messagebox.showwarning("Warning", "Please select an allocation to delete.")
-                return
-            
-            if not messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this allocation?"):
-                return
-            
-            # Get selected allocation
-            values = self.tree.item(selected[0])["values"]
-            
-            session = get_session()
-            allocation = session.query(ProjectAllocation).filter(
-                ProjectAllocation.manager_code == values[0],
-                ProjectAllocation.year == values[1],
-                ProjectAllocation.cost_center == values[2],
-                ProjectAllocation.work_code == values[3]
-            ).first()
-            
-            if allocation:
-                session.delete(allocation)
-                session.commit()
-            
-            session.close()
-            
-            # Reload allocations
-            self.load_allocations()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete allocation: {str(e)}")
+        values = self.tree.selected_row()
+        if values is None:
+            messagebox.showwarning("Warning", "Please select an allocation to delete.")
+            return
+        
+        if not messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this allocation?"):
+            return
+        
+        submit_write(
+            self, "Deleting allocation", self.remove_allocation, tuple(values[:4]),
+            on_done=lambda _: self.load_allocations(),
+            on_error=lambda e: self.show_write_error("delete", e)
+        )
+    
+    @staticmethod
+    def remove_allocation(session, key):
+        allocation = ProjectAllocationTab.find_allocation(session, key)
+        if allocation:
+            session.delete(allocation)
+    
+    def show_write_error(self, action, error):
+        if isinstance(error, IntegrityError):
+            messagebox.showerror("Error", "An allocation for this manager, year, cost center and work code already exists.")
+        else:
+            messagebox.showerror("Error", f"Failed to {action} allocation: {str(error)}")
 
 class ProjectAllocationDialog(tk.Toplevel):
     def __init__(self, parent, manager_code, year, allocation=None):
@@ -1163,6 +965,12 @@ class ProjectAllocationDialog(tk.Toplevel):
 class ForecastVisualization(ttk.Frame):
     def __init__(self, parent):
         super().__init__(parent)
+        self.chart_cache = ChartCache()
+        self.figure = self.ax = self.canvas = self.latency_text = None
+        self.last_redraw_ms = None
+        self._background = None
+        self._draw_started = None
+        self._pending_entry = None
         self.create_widgets()
     
     def create_widgets(self):
@@ -1247,70 +1055,143 @@ class ForecastVisualization(ttk.Frame):
         # Bind events
         self.year_combo.bind('<<ComboboxSelected>>', lambda e: self.generate_chart())
         self.chart_type_combo.bind('<<ComboboxSelected>>', lambda e: self.generate_chart())
+        self.bind('<Map>', lambda e: self.ensure_canvas())
+    
+    def ensure_canvas(self):
+        """Create the shared figure and canvas the first time the tab is shown.
+        
+        matplotlib is imported here rather than at module load, which keeps
+        it out of the application's startup time.
+        """
+        if self.canvas is not None:
+            return
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        
+        # One figure and canvas for every chart; charts are redrawn into them in place
+        self.figure = Figure(figsize=(10, 6), facecolor=COLORS['white'])
+        self.ax = self.figure.add_subplot(111)
+        # Animated so it can be blitted over a finished chart without a full redraw
+        self.latency_text = self.figure.text(0.99, 0.01, '', ha='right', va='bottom', fontsize=8,
+                                             color=COLORS['text_light'], animated=True)
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.chart_frame)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.canvas.mpl_connect('draw_event', self.on_draw)
     
     def generate_chart(self):
-        # Clear previous chart
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
+        """Show a cached chart, or query its data in the background and draw it"""
+        year = int(self.year_var.get())
+        chart_type = self.chart_type_var.get()
+        version = change_tracking.data_version()
         
-        # Create figure with white background
-        fig = Figure(figsize=(10, 6), facecolor=COLORS['white'])
-        ax = fig.add_subplot(111)
+        entry = self.chart_cache.get(chart_type, year, version)
+        if entry is not None:
+            self.winfo_toplevel().tasks.cancel_named("Generating chart")
+            self.show_cached_chart(chart_type, year, entry)
+            return
         
-        # Set background color
-        ax.set_facecolor(COLORS['white'])
+        self.winfo_toplevel().tasks.submit(
+            "Generating chart", self.fetch_chart_data, chart_type, year,
+            on_done=lambda data: self.render_chart(chart_type, year, version, data),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to generate chart: {str(e)}"),
+            replace=True
+        )
+    
+    def fetch_chart_data(self, task, chart_type, year):
+        """Load the numbers for a chart; runs on a worker thread"""
+        fetcher = chart_data.FETCHERS.get(chart_type)
+        if fetcher is None:
+            return None
         
-        # Get selected year
-        year = int(self.year_var.get())
-        
-        # Generate selected chart type
-        chart_type = self.chart_type_var.get()
-        if chart_type == "Monthly Forecast":
-            self._generate_monthly_forecast_chart(ax, year)
-        elif chart_type == "Manager Allocation":
-            self._generate_manager_allocation_chart(ax, year)
-        elif chart_type == "Employee Type Distribution":
-            self._generate_employee_type_distribution(ax, year)
-        elif chart_type == "GA01 Weeks":
-            self._generate_ga01_weeks_chart(ax, year)
-        elif chart_type == "Planned Changes":
-            self._generate_planned_changes_chart(ax, year)
+        session = get_session()
+        try:
+            return fetcher(session, year)
+        finally:
+            session.close()
+    
+    def render_chart(self, chart_type, year, version, data):
+        """Draw a chart from already loaded data and cache it; runs on the Tk thread"""
+        self.ensure_canvas()
+        entry = CachedChart(data)
+        self.chart_cache.put(chart_type, year, version, entry)
+        self._draw_started = time.perf_counter()
+        self._pending_entry = entry
+        self.plot_chart(chart_type, year, data)
+        self.canvas.draw_idle()
+    
+    def show_cached_chart(self, chart_type, year, entry):
+        """Show a cached chart by restoring its pixels instead of rasterizing it again"""
+        self.ensure_canvas()
+        started = time.perf_counter()
+        # Rebuild the artists (cheap) so resizes and later redraws show this chart
+        self.plot_chart(chart_type, year, entry.data)
+        if entry.snapshot is None or entry.size != self.canvas.get_width_height():
+            self._draw_started = started
+            self._pending_entry = entry
+            self.canvas.draw_idle()
+            return
         
-        # Create canvas
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self._pending_entry = None
+        self._draw_started = None
+        self._background = entry.snapshot
+        self.show_latency((time.perf_counter() - started) * 1000, cached=True)
     
-    def _generate_monthly_forecast_chart(self, ax, year):
-        session = get_session()
-        forecasts = session.query(Forecast).filter(Forecast.year == year).all()
-        session.close()
+    def plot_chart(self, chart_type, year, data):
+        """Replace the contents of the shared axes without drawing them"""
+        ax = self.ax
+        ax.clear()
+        # clear() keeps the equal aspect set by the pie chart
+        ax.set_aspect('auto')
+        
+        # Set background color
+        ax.set_facecolor(COLORS['white'])
         
-        if not forecasts:
+        if not data:
             ax.text(0.5, 0.5, 'No data available', 
                    horizontalalignment='center',
                    verticalalignment='center',
                    transform=ax.transAxes)
+        elif chart_type == "Monthly Forecast":
+            self._generate_monthly_forecast_chart(ax, year, data)
+        elif chart_type == "Manager Allocation":
+            self._generate_manager_allocation_chart(ax, year, data)
+        elif chart_type == "Employee Type Distribution":
+            self._generate_employee_type_distribution(ax, year, data)
+        elif chart_type == "GA01 Weeks":
+            self._generate_ga01_weeks_chart(ax, year, data)
+        elif chart_type == "Planned Changes":
+            self._generate_planned_changes_chart(ax, year, data)
+    
+    def on_draw(self, event):
+        """Keep the pixels of every full redraw for cache hits and latency label blits"""
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        if self._pending_entry is not None:
+            self._pending_entry.snapshot = self._background
+            self._pending_entry.size = self.canvas.get_width_height()
+            self._pending_entry = None
+        
+        if self._draw_started is not None:
+            self.last_redraw_ms = (time.perf_counter() - self._draw_started) * 1000
+            self._draw_started = None
+            self.latency_text.set_text(f"Rendered in {self.last_redraw_ms:.1f} ms")
+        # Animated artists are skipped by draw(); the canvas blits this buffer afterwards
+        self.figure.draw_artist(self.latency_text)
+    
+    def show_latency(self, milliseconds, cached=False):
+        """Update the latency label by blitting it over the last drawn chart"""
+        self.last_redraw_ms = milliseconds
+        source = "Cached" if cached else "Rendered"
+        self.latency_text.set_text(f"{source} in {milliseconds:.1f} ms")
+        if self._background is None:
+            self.canvas.draw_idle()
             return
-        
-        # Prepare data
+        self.canvas.restore_region(self._background)
+        self.figure.draw_artist(self.latency_text)
+        self.canvas.blit(self.figure.bbox)
+    
+    def _generate_monthly_forecast_chart(self, ax, year, total_hours):
         months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
                  'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        total_hours = [0] * 12
-        
-        for forecast in forecasts:
-            total_hours[0] += forecast.jan
-            total_hours[1] += forecast.feb
-            total_hours[2] += forecast.mar
-            total_hours[3] += forecast.apr
-            total_hours[4] += forecast.may
-            total_hours[5] += forecast.jun
-            total_hours[6] += forecast.jul
-            total_hours[7] += forecast.aug
-            total_hours[8] += forecast.sep
-            total_hours[9] += forecast.oct
-            total_hours[10] += forecast.nov
-            total_hours[11] += forecast.dec
         
         # Create bar chart
         bars = ax.bar(months, total_hours, color=COLORS['secondary'])
@@ -1330,35 +1211,12 @@ class ForecastVisualization(ttk.Frame):
                    ha='center', va='bottom')
         
         # Rotate x-axis labels for better readability
-        plt.xticks(rotation=45)
+        ax.tick_params(axis='x', labelrotation=45)
         
         # Add grid
         ax.grid(True, linestyle='--', alpha=0.7)
     
-    def _generate_manager_allocation_chart(self, ax, year):
-        session = get_session()
-        forecasts = session.query(Forecast).filter(Forecast.year == year).all()
-        session.close()
-        
-        if not forecasts:
-            ax.text(0.5, 0.5, 'No data available', 
-                   horizontalalignment='center',
-                   verticalalignment='center',
-                   transform=ax.transAxes)
-            return
-        
-        # Prepare data
-        manager_data = {}
-        for forecast in forecasts:
-            if forecast.manager_code not in manager_data:
-                manager_data[forecast.manager_code] = 0
-            manager_data[forecast.manager_code] += forecast.total_hours
-        
-        # Sort managers by total hours
-        sorted_managers = sorted(manager_data.items(), 
-                               key=lambda x: x[1], 
-                               reverse=True)
-        
+    def _generate_manager_allocation_chart(self, ax, year, sorted_managers):
         # Create horizontal bar chart
         managers = [m[0] for m in sorted_managers]
         hours = [m[1] for m in sorted_managers]
@@ -1377,30 +1235,12 @@ class ForecastVisualization(ttk.Frame):
             width = bar.get_width()
             ax.text(width, bar.get_y() + bar.get_height()/2.,
                    f'{int(width)}',
-                   ha='left', va='center', pad=5)
+                   ha='left', va='center')
         
         # Add grid
         ax.grid(True, linestyle='--', alpha=0.7)
     
-    def _generate_employee_type_distribution(self, ax, year):
-        session = get_session()
-        employees = session.query(Employee).all()
-        session.close()
-        
-        if not employees:
-            ax.text(0.5, 0.5, 'No data available', 
-                   horizontalalignment='center',
-                   verticalalignment='center',
-                   transform=ax.transAxes)
-            return
-        
-        # Count employee types
-        type_counts = {}
-        for employee in employees:
-            if employee.employment_type not in type_counts:
-                type_counts[employee.employment_type] = 0
-            type_counts[employee.employment_type] += 1
-        
+    def _generate_employee_type_distribution(self, ax, year, type_counts):
         # Create pie chart
         types = list(type_counts.keys())
         counts = list(type_counts.values())
@@ -1418,28 +1258,17 @@ class ForecastVisualization(ttk.Frame):
                     pad=20)
         
         # Customize text properties
-        plt.setp(autotexts, size=9, weight="bold")
-        plt.setp(texts, size=10)
+        for autotext in autotexts:
+            autotext.set(size=9, weight="bold")
+        for text in texts:
+            text.set(size=10)
     
-    def _generate_ga01_weeks_chart(self, ax, year):
-        session = get_session()
-        ga01_weeks = session.query(GA01Week).filter(GA01Week.year == year).all()
-        session.close()
-        
-        if not ga01_weeks:
-            ax.text(0.5, 0.5, 'No data available', 
-                   horizontalalignment='center',
-                   verticalalignment='center',
-                   transform=ax.transAxes)
-            return
-        
-        # Prepare data
+    def _generate_ga01_weeks_chart(self, ax, year, weeks):
         months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
                  'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        weeks = [week.weeks for week in ga01_weeks]
         
         # Create bar chart
-        bars = ax.bar(months, weeks, color=COLORS['accent'])
+        bars = ax.bar(months[:len(weeks)], weeks, color=COLORS['accent'])
         
         # Customize chart
         ax.set_title(f'GA01 Weeks - {year}', 
@@ -1452,31 +1281,17 @@ class ForecastVisualization(ttk.Frame):
         for bar in bars:
             height = bar.get_height()
             ax.text(bar.get_x() + bar.get_width()/2., height,
-                   f'{int(height)}',
+                   f'{height:.3g}',
                    ha='center', va='bottom')
         
         # Rotate x-axis labels for better readability
-        plt.xticks(rotation=45)
+        ax.tick_params(axis='x', labelrotation=45)
         
         # Add grid
         ax.grid(True, linestyle='--', alpha=0.7)
     
-    def _generate_planned_changes_chart(self, ax, year):
-        session = get_session()
-        changes = session.query(PlannedChange).filter(PlannedChange.effective_date.between(
-            datetime(year, 1, 1).date(), datetime(year, 12, 31).date())).all()
-        session.close()
-        
-        if not changes:
-            ax.text(0.5, 0.5, 'No data available', 
-                   horizontalalignment='center',
-                   verticalalignment='center',
-                   transform=ax.transAxes)
-            return
-        
-        # Prepare data
+    def _generate_planned_changes_chart(self, ax, year, change_counts):
         change_types = ['New Hire', 'Conversion', 'Termination']
-        change_counts = [sum(1 for change in changes if change.change_type == change_type) for change_type in change_types]
         
         # Create bar chart
         bars = ax.bar(change_types, change_counts, color=COLORS['accent'])
@@ -1556,11 +1371,14 @@ class ForecastTab(ttk.Frame):
         # Add Calculate Forecast button with prominent styling
         calculate_btn = ttk.Button(toolbar, text="Calculate Forecast", command=self.calculate_forecast, style='Primary.TButton')
         calculate_btn.pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="Calculate Range...", command=self.calculate_range).pack(side=tk.LEFT, padx=2)
         
         ttk.Button(toolbar, text="Add Forecast", command=self.add_forecast).pack(side=tk.LEFT, padx=2)
         ttk.Button(toolbar, text="Edit Forecast", command=self.edit_forecast).pack(side=tk.LEFT, padx=2)
         ttk.Button(toolbar, text="Delete Forecast", command=self.delete_forecast).pack(side=tk.LEFT, padx=2)
         ttk.Button(toolbar, text="Refresh", command=self.load_forecasts).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="Export to Excel", command=self.export_forecasts).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="Scenarios...", command=self.open_scenarios).pack(side=tk.LEFT, padx=2)
         
         # Year filter
         year_frame = ttk.Frame(toolbar)
@@ -1578,97 +1396,62 @@ class ForecastTab(ttk.Frame):
         year_combo.pack(side=tk.LEFT, padx=2)
         year_combo.bind("<<ComboboxSelected>>", lambda e: self.load_forecasts())
         
-        # Create treeview with scrollbar
-        self.tree_frame = ttk.Frame(self)
-        self.tree_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        self.tree = ttk.Treeview(self.tree_frame, columns=(
-            "id", "manager_code", "cost_center", "work_code",
-            "jan", "feb", "mar", "apr", "may", "jun",
-            "jul", "aug", "sep", "oct", "nov", "dec", "total"
-        ), show="headings")
-        
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(self.tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        
-        # Configure columns
-        self.tree.heading("id", text="ID")
-        self.tree.heading("manager_code", text="Manager")
-        self.tree.heading("cost_center", text="Cost Center")
-        self.tree.heading("work_code", text="Work Code")
-        self.tree.heading("jan", text="Jan")
-        self.tree.heading("feb", text="Feb")
-        self.tree.heading("mar", text="Mar")
-        self.tree.heading("apr", text="Apr")
-        self.tree.heading("may", text="May")
-        self.tree.heading("jun", text="Jun")
-        self.tree.heading("jul", text="Jul")
-        self.tree.heading("aug", text="Aug")
-        self.tree.heading("sep", text="Sep")
-        self.tree.heading("oct", text="Oct")
-        self.tree.heading("nov", text="Nov")
-        self.tree.heading("dec", text="Dec")
-        self.tree.heading("total", text="Total")
-        
-        # Set column widths
-        self.tree.column("id", width=50)
-        self.tree.column("manager_code", width=80)
-        self.tree.column("cost_center", width=80)
-        self.tree.column("work_code", width=80)
-        for month in ["jan", "feb", "mar", "apr", "may", "jun",
-                     "jul", "aug", "sep", "oct", "nov", "dec"]:
-            self.tree.column(month, width=50)
-        self.tree.column("total", width=70)
-        
-        self.tree.pack(fill=tk.BOTH, expand=True)
+        # Create virtualized grid; only the visible rows become Tk items
+        self.tree = VirtualTreeview(self, columns=[
+            ("id", "ID", 50),
+            ("manager_code", "Manager", 80),
+            ("cost_center", "Cost Center", 80),
+            ("work_code", "Work Code", 80)
+        ] + [(month.lower(), month, 70) for month in MONTH_HEADINGS] + [
+            ("total", "Total", 70)
+        ], formatter=self.format_forecast_row, row_colors=ROW_COLORS)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # Load forecasts
         self.load_forecasts()
     
+    def open_scenarios(self):
+        """Edit what-if scenarios and compare them with the selected year's forecast"""
+        ScenarioDialog(self, int(self.year_var.get()))
+    
+    def export_forecasts(self):
+        """Export the forecasts of the selected year, one sheet per manager"""
+        year = int(self.year_var.get())
+        export_to_excel(self, "Forecasts", f"forecast_{year}.xlsx", 'export_forecasts', year)
+    
+    @staticmethod
+    def format_forecast_row(row):
+        """Append the yearly total to a forecast row"""
+        return tuple(row) + (sum(value or 0 for value in row[4:16]),)
+    
     def load_forecasts(self):
-        """Load forecasts from database"""
+        """Load forecasts for the selected year in the background"""
+        self.winfo_toplevel().tasks.submit(
+            "Loading forecasts", self.query_forecasts, int(self.year_var.get()),
+            on_done=self.show_forecasts,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load forecasts: {str(e)}"),
+            replace=True
+        )
+    
+    @staticmethod
+    def query_forecasts(task, year):
+        """Return (forecast rows, GA01 weeks per month) of a year"""
+        session = get_session()
         try:
-            # Clear existing items
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            session = get_session()
-            year = int(self.year_var.get())
-            forecasts = session.query(Forecast).filter(Forecast.year == year).all()
-            
-            for forecast in forecasts:
-                total = sum([
-                    forecast.jan, forecast.feb, forecast.mar, 
-                    forecast.apr, forecast.may, forecast.jun,
-                    forecast.jul, forecast.aug, forecast.sep,
-                    forecast.oct, forecast.nov, forecast.dec
-                ])
-                
-                self.tree.insert("", tk.END, values=(
-                    forecast.id,
-                    forecast.manager_code,
-                    forecast.cost_center,
-                    forecast.work_code,
-                    forecast.jan,
-                    forecast.feb,
-                    forecast.mar,
-                    forecast.apr,
-                    forecast.may,
-                    forecast.jun,
-                    forecast.jul,
-                    forecast.aug,
-                    forecast.sep,
-                    forecast.oct,
-                    forecast.nov,
-                    forecast.dec,
-                    total
-                ))
-            
+            rows = session.query(
+                Forecast.id, Forecast.manager_code, Forecast.cost_center, Forecast.work_code,
+                *[getattr(Forecast, month) for month in MONTH_COLUMNS]
+            ).filter(Forecast.year == year).all()
+            return rows, ga01_calendar.get_weeks(year, session).weeks
+        finally:
             session.close()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load forecasts: {str(e)}")
+    
+    def show_forecasts(self, result):
+        """Show the loaded rows with each month's GA01 weeks in its heading"""
+        rows, weeks = result
+        for month, month_weeks in zip(MONTH_HEADINGS, weeks):
+            self.tree.tree.heading(month.lower(), text=f"{month} ({month_weeks:.3g}w)")
+        self.tree.set_rows(rows)
     
     def add_forecast(self):
         """Add a new forecast"""
@@ -1676,143 +1459,111 @@ class ForecastTab(ttk.Frame):
         self.wait_window(dialog)
         
         if dialog.result:
-            try:
-                session = get_session()
-                
-                # Calculate total
-                total_hours = sum([
-                    dialog.result["jan"], dialog.result["feb"], dialog.result["mar"],
-                    dialog.result["apr"], dialog.result["may"], dialog.result["jun"],
-                    dialog.result["jul"], dialog.result["aug"], dialog.result["sep"],
-                    dialog.result["oct"], dialog.result["nov"], dialog.result["dec"]
-                ])
-                
-                # Create new forecast
-                forecast = Forecast(
-                    year=dialog.result["year"],
-                    manager_code=dialog.result["manager_code"],
-                    cost_center=dialog.result["cost_center"],
-                    work_code=dialog.result["work_code"],
-                    jan=dialog.result["jan"],
-                    feb=dialog.result["feb"],
-                    mar=dialog.result["mar"],
-                    apr=dialog.result["apr"],
-                    may=dialog.result["may"],
-                    jun=dialog.result["jun"],
-                    jul=dialog.result["jul"],
-                    aug=dialog.result["aug"],
-                    sep=dialog.result["sep"],
-                    oct=dialog.result["oct"],
-                    nov=dialog.result["nov"],
-                    dec=dialog.result["dec"],
-                    total_hours=total_hours
-                )
-                
-                session.add(forecast)
-                session.commit()
-                session.close()
-                
-                # Reload forecasts
+            def on_done(_):
                 self.load_forecasts()
-                
                 messagebox.showinfo("Success", "Forecast added successfully.")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to add forecast: {str(e)}")
+            
+            submit_write(
+                self, "Adding forecast", self.insert_forecast, dialog.result,
+                on_done=on_done,
+                on_error=lambda e: self.show_write_error("add", e)
+            )
+    
+    @staticmethod
+    def insert_forecast(session, values):
+        total_hours = sum(values[month] for month in MONTH_COLUMNS)
+        session.add(Forecast(**values, total_hours=total_hours))
     
     def edit_forecast(self):
         """Edit selected forecast"""
-        selected = self.tree.selection()
-        if not selected:
+        selected = self.tree.selected_row()
+        if selected is None:
             messagebox.showwarning("Warning", "Please select a forecast to edit.")
             return
         
+        # Get ID of selected forecast
+        forecast_id = selected[0]
+        
         try:
-            # Get ID of selected forecast
-            forecast_id = self.tree.item(selected[0])["values"][0]
-            
             session = get_session()
-            forecast = session.query(Forecast).filter(Forecast.id == forecast_id).first()
-            
-            if not forecast:
-                session.close()
-                messagebox.showerror("Error", "Selected forecast not found.")
-                return
-            
-            # Create dialog
-            dialog = ForecastDialog(self, forecast)
-            self.wait_window(dialog)
-            
-            if dialog.result:
-                # Calculate total
-                total_hours = sum([
-                    dialog.result["jan"], dialog.result["feb"], dialog.result["mar"],
-                    dialog.result["apr"], dialog.result["may"], dialog.result["jun"],
-                    dialog.result["jul"], dialog.result["aug"], dialog.result["sep"],
-                    dialog.result["oct"], dialog.result["nov"], dialog.result["dec"]
-                ])
-                
-                # Update forecast
-                forecast.year = dialog.result["year"]
-                forecast.manager_code = dialog.result["manager_code"]
-                forecast.cost_center = dialog.result["cost_center"]
-                forecast.work_code = dialog.result["work_code"]
-                forecast.jan = dialog.result["jan"]
-                forecast.feb = dialog.result["feb"]
-                forecast.mar = dialog.result["mar"]
-                forecast.apr = dialog.result["apr"]
-                forecast.may = dialog.result["may"]
-                forecast.jun = dialog.result["jun"]
-                forecast.jul = dialog.result["jul"]
-                forecast.aug = dialog.result["aug"]
-                forecast.sep = dialog.result["sep"]
-                forecast.oct = dialog.result["oct"]
-                forecast.nov = dialog.result["nov"]
-                forecast.dec = dialog.result["dec"]
-                forecast.total_hours = total_hours
-                
-                session.commit()
-                session.close()
-                
-                # Reload forecasts
-                self.load_forecasts()
-                
-                messagebox.showinfo("Success", "Forecast updated successfully.")
-            else:
+            try:
+                forecast = session.query(Forecast).filter(Forecast.id == forecast_id).first()
+            finally:
                 session.close()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to edit forecast: {str(e)}")
+            return
+        
+        if not forecast:
+            messagebox.showerror("Error", "Selected forecast not found.")
+            return
+        
+        # Create dialog
+        dialog = ForecastDialog(self, forecast)
+        self.wait_window(dialog)
+        
+        if dialog.result:
+            def on_done(found):
+                self.load_forecasts()
+                if found:
+                    messagebox.showinfo("Success", "Forecast updated successfully.")
+                else:
+                    messagebox.showerror("Error", "Selected forecast not found.")
+            
+            submit_write(
+                self, "Updating forecast", self.update_forecast, forecast_id, dialog.result,
+                on_done=on_done,
+                on_error=lambda e: self.show_write_error("edit", e)
+            )
+    
+    @staticmethod
+    def update_forecast(session, forecast_id, values):
+        """Apply dialog values to a forecast; False when it no longer exists"""
+        forecast = session.query(Forecast).filter(Forecast.id == forecast_id).first()
+        if not forecast:
+            return False
+        for field, value in values.items():
+            setattr(forecast, field, value)
+        forecast.total_hours = sum(values[month] for month in MONTH_COLUMNS)
+        return True
     
     def delete_forecast(self):
         """Delete selected forecast"""
-        selected = self.tree.selection()
-        if not selected:
+        selected = self.tree.selected_row()
+        if selected is None:
             messagebox.showwarning("Warning", "Please select a forecast to delete.")
             return
         
         if not messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this forecast?"):
             return
         
-        try:
-            # Get ID of selected forecast
-            forecast_id = self.tree.item(selected[0])["values"][0]
-            
-            session = get_session()
-            forecast = session.query(Forecast).filter(Forecast.id == forecast_id).first()
-            
-            if forecast:
-                session.delete(forecast)
-                session.commit()
-                
-                # Reload forecasts
-                self.load_forecasts()
-                
+        def on_done(found):
+            self.load_forecasts()
+            if found:
                 messagebox.showinfo("Success", "Forecast deleted successfully.")
             else:
                 messagebox.showwarning("Warning", "Selected forecast not found.")
-            
-            session.close()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete forecast: {str(e)}")
+        
+        submit_write(
+            self, "Deleting forecast", self.remove_forecast, selected[0],
+            on_done=on_done,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to delete forecast: {str(e)}")
+        )
+    
+    @staticmethod
+    def remove_forecast(session, forecast_id):
+        """Delete a forecast; False when it no longer exists"""
+        forecast = session.query(Forecast).filter(Forecast.id == forecast_id).first()
+        if not forecast:
+            return False
+        session.delete(forecast)
+        return True
+    
+    def show_write_error(self, action, error):
+        if isinstance(error, IntegrityError):
+            messagebox.showerror("Error", "A forecast for this manager, year, cost center and work code already exists.")
+        else:
+            messagebox.showerror("Error", f"Failed to {action} forecast: {str(error)}")
     
     def calculate_forecast(self):
         """Automatically calculate forecast based on employee data and allocations"""
@@ -1823,155 +1574,144 @@ class ForecastTab(ttk.Frame):
             if not messagebox.askyesno("Confirm Calculate", f"This will calculate forecasts for {year} based on current employee data and allocations. Continue?"):
                 return
             
-            session = get_session()
-            
-            # Get settings for hours calculation
-            settings = session.query(Settings).first()
-            if not settings:
-                messagebox.showerror("Error", "Settings not found. Please configure settings first.")
-                session.close()
-                return
-            
-            # Get all employees
-            employees = session.query(Employee).all()
-            if not employees:
-                messagebox.showwarning("Warning", "No employees found. Please add employees first.")
-                session.close()
-                return
-            
-            # Get all allocations for the year
-            allocations = session.query(ProjectAllocation).filter(ProjectAllocation.year == year).all()
-            
-            # Get all existing forecasts for the year to potentially update
-            existing_forecasts = {}
-            for forecast in session.query(Forecast).filter(Forecast.year == year).all():
-                key = (forecast.manager_code, forecast.cost_center, forecast.work_code)
-                existing_forecasts[key] = forecast
+            # Run on the writer thread so the UI stays responsive
+            self.winfo_toplevel().tasks.submit(
+                f"Calculating {year} forecast", self.run_calculation, year,
+                on_done=self.on_calculation_done,
+                on_error=self.on_calculation_error,
+                write=True
+            )
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to calculate forecast: {str(e)}")
+    
+    @staticmethod
+    def run_calculation(task, year):
+        """Recalculate and store the forecast for a year; runs on a worker thread"""
+        # NumPy is only needed once a calculation runs
+        import forecast_engine
+        
+        session = get_session()
+        try:
+            if not session.query(Employee.id).first():
+                return None
             
-            # Track what we've processed
-            processed_count = 0
-            created_count = 0
-            updated_count = 0
-            
-            # Process each employee
-            for employee in employees:
-                # Skip employees who ended before this year or started after this year
-                if employee.end_date and employee.end_date.year < year:
-                    continue
-                
-                # Determine work code - use employee's work code if available, otherwise use default
-                work_code = employee.work_code if employee.work_code else "DEFAULT"
-                
-                # Determine hours based on employment type
-                monthly_hours = settings.fte_hours if employee.employment_type == EmploymentType.FTE.value else settings.contractor_hours
-                
-                # Calculate which months the employee is active
-                active_months = {month: 1.0 for month in range(1, 13)}  # Default to full month
-                
-                # Adjust for start date if in this year
-                if employee.start_date.year == year:
-                    for month in range(1, employee.start_date.month):
-                        active_months[month] = 0.0
-                    
-                    # If starting mid-month, prorate
-                    if employee.start_date.day > 1:
-                        days_in_month = 30  # Approximation
-                        active_months[employee.start_date.month] = (days_in_month - employee.start_date.day + 1) / days_in_month
-                
-                # Adjust for end date if in this year
-                if employee.end_date and employee.end_date.year == year:
-                    for month in range(employee.end_date.month + 1, 13):
-                        active_months[month] = 0.0
-                    
-                    # If ending mid-month, prorate
-                    if employee.end_date.day < 30:  # Approximation
-                        days_in_month = 30  # Approximation
-                        active_months[employee.end_date.month] = employee.end_date.day / days_in_month
-                
-                # Create or update forecast
-                key = (employee.manager_code, employee.cost_center, work_code)
-                
-                # Calculate monthly hours
-                month_hours = {
-                    "jan": monthly_hours * active_months[1],
-                    "feb": monthly_hours * active_months[2],
-                    "mar": monthly_hours * active_months[3],
-                    "apr": monthly_hours * active_months[4],
-                    "may": monthly_hours * active_months[5],
-                    "jun": monthly_hours * active_months[6],
-                    "jul": monthly_hours * active_months[7],
-                    "aug": monthly_hours * active_months[8],
-                    "sep": monthly_hours * active_months[9],
-                    "oct": monthly_hours * active_months[10],
-                    "nov": monthly_hours * active_months[11],
-                    "dec": monthly_hours * active_months[12]
-                }
-                
-                # Apply any specific allocations for this employee
-                # (This would require linking allocations to employees, which isn't in the current model)
-                # For now, we'll just use the basic calculation
-                
-                # Calculate total hours
-                total_hours = sum(month_hours.values())
-                
-                if key in existing_forecasts:
-                    # Update existing forecast
-                    forecast = existing_forecasts[key]
-                    forecast.jan = month_hours["jan"]
-                    forecast.feb = month_hours["feb"]
-                    forecast.mar = month_hours["mar"]
-                    forecast.apr = month_hours["apr"]
-                    forecast.may = month_hours["may"]
-                    forecast.jun = month_hours["jun"]
-                    forecast.jul = month_hours["jul"]
-                    forecast.aug = month_hours["aug"]
-                    forecast.sep = month_hours["sep"]
-                    forecast.oct = month_hours["oct"]
-                    forecast.nov = month_hours["nov"]
-                    forecast.dec = month_hours["dec"]
-                    forecast.total_hours = total_hours
-                    updated_count += 1
-                else:
-                    # Create new forecast
-                    forecast = Forecast(
-                        year=year,
-                        manager_code=employee.manager_code,
-                        cost_center=employee.cost_center,
-                        work_code=work_code,
-                        jan=month_hours["jan"],
-                        feb=month_hours["feb"],
-                        mar=month_hours["mar"],
-                        apr=month_hours["apr"],
-                        may=month_hours["may"],
-                        jun=month_hours["jun"],
-                        jul=month_hours["jul"],
-                        aug=month_hours["aug"],
-                        sep=month_hours["sep"],
-                        oct=month_hours["oct"],
-                        nov=month_hours["nov"],
-                        dec=month_hours["dec"],
-                        total_hours=total_hours
-                    )
-                    session.add(forecast)
-                    created_count += 1
-                
-                processed_count += 1
+            # Only groups touched by employees edited since the last run are re-derived
+            result, processed_count, created_count, updated_count = forecast_engine.recalculate(
+                session, year, progress=task.report)
             
             # Commit changes
-            session.commit()
+            try:
+                session.commit()
+            except Exception:
+                forecast_engine.invalidate(year)
+                raise
+            return processed_count, created_count, updated_count
+        finally:
             session.close()
+    
+    def calculate_range(self):
+        """Calculate the forecasts of a span of years in one pass"""
+        year = int(self.year_var.get())
+        dialog = YearRangeDialog(self, year, year + 4)
+        self.wait_window(dialog)
+        if not dialog.result:
+            return
+        first_year, last_year = dialog.result
+        self.winfo_toplevel().tasks.submit(
+            f"Calculating {first_year}-{last_year} forecasts", self.run_range_calculation,
+            list(range(first_year, last_year + 1)),
+            on_done=self.on_calculation_done,
+            on_error=self.on_calculation_error,
+            write=True
+        )
+    
+    @staticmethod
+    def run_range_calculation(task, years):
+        """Recalculate and store the forecasts of ``years`` in one transaction; runs on a worker thread"""
+        import forecast_engine
+        
+        session = get_session()
+        try:
+            if not session.query(Employee.id).first():
+                return None
             
-            # Reload forecasts
-            self.load_forecasts()
-            
-            # Show success message
-            messagebox.showinfo("Forecast Calculation Complete", 
-                              f"Processed {processed_count} employees.\n"
-                              f"Created {created_count} new forecasts.\n"
-                              f"Updated {updated_count} existing forecasts.")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to calculate forecast: {str(e)}")
+            results, processed_count, created_count, updated_count = forecast_engine.recalculate_years(
+                session, years, progress=task.report)
+            try:
+                session.commit()
+            except Exception:
+                for year in years:
+                    forecast_engine.invalidate(year)
+                raise
+            return processed_count, created_count, updated_count
+        finally:
+            session.close()
+    
+    def on_calculation_done(self, counts):
+        if counts is None:
+            messagebox.showwarning("Warning", "No employees found. Please add employees first.")
+            return
+        
+        # Reload forecasts
+        self.load_forecasts()
+        
+        # Show success message
+        processed_count, created_count, updated_count = counts
+        messagebox.showinfo("Forecast Calculation Complete", 
+                          f"Processed {processed_count} employees.\n"
+                          f"Created {created_count} new forecasts.\n"
+                          f"Updated {updated_count} existing forecasts.")
+    
+    def on_calculation_error(self, error):
+        if isinstance(error, ValueError):
+            messagebox.showerror("Error", str(error))
+        else:
+            messagebox.showerror("Error", f"Failed to calculate forecast: {str(error)}")
+
+class YearRangeDialog(tk.Toplevel):
+    """Ask for the first and last year of a range"""
+    
+    def __init__(self, parent, first_year, last_year):
+        super().__init__(parent)
+        self.parent = parent
+        self.result = None
+        
+        self.title("Calculate Range")
+        self.resizable(False, False)
+        
+        # Make dialog modal
+        self.transient(parent)
+        self.grab_set()
+        
+        frame = ttk.Frame(self, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        current_year = datetime.now().year
+        years = [str(y) for y in range(current_year - 10, current_year + 21)]
+        self.first_year_var = tk.StringVar(value=str(first_year))
+        self.last_year_var = tk.StringVar(value=str(last_year))
+        ttk.Label(frame, text="From:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        ttk.Combobox(frame, textvariable=self.first_year_var, values=years, width=6).grid(row=0, column=1, sticky=tk.W, pady=5)
+        ttk.Label(frame, text="To:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        ttk.Combobox(frame, textvariable=self.last_year_var, values=years, width=6).grid(row=1, column=1, sticky=tk.W, pady=5)
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.grid(row=2, column=0, columnspan=2, pady=10)
+        ttk.Button(button_frame, text="OK", command=self.on_ok, width=10).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Cancel", command=self.destroy, width=10).pack(side=tk.LEFT, padx=5)
+    
+    def on_ok(self):
+        try:
+            try:
+                first_year, last_year = int(self.first_year_var.get()), int(self.last_year_var.get())
+            except ValueError:
+                raise ValueError("Years must be whole numbers")
+            if first_year > last_year:
+                raise ValueError("The first year must not be after the last year")
+            self.result = (first_year, last_year)
+            self.destroy()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e), parent=self)
 
 class ForecastDialog(tk.Toplevel):
     def __init__(self, parent, forecast=None):
@@ -2216,12 +1956,13 @@ class PlannedChangesTab(ttk.Frame):
             
             session = get_session()
             year = int(self.year_var.get())
-            changes = session.query(PlannedChange).filter(
-                PlannedChange.effective_date.between(
-                    datetime(year, 1, 1).date(), 
-                    datetime(year, 12, 31).date()
-                )
-            ).all()
+            with sql_stats.action("Loading planned changes"):
+                changes = session.query(PlannedChange).filter(
+                    PlannedChange.effective_date.between(
+                        datetime(year, 1, 1).date(), 
+                        datetime(year, 12, 31).date()
+                    )
+                ).all()
             
             # For alternating row colors
             count = 0
@@ -2259,35 +2000,34 @@ class PlannedChangesTab(ttk.Frame):
         self.wait_window(dialog)
         
         if dialog.result:
-            try:
-                session = get_session()
-                
-                # Create new planned change
-                change = PlannedChange(
-                    description=dialog.result["description"],
-                    change_type=dialog.result["change_type"],
-                    effective_date=dialog.result["effective_date"],
-                    name=dialog.result.get("name", ""),
-                    team=dialog.result.get("team", ""),
-                    manager_code=dialog.result.get("manager_code", ""),
-                    cost_center=dialog.result.get("cost_center", ""),
-                    employment_type=dialog.result.get("employment_type", ""),
-                    status=dialog.result["status"]
-                )
-                
-                if dialog.result.get("employee_id"):
-                    change.employee_id = dialog.result["employee_id"]
-                
-                session.add(change)
-                session.commit()
-                session.close()
-                
-                # Reload changes
+            def on_done(_):
                 self.load_changes()
-                
                 messagebox.showinfo("Success", "Planned change added successfully.")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to add planned change: {str(e)}")
+            
+            submit_write(
+                self, "Adding planned change", self.insert_change, dialog.result,
+                on_done=on_done,
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to add planned change: {str(e)}")
+            )
+    
+    @staticmethod
+    def insert_change(session, values):
+        change = PlannedChange()
+        PlannedChangesTab.apply_change_values(change, values)
+        session.add(change)
+    
+    @staticmethod
+    def apply_change_values(change, values):
+        change.description = values["description"]
+        change.change_type = values["change_type"]
+        change.effective_date = values["effective_date"]
+        change.name = values.get("name", "")
+        change.team = values.get("team", "")
+        change.manager_code = values.get("manager_code", "")
+        change.cost_center = values.get("cost_center", "")
+        change.employment_type = values.get("employment_type", "")
+        change.status = values["status"]
+        change.employee_id = values.get("employee_id") or None
     
     def edit_change(self):
         """Edit selected planned change"""
@@ -2301,44 +2041,44 @@ class PlannedChangesTab(ttk.Frame):
             change_id = self.tree.item(selected[0])["values"][0]
             
             session = get_session()
-            change = session.query(PlannedChange).filter(PlannedChange.id == change_id).first()
-            
-            if not change:
+            try:
+                change = session.query(PlannedChange).filter(PlannedChange.id == change_id).first()
+            finally:
                 session.close()
-                messagebox.showerror("Error", "Selected planned change not found.")
-                return
-            
-            # Create dialog
-            dialog = PlannedChangeDialog(self, change)
-            self.wait_window(dialog)
-            
-            if dialog.result:
-                # Update change
-                change.description = dialog.result["description"]
-                change.change_type = dialog.result["change_type"]
-                change.effective_date = dialog.result["effective_date"]
-                change.name = dialog.result.get("name", "")
-                change.team = dialog.result.get("team", "")
-                change.manager_code = dialog.result.get("manager_code", "")
-                change.cost_center = dialog.result.get("cost_center", "")
-                change.employment_type = dialog.result.get("employment_type", "")
-                change.status = dialog.result["status"]
-                
-                if dialog.result.get("employee_id"):
-                    change.employee_id = dialog.result["employee_id"]
-                else:
-                    change.employee_id = None
-                
-                session.commit()
-            
-            session.close()
-            
-            # Reload changes
-            self.load_changes()
-            
-            messagebox.showinfo("Success", "Planned change updated successfully.")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to edit planned change: {str(e)}")
+            return
+        
+        if not change:
+            messagebox.showerror("Error", "Selected planned change not found.")
+            return
+        
+        # Create dialog
+        dialog = PlannedChangeDialog(self, change)
+        self.wait_window(dialog)
+        
+        if dialog.result:
+            def on_done(found):
+                self.load_changes()
+                if found:
+                    messagebox.showinfo("Success", "Planned change updated successfully.")
+                else:
+                    messagebox.showerror("Error", "Selected planned change not found.")
+            
+            submit_write(
+                self, "Updating planned change", self.update_change, change_id, dialog.result,
+                on_done=on_done,
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to edit planned change: {str(e)}")
+            )
+    
+    @staticmethod
+    def update_change(session, change_id, values):
+        """Apply dialog values to a planned change; False when it no longer exists"""
+        change = session.query(PlannedChange).filter(PlannedChange.id == change_id).first()
+        if not change:
+            return False
+        PlannedChangesTab.apply_change_values(change, values)
+        return True
     
     def delete_change(self):
         """Delete selected planned change"""
@@ -2350,25 +2090,24 @@ class PlannedChangesTab(ttk.Frame):
         if not messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this planned change?"):
             return
         
-        try:
-            # Get ID of selected change
-            change_id = self.tree.item(selected[0])["values"][0]
-            
-            session = get_session()
-            change = session.query(PlannedChange).filter(PlannedChange.id == change_id).first()
-            
-            if change:
-                session.delete(change)
-                session.commit()
-            
-            session.close()
-            
-            # Reload changes
+        # Get ID of selected change
+        change_id = self.tree.item(selected[0])["values"][0]
+        
+        def on_done(_):
             self.load_changes()
-            
             messagebox.showinfo("Success", "Planned change deleted successfully.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete planned change: {str(e)}")
+        
+        submit_write(
+            self, "Deleting planned change", self.remove_change, change_id,
+            on_done=on_done,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to delete planned change: {str(e)}")
+        )
+    
+    @staticmethod
+    def remove_change(session, change_id):
+        change = session.query(PlannedChange).filter(PlannedChange.id == change_id).first()
+        if change:
+            session.delete(change)
 
 class PlannedChangeDialog(tk.Toplevel):
     def __init__(self, parent, change=None):
@@ -2651,6 +2390,276 @@ class PlannedChangeDialog(tk.Toplevel):
         self.result = None
         self.destroy()
 
+class ScenarioDialog(tk.Toplevel):
+    """List, create and delete scenarios, edit their overlay and compare them with the base forecast.
+    
+    Weekly hours and planned changes can be overridden here; employee and
+    GA01 week overrides are made through the scenarios module.
+    """
+    
+    def __init__(self, parent, year):
+        super().__init__(parent)
+        self.parent = parent
+        self.year = year
+        self.scenario_ids = []
+        self.change_ids = []
+        
+        self.title(f"Scenarios ({year})")
+        self.geometry("760x480")
+        self.transient(parent)
+        
+        frame = ttk.Frame(self, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Scenario list
+        list_frame = ttk.LabelFrame(frame, text="Scenarios", padding=5)
+        list_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 10))
+        
+        self.scenario_listbox = tk.Listbox(list_frame, height=15, width=28, exportselection=False)
+        self.scenario_listbox.pack(fill=tk.BOTH, expand=True)
+        self.scenario_listbox.bind('<<ListboxSelect>>', lambda e: self.load_overlay())
+        
+        self.name_var = tk.StringVar()
+        ttk.Entry(list_frame, textvariable=self.name_var, width=28).pack(fill=tk.X, pady=(5, 0))
+        list_buttons = ttk.Frame(list_frame)
+        list_buttons.pack(fill=tk.X, pady=5)
+        ttk.Button(list_buttons, text="Create", command=self.create_scenario).pack(side=tk.LEFT, padx=2)
+        ttk.Button(list_buttons, text="Delete", command=self.delete_scenario).pack(side=tk.LEFT, padx=2)
+        
+        ttk.Button(list_frame, text="Compare with Base", command=self.compare,
+                   style='Primary.TButton').pack(fill=tk.X, pady=5)
+        
+        # Overlay of the selected scenario
+        overlay_frame = ttk.Frame(frame)
+        overlay_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        hours_frame = ttk.LabelFrame(overlay_frame, text="Weekly Hours (blank keeps the base value)", padding=5)
+        hours_frame.pack(fill=tk.X)
+        ttk.Label(hours_frame, text="FTE:").pack(side=tk.LEFT)
+        self.fte_hours_var = tk.StringVar()
+        ttk.Entry(hours_frame, textvariable=self.fte_hours_var, width=8).pack(side=tk.LEFT, padx=2)
+        ttk.Label(hours_frame, text="Contractor:").pack(side=tk.LEFT)
+        self.contractor_hours_var = tk.StringVar()
+        ttk.Entry(hours_frame, textvariable=self.contractor_hours_var, width=8).pack(side=tk.LEFT, padx=2)
+        ttk.Button(hours_frame, text="Save", command=self.save_weekly_hours).pack(side=tk.LEFT, padx=5)
+        
+        changes_frame = ttk.LabelFrame(overlay_frame, text="Scenario Planned Changes", padding=5)
+        changes_frame.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
+        changes_buttons = ttk.Frame(changes_frame)
+        changes_buttons.pack(fill=tk.X)
+        ttk.Button(changes_buttons, text="Add Change", command=self.add_change).pack(side=tk.LEFT, padx=2)
+        ttk.Button(changes_buttons, text="Remove Change", command=self.remove_change).pack(side=tk.LEFT, padx=2)
+        
+        self.changes_tree = ttk.Treeview(changes_frame, columns=("description", "change_type", "effective_date", "status"),
+                                         show="headings", selectmode="browse", height=10)
+        for column, heading, width in (("description", "Description", 180), ("change_type", "Type", 100),
+                                       ("effective_date", "Effective Date", 100), ("status", "Status", 90)):
+            self.changes_tree.heading(column, text=heading)
+            self.changes_tree.column(column, width=width)
+        self.changes_tree.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        self.load_scenarios()
+    
+    def selected_scenario_id(self):
+        selection = self.scenario_listbox.curselection()
+        return self.scenario_ids[selection[0]] if selection else None
+    
+    def load_scenarios(self, select_id=None):
+        """Fill the scenario list"""
+        try:
+            session = get_session()
+            try:
+                rows = [(scenario.id, scenario.name) for scenario in scenarios.list_scenarios(session)]
+            finally:
+                session.close()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load scenarios: {str(e)}", parent=self)
+            return
+        
+        self.scenario_listbox.delete(0, tk.END)
+        self.scenario_ids = [scenario_id for scenario_id, _ in rows]
+        for index, (scenario_id, name) in enumerate(rows):
+            self.scenario_listbox.insert(tk.END, name)
+            if scenario_id == select_id:
+                self.scenario_listbox.selection_set(index)
+        self.load_overlay()
+    
+    def load_overlay(self):
+        """Show the weekly hours and planned changes of the selected scenario"""
+        self.fte_hours_var.set("")
+        self.contractor_hours_var.set("")
+        self.changes_tree.delete(*self.changes_tree.get_children())
+        self.change_ids = []
+        scenario_id = self.selected_scenario_id()
+        if scenario_id is None:
+            return
+        try:
+            session = get_session()
+            try:
+                overlay = scenarios.load_overlay(session, scenario_id)
+                if overlay.fte_hours is not None:
+                    self.fte_hours_var.set(f"{overlay.fte_hours:g}")
+                if overlay.contractor_hours is not None:
+                    self.contractor_hours_var.set(f"{overlay.contractor_hours:g}")
+                for change in overlay.planned_changes:
+                    self.change_ids.append(change.id)
+                    self.changes_tree.insert("", tk.END, iid=str(change.id), values=(
+                        change.description, change.change_type,
+                        change.effective_date.strftime("%m/%d/%y") if change.effective_date else "",
+                        change.status))
+            finally:
+                session.close()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load scenario: {str(e)}", parent=self)
+    
+    def submit_scenario_write(self, name, write, *args, on_done=None, failure="save scenario"):
+        """Write on the main window's writer thread, then refresh this dialog if it is still open"""
+        def done(result):
+            if self.winfo_exists() and on_done:
+                on_done(result)
+        
+        submit_write(
+            self.parent, name, write, *args,
+            on_done=done,
+            on_error=lambda e: messagebox.showerror(
+                "Error", f"Failed to {failure}: {str(e)}", parent=self if self.winfo_exists() else None)
+        )
+    
+    def create_scenario(self):
+        self.submit_scenario_write(
+            "Creating scenario", self.insert_scenario, self.name_var.get(),
+            on_done=self.on_scenario_created, failure="create scenario")
+    
+    @staticmethod
+    def insert_scenario(session, name):
+        return scenarios.create_scenario(session, name).id
+    
+    def on_scenario_created(self, scenario_id):
+        self.name_var.set("")
+        self.load_scenarios(select_id=scenario_id)
+    
+    def delete_scenario(self):
+        scenario_id = self.selected_scenario_id()
+        if scenario_id is None:
+            messagebox.showinfo("Info", "Please select a scenario to delete.", parent=self)
+            return
+        name = self.scenario_listbox.get(self.scenario_listbox.curselection()[0])
+        if not messagebox.askyesno("Confirm Delete", f"Delete scenario {name}?", parent=self):
+            return
+        self.submit_scenario_write(
+            "Deleting scenario", scenarios.delete_scenario, scenario_id,
+            on_done=lambda _: self.load_scenarios(), failure="delete scenario")
+    
+    def save_weekly_hours(self):
+        scenario_id = self.selected_scenario_id()
+        if scenario_id is None:
+            messagebox.showinfo("Info", "Please select a scenario first.", parent=self)
+            return
+        values = []
+        for label, var in (("FTE", self.fte_hours_var), ("Contractor", self.contractor_hours_var)):
+            text = var.get().strip()
+            try:
+                values.append(float(text) if text else None)
+            except ValueError:
+                messagebox.showerror("Error", f"Failed to save weekly hours: {label} hours must be a number",
+                                     parent=self)
+                return
+        self.submit_scenario_write(
+            "Saving scenario hours", scenarios.set_weekly_hours, scenario_id, *values,
+            failure="save weekly hours")
+    
+    def add_change(self):
+        """Add a planned change that only exists in the selected scenario"""
+        scenario_id = self.selected_scenario_id()
+        if scenario_id is None:
+            messagebox.showinfo("Info", "Please select a scenario first.", parent=self)
+            return
+        dialog = PlannedChangeDialog(self, None)
+        self.wait_window(dialog)
+        if not dialog.result:
+            return
+        fields = {field: value for field, value in dialog.result.items()
+                  if field in scenarios.PLANNED_CHANGE_FIELDS}
+        self.submit_scenario_write(
+            "Adding scenario change", self.insert_change, scenario_id, fields,
+            on_done=lambda _: self.load_overlay(), failure="add planned change")
+    
+    @staticmethod
+    def insert_change(session, scenario_id, fields):
+        scenarios.add_planned_change(session, scenario_id, **fields)
+    
+    def remove_change(self):
+        selection = self.changes_tree.selection()
+        if not selection:
+            messagebox.showinfo("Info", "Please select a planned change to remove.", parent=self)
+            return
+        self.submit_scenario_write(
+            "Removing scenario change", self.delete_change, int(selection[0]),
+            on_done=lambda _: self.load_overlay(), failure="remove planned change")
+    
+    @staticmethod
+    def delete_change(session, change_id):
+        session.query(ScenarioPlannedChange).filter(
+            ScenarioPlannedChange.id == change_id).delete(synchronize_session=False)
+    
+    def compare(self):
+        """Evaluate the selected scenario on the writer thread and show the differences"""
+        scenario_id = self.selected_scenario_id()
+        if scenario_id is None:
+            messagebox.showinfo("Info", "Please select a scenario to compare.", parent=self)
+            return
+        self.parent.winfo_toplevel().tasks.submit(
+            f"Comparing scenario for {self.year}", self.run_comparison, scenario_id, self.year,
+            on_done=lambda comparison: ScenarioComparisonDialog(self.parent, comparison),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to compare scenario: {str(e)}"),
+            write=True
+        )
+    
+    @staticmethod
+    def run_comparison(task, scenario_id, year):
+        """Compare the scenario with the base forecast; nothing is written, but
+        it runs on the writer thread because it updates the cached base state"""
+        import forecast_engine
+        
+        session = get_session()
+        try:
+            return forecast_engine.evaluate_scenario(session, scenario_id, year)
+        finally:
+            session.close()
+
+class ScenarioComparisonDialog(tk.Toplevel):
+    """Groups whose forecast a scenario changes, with base and scenario totals"""
+    
+    def __init__(self, parent, comparison):
+        super().__init__(parent)
+        self.title(f"Scenario {comparison.name} vs Base ({comparison.year})")
+        self.geometry("1200x500")
+        self.transient(parent)
+        
+        base_total, scenario_total = comparison.totals()
+        ttk.Label(self, text=f"{len(comparison)} groups changed.  Base: {base_total:,.1f} h   "
+                             f"Scenario: {scenario_total:,.1f} h   "
+                             f"Difference: {scenario_total - base_total:+,.1f} h").pack(anchor=tk.W, padx=5, pady=5)
+        
+        tree = VirtualTreeview(self, columns=[
+            ("manager_code", "Manager", 80),
+            ("cost_center", "Cost Center", 80),
+            ("work_code", "Work Code", 80),
+            ("base", "Base", 80),
+            ("scenario", "Scenario", 80),
+            ("difference", "Difference", 80)
+        ] + [(month.lower(), month, 60) for month in MONTH_HEADINGS],
+            formatter=self.format_row, row_colors=ROW_COLORS)
+        tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        tree.set_rows(list(comparison.rows()))
+    
+    @staticmethod
+    def format_row(row):
+        """Totals and monthly differences rounded to one decimal"""
+        manager_code, cost_center, work_code, base, scenario, monthly = row
+        return ((manager_code, cost_center, work_code, f"{base:,.1f}", f"{scenario:,.1f}",
+                 f"{scenario - base:+,.1f}") + tuple(f"{value:+,.1f}" for value in monthly))
+
 class SettingsTab(ttk.Frame):
     def __init__(self, parent):
         super().__init__(parent, padding="20")
@@ -2696,6 +2705,20 @@ class SettingsTab(ttk.Frame):
         ttk.Button(button_frame, text="Reset to Defaults", command=self.reset_defaults, 
                   width=15).pack(side=tk.LEFT, padx=5)
         
+        # Columnar snapshots of the whole dataset
+        ttk.Separator(main_frame, orient='horizontal').pack(fill=tk.X, pady=10)
+        snapshot_frame = ttk.Frame(main_frame)
+        snapshot_frame.pack(pady=10)
+        
+        ttk.Label(snapshot_frame, text="Data Snapshot:").pack(side=tk.LEFT, padx=5)
+        self.snapshot_format_var = tk.StringVar(value="parquet")
+        ttk.Combobox(snapshot_frame, textvariable=self.snapshot_format_var,
+                     values=list(snapshot.FORMATS), width=8, state="readonly").pack(side=tk.LEFT, padx=5)
+        ttk.Button(snapshot_frame, text="Export Snapshot", command=self.export_snapshot,
+                  width=15).pack(side=tk.LEFT, padx=5)
+        ttk.Button(snapshot_frame, text="Import Snapshot", command=self.import_snapshot,
+                  width=15).pack(side=tk.LEFT, padx=5)
+        
         # Load current settings
         self.load_settings()
     
@@ -2706,10 +2729,8 @@ class SettingsTab(ttk.Frame):
             settings = session.query(Settings).first()
             
             if not settings:
-                # Create default settings if none exist
+                # Show the defaults; the row is created when the settings are saved
                 settings = Settings(fte_hours=34.5, contractor_hours=39.0)
-                session.add(settings)
-                session.commit()
             
             # Set values in form
             self.fte_hours_var.set(str(settings.fte_hours))
@@ -2721,43 +2742,211 @@ class SettingsTab(ttk.Frame):
     
     def save_settings(self):
         """Save settings to database"""
+        # Validate inputs
         try:
-            # Validate inputs
-            try:
-                fte_hours = float(self.fte_hours_var.get())
-                contractor_hours = float(self.contractor_hours_var.get())
-                
-                if fte_hours <= 0 or contractor_hours <= 0:
-                    raise ValueError("Hours must be positive numbers")
-                    
-            except ValueError:
-                messagebox.showerror("Error", "Please enter valid numbers for hours")
-                return
-            
-            # Save to database
-            session = get_session()
-            settings = session.query(Settings).first()
-            
-            if not settings:
-                settings = Settings()
-                session.add(settings)
-            
-            settings.fte_hours = fte_hours
-            settings.contractor_hours = contractor_hours
-            
-            session.commit()
-            session.close()
+            fte_hours = float(self.fte_hours_var.get())
+            contractor_hours = float(self.contractor_hours_var.get())
             
-            messagebox.showinfo("Success", "Settings saved successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save settings: {str(e)}")
+            if fte_hours <= 0 or contractor_hours <= 0:
+                raise ValueError("Hours must be positive numbers")
+                
+        except ValueError:
+            messagebox.showerror("Error", "Please enter valid numbers for hours")
+            return
+        
+        submit_write(
+            self, "Saving settings", self.write_settings, fte_hours, contractor_hours,
+            on_done=lambda _: messagebox.showinfo("Success", "Settings saved successfully"),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to save settings: {str(e)}")
+        )
+    
+    @staticmethod
+    def write_settings(session, fte_hours, contractor_hours):
+        settings = session.query(Settings).first()
+        
+        if not settings:
+            settings = Settings()
+            session.add(settings)
+        
+        settings.fte_hours = fte_hours
+        settings.contractor_hours = contractor_hours
     
     def reset_defaults(self):
         """Reset settings to default values"""
         self.fte_hours_var.set("34.5")
         self.contractor_hours_var.set("39.0")
+    
+    def export_snapshot(self):
+        """Write every table to columnar files in a chosen folder"""
+        directory = filedialog.askdirectory(title="Select Snapshot Folder")
+        if not directory:
+            return  # User cancelled
+        
+        file_format = self.snapshot_format_var.get()
+        
+        def run_export(task):
+            session = get_session()
+            try:
+                return snapshot.export_snapshot(session, directory, file_format, progress=task.report)
+            finally:
+                session.close()
+        
+        self.winfo_toplevel().tasks.submit(
+            "Exporting snapshot", run_export,
+            on_done=lambda counts: messagebox.showinfo(
+                "Export Complete", f"Exported {sum(counts.values())} rows to {directory}."),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to export snapshot: {str(e)}")
+        )
+    
+    def import_snapshot(self):
+        """Replace all data with a snapshot folder"""
+        directory = filedialog.askdirectory(title="Select Snapshot Folder")
+        if not directory:
+            return  # User cancelled
+        
+        if not messagebox.askyesno("Confirm Import",
+                                   "This will replace all employees, allocations, forecasts, GA01 weeks, "
+                                   "planned changes and settings with the snapshot. Continue?"):
+            return
+        
+        def run_import(task):
+            session = get_session()
+            try:
+                counts = snapshot.import_snapshot(session, directory, progress=task.report)
+                session.commit()
+                return counts
+            finally:
+                session.close()
+        
+        def on_done(counts):
+            self.winfo_toplevel().reload_all()
+            messagebox.showinfo("Import Complete", f"Imported {sum(counts.values())} rows from {directory}.")
+        
+        self.winfo_toplevel().tasks.submit(
+            "Importing snapshot", run_import,
+            on_done=on_done,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to import snapshot: {str(e)}"),
+            write=True
+        )
+
+class DiagnosticsTab(ttk.Frame):
+    """SQL statement counts and timings per action, recorded while enabled"""
+    
+    REFRESH_MS = 1000
+    
+    def __init__(self, parent):
+        super().__init__(parent, padding="10")
+        self._refresh_job = None
+        
+        # Controls
+        control_frame = ttk.Frame(self)
+        control_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.enabled_var = tk.BooleanVar(value=sql_stats.is_enabled())
+        ttk.Checkbutton(control_frame, text="Record SQL statistics", variable=self.enabled_var,
+                        command=self.toggle_recording).pack(side=tk.LEFT, padx=5)
+        ttk.Button(control_frame, text="Refresh", command=self.refresh).pack(side=tk.LEFT, padx=5)
+        ttk.Button(control_frame, text="Reset", command=self.reset).pack(side=tk.LEFT, padx=5)
+        ttk.Button(control_frame, text="Save to Log", command=self.save_log).pack(side=tk.LEFT, padx=5)
+        
+        # Per-action totals
+        columns = ("action", "statements", "total_ms", "mean_ms", "max_ms")
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=10)
+        self.tree.heading("action", text="Action")
+        self.tree.heading("statements", text="Statements")
+        self.tree.heading("total_ms", text="Total (ms)")
+        self.tree.heading("mean_ms", text="Mean (ms)")
+        self.tree.heading("max_ms", text="Slowest (ms)")
+        self.tree.column("action", width=250)
+        for column in columns[1:]:
+            self.tree.column(column, width=100, anchor=tk.E)
+        self.tree.pack(fill=tk.X)
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self.show_slowest())
+        
+        # Slowest statements of the selected action
+        ttk.Label(self, text="Slowest statements of the selected action:").pack(anchor=tk.W, pady=(10, 5))
+        self.slowest_text = tk.Text(self, height=12, wrap=tk.NONE, font=("Courier", 9))
+        self.slowest_text.pack(fill=tk.BOTH, expand=True)
+        
+        self._stats = {}
+        self.refresh()
+    
+    def toggle_recording(self):
+        if self.enabled_var.get():
+            sql_stats.enable()
+            self.schedule_refresh()
+        else:
+            sql_stats.disable()
+            self.refresh()
+    
+    def schedule_refresh(self):
+        """Refresh periodically while recording"""
+        if self._refresh_job is not None:
+            self.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        if not sql_stats.is_enabled():
+            return
+        # Skip the work while another tab is shown
+        if self.winfo_ismapped():
+            self.refresh()
+        self._refresh_job = self.after(self.REFRESH_MS, self.schedule_refresh)
+    
+    def refresh(self):
+        selected = self.tree.selection()
+        self._stats = {stats.name: stats for stats in sql_stats.snapshot()}
+        self.tree.delete(*self.tree.get_children())
+        for name, stats in self._stats.items():
+            self.tree.insert("", tk.END, iid=name, values=(
+                name, stats.count, f"{stats.total_s * 1000:.1f}",
+                f"{stats.mean_s * 1000:.2f}", f"{stats.max_s * 1000:.1f}"))
+        # Keep the selection across refreshes
+        selected = [item for item in selected if item in self._stats]
+        if selected:
+            self.tree.selection_set(selected)
+        self.show_slowest()
+    
+    def show_slowest(self):
+        selected = self.tree.selection()
+        stats = self._stats.get(selected[0]) if selected else None
+        self.slowest_text.delete("1.0", tk.END)
+        if stats is None:
+            return
+        for seconds, text in stats.slowest():
+            self.slowest_text.insert(tk.END, f"{seconds * 1000:8.1f} ms  {text}\n")
+    
+    def reset(self):
+        sql_stats.reset()
+        self.refresh()
+    
+    def save_log(self):
+        """Append the current statistics to a log file"""
+        file_path = filedialog.asksaveasfilename(
+            title="Save SQL Statistics",
+            defaultextension=".log",
+            initialfile="sql_stats.log",
+            confirmoverwrite=False,
+            filetypes=[("Log files", "*.log"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return  # User cancelled
+        try:
+            sql_stats.write_log(file_path)
+            messagebox.showinfo("Saved", f"SQL statistics appended to {file_path}.")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save SQL statistics: {str(e)}")
 
 class ForecastApp(tk.Tk):
+    # (attribute, title, class) of each notebook tab, in display order
+    TABS = [
+        ('employee_tab', "Employees", EmployeeTab),
+        ('allocation_tab', "Allocations", ProjectAllocationTab),
+        ('forecast_tab', "Forecast", ForecastTab),
+        ('planned_changes_tab', "Planned Changes", PlannedChangesTab),
+        ('visualization_tab', "Visualization", ForecastVisualization),
+        ('settings_tab', "Settings", SettingsTab),
+        ('diagnostics_tab', "Diagnostics", DiagnosticsTab),
+    ]
+    
     def __init__(self):
         super().__init__()
         self.title("Forecast Tool")
@@ -2767,32 +2956,11 @@ class ForecastApp(tk.Tk):
         # Configure styles
         configure_styles()
         
-        # Create a main frame to hold everything
-        main_frame = ttk.Frame(self, style='Main.TFrame')
-        main_frame.pack(fill=tk.BOTH, expand=True)
-        
-        # Create notebook for tabs
-        self.notebook = ttk.Notebook(main_frame)
-        self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Create tabs
-        self.employee_tab = EmployeeTab(self.notebook)
-        self.notebook.add(self.employee_tab, text="Employees")
-        
-        self.allocation_tab = ProjectAllocationTab(self.notebook)
-        self.notebook.add(self.allocation_tab, text="Allocations")
-        
-        self.forecast_tab = ForecastTab(self.notebook)
-        self.notebook.add(self.forecast_tab, text="Forecast")
-        
-        self.planned_changes_tab = PlannedChangesTab(self.notebook) 
-        self.notebook.add(self.planned_changes_tab, text="Planned Changes")
-        
-        self.visualization_tab = ForecastVisualization(self.notebook)
-        self.notebook.add(self.visualization_tab, text="Visualization")
-        
-        self.settings_tab = SettingsTab(self.notebook)
-        self.notebook.add(self.settings_tab, text="Settings")
+        # Database loads and calculations run in the background
+        self.tasks = TaskRunner(self)
+        self.tasks.on_status = self.show_task_status
+        self.tasks.on_error = lambda e: messagebox.showerror("Error", str(e))
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Create status bar
         status_frame = ttk.Frame(self, style='Card.TFrame')
@@ -2802,17 +2970,104 @@ class ForecastApp(tk.Tk):
         status_label = ttk.Label(status_frame, textvariable=self.status_var)
         status_label.pack(side=tk.LEFT, padx=5)
         
+        self.cancel_button = ttk.Button(status_frame, text="Cancel", command=self.tasks.cancel_all)
+        self.progress_bar = ttk.Progressbar(status_frame, length=200, maximum=100)
+        
+        # Create a main frame to hold everything
+        main_frame = ttk.Frame(self, style='Main.TFrame')
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Create notebook for tabs
+        self.notebook = ttk.Notebook(main_frame)
+        self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Tabs start as empty frames and are built on first selection, so the
+        # window appears before any tab widgets exist or queries run
+        self._unbuilt_tabs = {}
+        for attribute, title, tab_class in self.TABS:
+            setattr(self, attribute, None)
+            frame = ttk.Frame(self.notebook)
+            self.notebook.add(frame, text=title)
+            self._unbuilt_tabs[str(frame)] = (attribute, tab_class, frame)
+        self._painted = False
+        self.notebook.bind('<<NotebookTabChanged>>', lambda e: self.build_selected_tab())
+        self.bind('<Map>', self.on_first_map)
+        
         # Check database connection
         if not verify_db_connection():
             messagebox.showerror("Database Error", "Failed to connect to database.")
             self.status_var.set("Database connection failed")
-        else:
+        elif not self.tasks.active_tasks:
             self.status_var.set("Connected to database")
+    
+    def show_task_status(self, text, progress):
+        """Show the running background task and its progress in the status bar"""
+        if text is None:
+            self.status_var.set("Ready")
+            self.progress_bar.stop()
+            self.progress_bar.pack_forget()
+            self.cancel_button.pack_forget()
+            return
+        
+        self.status_var.set(text)
+        if not self.progress_bar.winfo_ismapped():
+            self.cancel_button.pack(side=tk.RIGHT, padx=5)
+            self.progress_bar.pack(side=tk.RIGHT, padx=5)
+        
+        if progress is None:
+            if str(self.progress_bar['mode']) != 'indeterminate':
+                self.progress_bar.configure(mode='indeterminate')
+                self.progress_bar.start(10)
+        else:
+            self.progress_bar.stop()
+            self.progress_bar.configure(mode='determinate', value=progress * 100)
+    
+    def on_first_map(self, event):
+        """Build the initially selected tab once the window is on screen"""
+        if event.widget is not self or self._painted:
+            return
+        self._painted = True
+        self.unbind('<Map>')
+        # Idle callbacks run after the pending redraws, i.e. after the first paint
+        self.after_idle(self.build_selected_tab)
+    
+    def build_selected_tab(self):
+        """Construct the selected tab if this is its first selection; it loads its data in the background"""
+        if not self._painted:
+            return
+        entry = self._unbuilt_tabs.pop(self.notebook.select(), None)
+        if entry is None:
+            return
+        attribute, tab_class, frame = entry
+        tab = tab_class(frame)
+        tab.pack(fill=tk.BOTH, expand=True)
+        setattr(self, attribute, tab)
+    
+    def reload_all(self):
+        """Reload every built tab after the data was replaced wholesale"""
+        reloads = [
+            (self.employee_tab, 'load_employees'),
+            (self.allocation_tab, 'load_allocations'),
+            (self.forecast_tab, 'load_forecasts'),
+            (self.planned_changes_tab, 'load_changes'),
+            (self.settings_tab, 'load_settings'),
+        ]
+        # Tabs that have not been built yet load fresh data when first shown
+        for tab, method in reloads:
+            if tab is not None:
+                getattr(tab, method)()
+    
+    def on_close(self):
+        self.tasks.shutdown()
+        self.destroy()
 
 
 if __name__ == "__main__":
-    # Create database tables if they don't exist
+    # Create database tables if they don't exist and upgrade older files
     Base.metadata.create_all(engine)
+    migrate_database(engine)
+    # Calculations need a Settings row even if the Settings tab is never opened
+    ensure_default_settings()
     
     # Create the application
     app = ForecastApp()
@@ -0,0 +1,104 @@
+"""Benchmark the project allocation key lookup with and without its index.
+
+Builds a throwaway SQLite database with --rows project allocations and
+times the same key lookup ProjectAllocationTab.edit_allocation performs,
+first without the composite index and then with it.
+
+    python benchmarks/bench_allocation_lookup.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from database import ProjectAllocation, MONTH_COLUMNS
+
+INDEX_NAME = 'ux_project_allocations_group'
+
+
+def populate(engine, rows, managers, cost_centers, work_codes, years):
+    """Insert ``rows`` allocations with unique (manager, year, cost center, work code) keys"""
+    keys = []
+    batch = []
+    insert = ProjectAllocation.__table__.insert()
+    with engine.begin() as conn:
+        for i in range(rows):
+            key = (f"M{i % managers:05d}", years[0] + (i // managers) % len(years),
+                   f"CC{(i // (managers * len(years))) % cost_centers:04d}",
+                   f"WC{i // (managers * len(years) * cost_centers):04d}")
+            keys.append(key)
+            row = dict(zip(('manager_code', 'year', 'cost_center', 'work_code'), key))
+            row.update((month, 10.0) for month in MONTH_COLUMNS)
+            batch.append(row)
+            if len(batch) == 50000:
+                conn.execute(insert, batch)
+                batch = []
+        if batch:
+            conn.execute(insert, batch)
+    return keys
+
+
+def time_lookups(Session, keys):
+    """Average seconds per edit_allocation-style lookup"""
+    session = Session()
+    start = time.perf_counter()
+    for manager_code, year, cost_center, work_code in keys:
+        allocation = session.query(ProjectAllocation).filter(
+            ProjectAllocation.manager_code == manager_code,
+            ProjectAllocation.year == year,
+            ProjectAllocation.cost_center == cost_center,
+            ProjectAllocation.work_code == work_code
+        ).first()
+        assert allocation is not None
+    elapsed = time.perf_counter() - start
+    session.close()
+    return elapsed / len(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--lookups', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = create_engine(f"sqlite:///{os.path.join(tmpdir, 'bench.db')}")
+        ProjectAllocation.__table__.create(engine)
+        Session = sessionmaker(bind=engine)
+
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP INDEX {INDEX_NAME}"))
+
+        start = time.perf_counter()
+        keys = populate(engine, args.rows, managers=500, cost_centers=40, work_codes=50,
+                        years=list(range(2020, 2030)))
+        print(f"Inserted {args.rows:,} allocations in {time.perf_counter() - start:.1f}s")
+
+        sample = random.sample(keys, min(args.lookups, len(keys)))
+        unindexed = time_lookups(Session, sample)
+        print(f"Without index: {unindexed * 1000:.2f} ms per lookup")
+
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE UNIQUE INDEX {INDEX_NAME} "
+                "ON project_allocations (manager_code, year, cost_center, work_code)"
+            ))
+        print(f"Built index in {time.perf_counter() - start:.1f}s")
+
+        indexed = time_lookups(Session, sample)
+        print(f"With index:    {indexed * 1000:.3f} ms per lookup ({unindexed / indexed:.0f}x faster)")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark forecast_engine.activity_fractions on random employee dates.
+
+Prorates --employees start/end date pairs over one year and reports the
+best of --runs timings.  Target: one million employee-years in under
+TARGET_S seconds; about 0.35 s on the reference machine.
+
+    python benchmarks/bench_proration.py --employees 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from forecast_engine import activity_fractions, year_calendar
+
+TARGET_S = 1.0
+
+
+def random_dates(rng, employees, year):
+    """Start dates over the previous ten years and this one; a fifth of employees also have an end date"""
+    first = np.datetime64(f'{year - 10}-01-01', 'D')
+    span = int((np.datetime64(f'{year + 1}-01-01', 'D') - first).astype(np.int64))
+    start_dates = first + rng.integers(0, span, employees)
+    end_dates = np.where(rng.random(employees) < 0.2,
+                         start_dates + rng.integers(0, 3 * 365, employees),
+                         np.datetime64('NaT'))
+    return start_dates, end_dates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=1000000)
+    parser.add_argument('--year', type=int, default=2026)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    start_dates, end_dates = random_dates(np.random.default_rng(args.seed), args.employees, args.year)
+    year_calendar(args.year)
+
+    best = None
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        fractions = activity_fractions(start_dates, end_dates, args.year)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    print(f"Prorated {args.employees:,} employee-years in {best:.3f}s "
+          f"({fractions.any(axis=1).sum():,} active)")
+    scaled = best * 1000000 / args.employees
+    if scaled > TARGET_S:
+        print(f"Slower than the target of {TARGET_S:.1f}s per million employee-years")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
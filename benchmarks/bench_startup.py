@@ -0,0 +1,85 @@
+"""Measure cold-start import time of the application layers.
+
+Each module is imported in a fresh interpreter several times and the
+median wall time is reported, together with the heavy optional packages
+the import pulled in.  With a display available, --window also times
+ForecastApp() up to its first idle update.
+
+Target: importing app_tkinter must stay under TARGET_MS and must not load
+matplotlib, numpy, openpyxl or pyarrow; they are imported on first use.
+Measured on the reference machine: about 1200 ms with all of them loaded
+eagerly, about 470 ms afterwards (almost all of it SQLAlchemy and Tk).
+
+    python benchmarks/bench_startup.py --runs 5 --window
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGET_MS = 600
+HEAVY_MODULES = ['matplotlib', 'numpy', 'openpyxl', 'pyarrow']
+
+IMPORT_PROBE = """
+import sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - started) * 1000
+print(elapsed, ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+WINDOW_PROBE = """
+import sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+import app_tkinter
+app = app_tkinter.ForecastApp()
+app.update()
+elapsed = (time.perf_counter() - started) * 1000
+app.on_close()
+print(elapsed, ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def run_probe(source, runs):
+    """Median milliseconds and loaded heavy modules over ``runs`` fresh interpreters"""
+    times = []
+    loaded = ''
+    # Run from an empty directory so no forecast_tool.db or config file is picked up
+    with tempfile.TemporaryDirectory() as workdir:
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, '-c', source], cwd=workdir, check=True,
+                                    capture_output=True, text=True).stdout.split()
+            times.append(float(output[0]))
+            loaded = output[1] if len(output) > 1 else ''
+    return statistics.median(times), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--window', action='store_true', help="Also time ForecastApp() (needs a display)")
+    args = parser.parse_args()
+
+    status = 0
+    for module in ['database', 'forecast_engine', 'forecast_tool', 'app_tkinter']:
+        median, loaded = run_probe(IMPORT_PROBE.format(root=REPO_ROOT, module=module, heavy=HEAVY_MODULES),
+                                   args.runs)
+        print(f"import {module:<16} {median:7.1f} ms   heavy modules: {loaded or 'none'}")
+        if module == 'app_tkinter' and (median > TARGET_MS or loaded):
+            print(f"  FAILED: target is {TARGET_MS} ms with no heavy modules")
+            status = 1
+
+    if args.window:
+        median, loaded = run_probe(WINDOW_PROBE.format(root=REPO_ROOT, heavy=HEAVY_MODULES), args.runs)
+        print(f"ForecastApp first paint {median:7.1f} ms   heavy modules: {loaded or 'none'}")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
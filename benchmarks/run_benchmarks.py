@@ -0,0 +1,313 @@
+"""Benchmark suite for the forecast pipeline.
+
+Generates a synthetic database (see synthetic_data.py), then runs every
+hot path headlessly, each in a fresh interpreter so that peak RSS belongs
+to that case alone.  Wall time and the number of SQL statements cover
+the timed section only; peak RSS covers the whole child process,
+including imports.  Results go to a JSON file that a later run can be
+compared against:
+
+    python benchmarks/run_benchmarks.py --employees 100000 --output before.json
+    python benchmarks/run_benchmarks.py --employees 100000 --output after.json --baseline before.json
+
+With --baseline the run fails when any case got more than --tolerance
+slower.  --db reuses an existing database instead of generating one.
+
+Measured on the reference machine with the default dataset shape and
+100,000 employees: calculate (two years) 4.9 s, incremental recalculation
+after 10 edits 0.02 s, charts 3.6 s, the three Excel exports 30 s.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import synthetic_data
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Run order matters: calculate writes the forecasts the later cases read
+CASES = ['calculate', 'calculate_range', 'recalculate_incremental', 'load_employees',
+         'load_allocations', 'load_forecasts', 'charts', 'export_excel', 'export_snapshot',
+         'import_employees']
+
+INCREMENTAL_EDITS = 10
+
+
+class QueryCounter:
+    """Counts statements sent to the shared engine"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self.on_execute)
+
+    def on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def _years(session):
+    from database import GA01Week
+
+    return [year for (year,) in session.query(GA01Week.year).distinct().order_by(GA01Week.year)]
+
+
+def case_calculate(session, workdir, timer):
+    import forecast_engine
+
+    with timer:
+        for year in _years(session):
+            forecast_engine.recalculate(session, year, incremental=False)
+        session.commit()
+
+
+def case_calculate_range(session, workdir, timer):
+    import forecast_engine
+
+    with timer:
+        forecast_engine.recalculate_years(session, _years(session))
+        session.commit()
+
+
+def case_recalculate_incremental(session, workdir, timer):
+    import forecast_engine
+    from database import Employee
+
+    years = _years(session)
+    for year in years:
+        forecast_engine.recalculate(session, year, incremental=False)
+    session.commit()
+
+    employees = session.query(Employee).order_by(Employee.id).limit(INCREMENTAL_EDITS).all()
+    for employee in employees:
+        employee.employment_type = "CONTRACTOR" if employee.employment_type == "FTE" else "FTE"
+    session.commit()
+
+    with timer:
+        for year in years:
+            forecast_engine.recalculate(session, year)
+        session.commit()
+
+
+def case_load_employees(session, workdir, timer):
+    from app_tkinter import EmployeeTab
+
+    with timer:
+        EmployeeTab.query_employees(None)
+
+
+def case_load_allocations(session, workdir, timer):
+    from app_tkinter import ProjectAllocationTab
+
+    with timer:
+        ProjectAllocationTab.query_allocations(None)
+
+
+def case_load_forecasts(session, workdir, timer):
+    from app_tkinter import ForecastTab
+
+    years = _years(session)
+    with timer:
+        for year in years:
+            ForecastTab.query_forecasts(None, year)
+
+
+def case_charts(session, workdir, timer):
+    """Fetch and render every chart for every year on an Agg canvas"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    import chart_data
+    from app_tkinter import ForecastVisualization
+
+    figure = Figure(figsize=(10, 6), dpi=100)
+    FigureCanvasAgg(figure)
+    # Only plot_chart and the _generate_* methods are used; they need the axes, not the Tk widgets
+    view = ForecastVisualization.__new__(ForecastVisualization)
+    view.ax = figure.add_subplot(111)
+
+    years = _years(session)
+    with timer:
+        for year in years:
+            for chart_type, fetch in chart_data.FETCHERS.items():
+                view.plot_chart(chart_type, year, fetch(session, year))
+                figure.canvas.draw()
+
+
+def case_export_excel(session, workdir, timer):
+    import excel_export
+
+    with timer:
+        excel_export.export_employees(session, os.path.join(workdir, 'employees.xlsx'))
+        excel_export.export_allocations(session, os.path.join(workdir, 'allocations.xlsx'))
+        excel_export.export_forecasts(session, os.path.join(workdir, 'forecasts.xlsx'))
+
+
+def case_export_snapshot(session, workdir, timer):
+    import snapshot
+
+    with timer:
+        snapshot.export_snapshot(session, os.path.join(workdir, 'snapshot'))
+
+
+def case_import_employees(session, workdir, timer):
+    """Import the generated employee CSV into an empty database"""
+    import database
+    import employee_import
+
+    database.configure_engine(f"sqlite:///{os.path.join(workdir, 'import.db')}")
+    database.Base.metadata.create_all(database.engine)
+    timer.counter = QueryCounter(database.engine)
+    import_session = database.get_session()
+    try:
+        with timer:
+            employee_import.import_employees(import_session, os.path.join(workdir, 'employees.csv'))
+            import_session.commit()
+    finally:
+        import_session.close()
+
+
+class Timer:
+    """Context manager recording wall time and statements of the timed section"""
+
+    def __init__(self, counter):
+        self.counter = counter
+        self.wall_s = None
+        self.queries = None
+
+    def __enter__(self):
+        self._queries = self.counter.count
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wall_s = time.perf_counter() - self._started
+        self.queries = self.counter.count - self._queries
+
+
+def run_case(name, db_path, workdir):
+    """Run one case in this process and return its measurements"""
+    import resource
+
+    import database
+
+    database.configure_engine(f"sqlite:///{os.path.abspath(db_path)}")
+    timer = Timer(QueryCounter(database.engine))
+    session = database.get_session()
+    try:
+        globals()['case_' + name](session, workdir, timer)
+    finally:
+        session.close()
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    return {'wall_s': round(timer.wall_s, 4), 'peak_rss_mb': round(peak_mb, 1),
+            'queries': timer.queries}
+
+
+def run_in_subprocess(name, db_path, workdir):
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--run-case', name, '--db', db_path,
+         '--workdir', workdir],
+        capture_output=True, text=True)
+    if completed.returncode:
+        raise RuntimeError(f"Case {name} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance):
+    """Print the change of every case against ``baseline``; returns the regressed cases"""
+    regressed = []
+    for name, current in results['cases'].items():
+        previous = baseline.get('cases', {}).get(name)
+        if not previous or not previous['wall_s']:
+            continue
+        change = current['wall_s'] / previous['wall_s'] - 1
+        flag = ""
+        if change > tolerance:
+            regressed.append(name)
+            flag = "  REGRESSION"
+        print(f"  {name:<24} {previous['wall_s']:>9.3f}s -> {current['wall_s']:>9.3f}s "
+              f"({change * 100:+.0f}%){flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    synthetic_data.add_spec_arguments(parser)
+    parser.add_argument('--db', help="Benchmark this database instead of generating one")
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=CASES)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--label', help="Name stored with the results, e.g. a commit")
+    parser.add_argument('--baseline', help="Results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Allowed slowdown against the baseline (default: 0.2 = 20%%)")
+    parser.add_argument('--keep', action='store_true', help="Keep the work directory")
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case, args.db, args.workdir)))
+        return 0
+
+    spec = synthetic_data.spec_from_args(args)
+    workdir = tempfile.mkdtemp(prefix='forecast_bench_')
+    try:
+        # Cases write to the database, so a given --db is copied first
+        db_path = os.path.join(workdir, 'bench.db')
+        started = time.perf_counter()
+        if args.db:
+            shutil.copyfile(args.db, db_path)
+        else:
+            synthetic_data.generate(db_path, spec)
+            print(f"Generated {spec.employees:,} employees in {time.perf_counter() - started:.1f}s")
+        if 'import_employees' in args.cases:
+            synthetic_data.write_employee_csv(os.path.join(workdir, 'employees.csv'), spec)
+
+        results = {
+            'label': args.label,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'dataset': {'db': args.db} if args.db else spec.as_dict(),
+            'cases': {},
+        }
+        for name in CASES:
+            if name not in args.cases:
+                continue
+            result = results['cases'][name] = run_in_subprocess(name, db_path, workdir)
+            print(f"  {name:<24} {result['wall_s']:>9.3f}s {result['peak_rss_mb']:>8.1f} MB "
+                  f"{result['queries']:>7} queries")
+    finally:
+        if args.keep:
+            print(f"Work directory: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, 'w') as results_file:
+        json.dump(results, results_file, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressed = compare(results, json.load(baseline_file), args.tolerance)
+        if regressed:
+            print(f"Slower than baseline: {', '.join(regressed)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""Generate realistic synthetic forecast_tool.db files for benchmarking.
+
+Managers own one to three cost centers, employees are spread over them
+with a 70/30 FTE/contractor mix, staggered start dates and some
+terminations, and each year gets GA01 weeks in a 4-4-5 pattern, project
+allocations per manager, cost center and work code, and planned changes.
+
+    python benchmarks/synthetic_data.py bench.db --employees 100000 --years 2025 2026
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import (Base, Settings, Employee, GA01Week, ProjectAllocation, PlannedChange,
+                      ChangeType, EmploymentType, MONTH_COLUMNS, create_db_engine)
+
+DEFAULTS = {
+    'employees': 10000,
+    'managers': 200,
+    'cost_centers': 400,
+    'work_codes': 50,
+    'planned_changes': 1000,
+    'years': [2025, 2026],
+    'seed': 42,
+}
+
+GA01_PATTERN = [4, 4, 5] * 4
+BATCH_SIZE = 50000
+
+
+class DatasetSpec:
+    """Sizes of a synthetic dataset"""
+
+    def __init__(self, employees=None, managers=None, cost_centers=None, work_codes=None,
+                 planned_changes=None, years=None, seed=None):
+        self.employees = DEFAULTS['employees'] if employees is None else employees
+        self.managers = DEFAULTS['managers'] if managers is None else managers
+        self.cost_centers = DEFAULTS['cost_centers'] if cost_centers is None else cost_centers
+        self.work_codes = DEFAULTS['work_codes'] if work_codes is None else work_codes
+        self.planned_changes = DEFAULTS['planned_changes'] if planned_changes is None else planned_changes
+        self.years = list(DEFAULTS['years'] if years is None else years)
+        self.seed = DEFAULTS['seed'] if seed is None else seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def _manager_cost_centers(spec, rng):
+    """Manager code -> the cost centers it owns"""
+    cost_centers = [f"CC{i:05d}" for i in range(spec.cost_centers)]
+    owned = {}
+    for i in range(spec.managers):
+        code = f"M{i:04d}"
+        owned[code] = rng.sample(cost_centers, min(len(cost_centers), rng.randint(1, 3)))
+    return owned
+
+
+def employee_rows(spec, rng, owned):
+    """Yield employee insert dicts"""
+    managers = list(owned)
+    work_codes = [f"WC{i:04d}" for i in range(spec.work_codes)]
+    first_year = min(spec.years)
+    earliest = date(first_year - 10, 1, 1)
+    span = (date(max(spec.years), 12, 31) - earliest).days
+    for i in range(spec.employees):
+        manager = rng.choice(managers)
+        start = earliest + timedelta(days=rng.randint(0, span))
+        end = None
+        if rng.random() < 0.1:
+            end = start + timedelta(days=rng.randint(30, 3 * 365))
+        yield {
+            'name': f"Employee {i:07d}",
+            'manager_code': manager,
+            'cost_center': rng.choice(owned[manager]),
+            'employment_type': EmploymentType.FTE.value if rng.random() < 0.7 else EmploymentType.CONTRACTOR.value,
+            'work_code': rng.choice(work_codes) if rng.random() < 0.8 else None,
+            'start_date': start,
+            'end_date': end,
+        }
+
+
+def allocation_rows(spec, rng, owned):
+    """Yield project allocation insert dicts, unique per manager/year/cost center/work code"""
+    work_codes = [f"WC{i:04d}" for i in range(spec.work_codes)]
+    for year in spec.years:
+        for manager, cost_centers in owned.items():
+            for cost_center in cost_centers:
+                for work_code in rng.sample(work_codes, min(len(work_codes), 3)):
+                    row = {'manager_code': manager, 'year': year,
+                           'cost_center': cost_center, 'work_code': work_code}
+                    row.update((month, round(rng.uniform(0, 160), 1)) for month in MONTH_COLUMNS)
+                    yield row
+
+
+def planned_change_rows(spec, rng, owned):
+    managers = list(owned)
+    change_types = [change_type.value for change_type in ChangeType]
+    for i in range(spec.planned_changes):
+        year = rng.choice(spec.years)
+        manager = rng.choice(managers)
+        change_type = rng.choice(change_types)
+        yield {
+            'description': f"Planned change {i}",
+            'change_type': change_type,
+            'effective_date': date(year, 1, 1) + timedelta(days=rng.randint(0, 364)),
+            'employee_id': rng.randint(1, max(1, spec.employees)) if change_type != ChangeType.NEW_HIRE.value else None,
+            'name': f"New hire {i}" if change_type == ChangeType.NEW_HIRE.value else None,
+            'manager_code': manager,
+            'cost_center': rng.choice(owned[manager]),
+            'employment_type': EmploymentType.FTE.value,
+            'status': rng.choice(["Planned", "In Progress", "Completed"]),
+        }
+
+
+def _insert(conn, table, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            conn.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        conn.execute(table.insert(), batch)
+
+
+def generate(path, spec):
+    """Create a fresh database at ``path`` filled according to ``spec``"""
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_db_engine(f"sqlite:///{os.path.abspath(path)}")
+    Base.metadata.create_all(engine)
+    rng = random.Random(spec.seed)
+    owned = _manager_cost_centers(spec, rng)
+
+    with engine.begin() as conn:
+        conn.execute(Settings.__table__.insert(), [{'fte_hours': 34.5, 'contractor_hours': 39.0}])
+        conn.execute(GA01Week.__table__.insert(), [
+            {'year': year, 'month': month, 'weeks': weeks}
+            for year in spec.years for month, weeks in enumerate(GA01_PATTERN, 1)])
+        _insert(conn, Employee.__table__, employee_rows(spec, rng, owned))
+        _insert(conn, ProjectAllocation.__table__, allocation_rows(spec, rng, owned))
+        _insert(conn, PlannedChange.__table__, planned_change_rows(spec, rng, owned))
+    engine.dispose()
+
+
+def write_employee_csv(path, spec):
+    """Write employees in the CSV layout EmployeeTab imports"""
+    rng = random.Random(spec.seed)
+    owned = _manager_cost_centers(spec, rng)
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['name', 'manager_code', 'cost_center', 'employment_type', 'start_date', 'end_date'])
+        for row in employee_rows(spec, rng, owned):
+            writer.writerow([row['name'], row['manager_code'], row['cost_center'], row['employment_type'],
+                             row['start_date'].strftime("%m/%d/%y"),
+                             row['end_date'].strftime("%m/%d/%y") if row['end_date'] else ""])
+
+
+def add_spec_arguments(parser):
+    parser.add_argument('--employees', type=int, default=DEFAULTS['employees'])
+    parser.add_argument('--managers', type=int, default=DEFAULTS['managers'])
+    parser.add_argument('--cost-centers', type=int, default=DEFAULTS['cost_centers'])
+    parser.add_argument('--work-codes', type=int, default=DEFAULTS['work_codes'])
+    parser.add_argument('--planned-changes', type=int, default=DEFAULTS['planned_changes'])
+    parser.add_argument('--years', type=int, nargs='+', default=DEFAULTS['years'])
+    parser.add_argument('--seed', type=int, default=DEFAULTS['seed'])
+
+
+def spec_from_args(args):
+    return DatasetSpec(args.employees, args.managers, args.cost_centers, args.work_codes,
+                       args.planned_changes, args.years, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path')
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+    generate(args.path, spec_from_args(args))
+    print(f"Wrote {args.path}")
+
+
+if __name__ == '__main__':
+    main()
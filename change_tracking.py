@@ -0,0 +1,246 @@
+"""Dirty-set tracking of the rows the forecast depends on.
+
+SQLAlchemy mapper events record which employees changed since a consumer
+last looked.  Changes are collected per Session when it flushes and only
+recorded once it commits (and dropped if it rolls back), so a reader on
+another thread never consumes a change before it can see the new rows.
+Settings and GA01 week edits affect every employee, so they mark the
+whole data set dirty, as do planned changes, which can add synthetic
+employees.  Each consumer (e.g. the cached forecast for one year) owns
+its own DirtySet so that consuming changes for one year does not hide
+them from another.
+
+Bulk writes that bypass the ORM must call mark_employee() or mark_all()
+themselves, passing their Session.  Bulk loads that pause the change_log
+triggers log a single global change with log_global_change() instead.
+
+Those marks only cover this process.  The change_log table, filled by
+SQLite triggers, records committed writes from every process (e.g. the
+command-line tool running from cron); read_change_log() returns what
+changed since a reader's last visit.
+
+Separately, a global data version counts committed writes of any kind so
+that caches of derived views (e.g. rendered charts) can tell when to
+refresh.
+"""
+import threading
+import weakref
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, object_session
+
+import database
+from database import Employee, Settings, GA01Week, PlannedChange, ChangeLog
+
+# change_log rows kept by prune_change_log(); readers further behind rebuild in full
+CHANGE_LOG_KEEP = 100000
+
+
+class DirtySet:
+    """Employee ids changed since the last take(), or a full-rebuild flag"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.employee_ids = set()
+        self.full = False
+
+    def __bool__(self):
+        return self.full or bool(self.employee_ids)
+
+    def mark_employee(self, employee_id):
+        with self._lock:
+            self.employee_ids.add(employee_id)
+
+    def mark_all(self):
+        with self._lock:
+            self.full = True
+            self.employee_ids.clear()
+
+    def take(self):
+        """Return (full, employee_ids) and reset the set"""
+        with self._lock:
+            full, ids = self.full, self.employee_ids
+            self.full = False
+            self.employee_ids = set()
+        return full, ids
+
+
+_dirty_sets = weakref.WeakSet()
+
+
+def new_dirty_set():
+    """Create a DirtySet that receives every future change"""
+    dirty = DirtySet()
+    _dirty_sets.add(dirty)
+    return dirty
+
+
+class PendingChanges:
+    """Changes made in a Session that are recorded when it commits"""
+
+    def __init__(self):
+        self.full = False
+        self.employee_ids = set()
+        # Callables run after the commit, in the order first requested
+        self.callbacks = {}
+
+    def apply(self):
+        if self.full:
+            _mark_all_now()
+        else:
+            for employee_id in self.employee_ids:
+                _mark_employee_now(employee_id)
+        for callback in self.callbacks:
+            callback()
+
+
+def _pending(session):
+    pending = session.info.get('pending_changes')
+    if pending is None:
+        pending = session.info['pending_changes'] = PendingChanges()
+    return pending
+
+
+def mark_employee(employee_id, session=None):
+    """Record that a single employee changed.
+
+    With a Session the change is recorded when it commits and dropped if it
+    rolls back; otherwise (e.g. a plain Connection) it is recorded now.
+    """
+    if isinstance(session, Session):
+        _pending(session).employee_ids.add(employee_id)
+    else:
+        _mark_employee_now(employee_id)
+
+
+def mark_all(session=None):
+    """Record a change that affects every employee; ``session`` as in mark_employee()"""
+    if isinstance(session, Session):
+        _pending(session).full = True
+    else:
+        _mark_all_now()
+
+
+def on_commit(session, callback):
+    """Call ``callback`` once ``session`` commits, or now without a Session"""
+    if isinstance(session, Session):
+        _pending(session).callbacks[callback] = None
+    else:
+        callback()
+
+
+def _mark_employee_now(employee_id):
+    for dirty in list(_dirty_sets):
+        dirty.mark_employee(employee_id)
+
+
+def _mark_all_now():
+    for dirty in list(_dirty_sets):
+        dirty.mark_all()
+
+
+def _on_employee_change(mapper, connection, target):
+    mark_employee(target.id, object_session(target))
+
+
+def _on_global_change(mapper, connection, target):
+    mark_all(object_session(target))
+
+
+def _on_session_commit(session):
+    pending = session.info.pop('pending_changes', None)
+    if pending is not None:
+        pending.apply()
+
+
+def _on_session_rollback(session):
+    session.info.pop('pending_changes', None)
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Employee, _event_name, _on_employee_change)
+    event.listen(Settings, _event_name, _on_global_change)
+    event.listen(GA01Week, _event_name, _on_global_change)
+    event.listen(PlannedChange, _event_name, _on_global_change)
+
+event.listen(Session, 'after_commit', _on_session_commit)
+event.listen(Session, 'after_rollback', _on_session_rollback)
+
+
+def read_change_log(connection, after_id):
+    """Return (last_id, full, employee_ids) of the changes logged after ``after_id``.
+
+    ``full`` is set for a change that affects every employee, when
+    ``after_id`` is None (nothing read yet) or when rows after it were
+    pruned.  Pass ``last_id`` as ``after_id`` next time.
+    """
+    table = ChangeLog.__table__
+    first_id, last_id = connection.execute(select(func.min(table.c.id), func.max(table.c.id))).one()
+    if last_id is None:
+        return after_id or 0, after_id is None, set()
+    if after_id is None or first_id > after_id + 1:
+        return last_id, True, set()
+
+    full, employee_ids = False, set()
+    rows = connection.execute(select(table.c.employee_id).where(table.c.id > after_id, table.c.id <= last_id))
+    for employee_id, in rows:
+        if employee_id is None:
+            full = True
+        else:
+            employee_ids.add(employee_id)
+    return last_id, full, (set() if full else employee_ids)
+
+
+def log_global_change(connection):
+    """Log one change that affects every employee, e.g. after a bulk load
+    that paused the change_log triggers; the caller commits"""
+    connection.execute(ChangeLog.__table__.insert().values(employee_id=None))
+
+
+def prune_change_log(connection, keep=CHANGE_LOG_KEEP):
+    """Delete all but the newest ``keep`` change_log rows; the caller commits"""
+    table = ChangeLog.__table__
+    newest = select(func.max(table.c.id)).scalar_subquery()
+    connection.execute(table.delete().where(table.c.id <= newest - keep))
+
+
+_version_lock = threading.Lock()
+_data_version = 0
+
+_WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def data_version():
+    """Counter that increases with every committed write to the database"""
+    return _data_version
+
+
+def bump_data_version():
+    global _data_version
+    with _version_lock:
+        _data_version += 1
+        return _data_version
+
+
+def _on_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip()[:7].upper().startswith(_WRITE_PREFIXES):
+        conn.info['data_changed'] = True
+
+
+def _on_commit(conn):
+    if conn.info.pop('data_changed', False):
+        bump_data_version()
+
+
+def _on_rollback(conn):
+    conn.info.pop('data_changed', None)
+
+
+# Engine-level events also see Core bulk writes such as the forecast upsert
+event.listen(Engine, 'before_cursor_execute', _on_cursor_execute)
+event.listen(Engine, 'commit', _on_commit)
+event.listen(Engine, 'rollback', _on_rollback)
+
+# Everything cached for the previous database is out of date
+database.on_configure(bump_data_version)
@@ -0,0 +1,56 @@
+"""Bounded LRU cache of rendered Visualization charts.
+
+A cached chart keeps its plotted data and a pixel snapshot of the canvas,
+so showing it again needs neither a query nor rasterization.
+
+Entries are keyed by (chart type, year, data version).  The data version
+comes from change_tracking.data_version(), so a chart is only rendered
+again after a committed write; entries from older versions are dropped as
+soon as a chart for a newer version is stored.
+"""
+from collections import OrderedDict
+
+
+class CachedChart:
+    """Data behind a chart and, once it has been drawn, its pixels"""
+
+    def __init__(self, data):
+        self.data = data
+        self.snapshot = None
+        self.size = None
+
+
+class ChartCache:
+    """Least recently used cache of rendered charts"""
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, chart_type, year, version):
+        """Return the cached chart or None"""
+        key = (chart_type, year, version)
+        chart = self._entries.get(key)
+        if chart is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return chart
+
+    def put(self, chart_type, year, version, chart):
+        # Anything rendered from older data can never be hit again
+        for key in [key for key in self._entries if key[2] < version]:
+            del self._entries[key]
+        self._entries[(chart_type, year, version)] = chart
+        self._entries.move_to_end((chart_type, year, version))
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
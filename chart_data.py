@@ -0,0 +1,75 @@
+"""Aggregate queries behind the Visualization charts.
+
+Each function returns only the numbers that get plotted, computed by a
+GROUP BY in SQLite rather than by loading ORM objects into Python, so the
+cost of a chart does not grow with the number of rows it summarizes.
+Functions return None when there is nothing to plot.
+"""
+from datetime import date
+
+from sqlalchemy import func, or_
+
+import ga01_calendar
+from database import Employee, Forecast, ForecastMonth, PlannedChange, ChangeType
+
+CHANGE_TYPES = [change_type.value for change_type in ChangeType]
+
+
+def monthly_forecast(session, year):
+    """Total forecast hours for each month, from the long-format table"""
+    rows = session.query(ForecastMonth.month, func.sum(ForecastMonth.hours)).filter(
+        ForecastMonth.year == year
+    ).group_by(ForecastMonth.month).all()
+    if not rows:
+        return None
+
+    total_hours = [0] * 12
+    for month, hours in rows:
+        total_hours[month - 1] = hours or 0
+    return total_hours
+
+
+def manager_allocation(session, year):
+    """(manager_code, total hours) pairs, largest first"""
+    total = func.sum(Forecast.total_hours)
+    rows = session.query(Forecast.manager_code, total).filter(
+        Forecast.year == year
+    ).group_by(Forecast.manager_code).order_by(total.desc()).all()
+    return [(manager_code, hours or 0) for manager_code, hours in rows]
+
+
+def employee_type_distribution(session, year):
+    """Number of employees employed at some point in ``year`` per employment type"""
+    rows = session.query(Employee.employment_type, func.count(Employee.id)).filter(
+        Employee.start_date <= date(year, 12, 31),
+        or_(Employee.end_date.is_(None), Employee.end_date >= date(year, 1, 1))
+    ).group_by(Employee.employment_type).all()
+    return dict(rows)
+
+
+def ga01_weeks(session, year):
+    """GA01 weeks of all twelve months as used by the forecast, or None if none are configured"""
+    year_weeks = ga01_calendar.get_weeks(year, session)
+    return list(year_weeks.weeks) if year_weeks.is_configured else None
+
+
+def planned_changes(session, year):
+    """Number of planned changes per change type effective in ``year``"""
+    rows = session.query(PlannedChange.change_type, func.count(PlannedChange.id)).filter(
+        PlannedChange.effective_date.between(date(year, 1, 1), date(year, 12, 31))
+    ).group_by(PlannedChange.change_type).all()
+    if not rows:
+        return None
+
+    counts = dict(rows)
+    return [counts.get(change_type, 0) for change_type in CHANGE_TYPES]
+
+
+# Chart type shown in the Visualization tab -> query
+FETCHERS = {
+    "Monthly Forecast": monthly_forecast,
+    "Manager Allocation": manager_allocation,
+    "Employee Type Distribution": employee_type_distribution,
+    "GA01 Weeks": ga01_weeks,
+    "Planned Changes": planned_changes,
+}
@@ -0,0 +1,488 @@
+"""Database engine, session factory and ORM models for the Forecast Tool.
+
+This module has no GUI dependencies so the forecast engine, scripts and
+the Tkinter application can all share the same schema.
+"""
+from sqlalchemy import create_engine, event, text, DDL, Column, Integer, String, Float, Date, Boolean, Index, ForeignKey
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.orm import declarative_base, sessionmaker
+from contextlib import contextmanager
+import configparser
+import enum
+import os
+
+# Month column names used by the wide Forecast/ProjectAllocation tables
+MONTH_COLUMNS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun',
+                 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+
+# Optional [database] url and [sqlite] pragma overrides, read from
+# FORECAST_TOOL_CONFIG or CONFIG_NAME next to the database (see config_file())
+CONFIG_ENV = 'FORECAST_TOOL_CONFIG'
+CONFIG_NAME = 'forecast_tool.ini'
+DEFAULT_DATABASE_URL = 'sqlite:///forecast_tool.db'
+
+# Applied to every SQLite connection.  WAL lets the background readers run
+# while the recalculation writer commits; NORMAL sync is durable in WAL mode
+# except for the last transactions on power loss.
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,       # negative means KiB, i.e. 64 MB
+    'mmap_size': 268435456,     # 256 MB
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,       # ms to wait for the writer instead of failing
+}
+
+def config_file(url=None):
+    """Path of the config file for the database at ``url``.
+
+    FORECAST_TOOL_CONFIG wins; otherwise forecast_tool.ini in the directory
+    of a SQLite database file, or in the working directory, where the
+    default database lives, when no file URL is given.
+    """
+    path = os.environ.get(CONFIG_ENV)
+    if path:
+        return path
+    database_file = make_url(url).database if url else None
+    if database_file and database_file != ':memory:':
+        return os.path.join(os.path.dirname(os.path.abspath(database_file)), CONFIG_NAME)
+    return CONFIG_NAME
+
+def load_config(path=None):
+    """Read the database URL and SQLite pragmas from the config file.
+
+    ``path`` defaults to config_file().  A missing file gives the defaults.
+    A pragma set to an empty value in the [sqlite] section is not applied.
+    """
+    parser = configparser.ConfigParser()
+    parser.read(path or config_file())
+    url = parser.get('database', 'url', fallback=DEFAULT_DATABASE_URL)
+    pragmas = dict(DEFAULT_PRAGMAS)
+    if parser.has_section('sqlite'):
+        pragmas.update(parser.items('sqlite'))
+    return url, pragmas
+
+def create_db_engine(url=None, pragmas=None):
+    """Create an engine that applies ``pragmas`` to each new SQLite connection.
+
+    Both default to the values from load_config(), which reads the config
+    file next to the database at ``url`` when one is given.
+    """
+    if url is None or pragmas is None:
+        config_url, config_pragmas = load_config(config_file(url))
+        url = config_url if url is None else url
+        pragmas = config_pragmas if pragmas is None else pragmas
+
+    new_engine = create_engine(url)
+    if new_engine.dialect.name == 'sqlite':
+        statements = [f"PRAGMA {name}={value}" for name, value in pragmas.items()
+                      if value is not None and str(value).strip() != '']
+
+        @event.listens_for(new_engine, 'connect')
+        def apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.close()
+    return new_engine
+
+# Called without arguments after configure_engine() switches databases
+_engine_listeners = []
+
+def on_configure(callback):
+    """Call ``callback()`` whenever configure_engine() replaces the engine, e.g. to drop caches"""
+    _engine_listeners.append(callback)
+
+def configure_engine(url=None, pragmas=None):
+    """Replace the shared engine and rebind Session to it"""
+    global engine
+    old_engine = engine
+    engine = create_db_engine(url, pragmas)
+    Session.configure(bind=engine)
+    old_engine.dispose()
+    for callback in _engine_listeners:
+        callback()
+    return engine
+
+def database_url(connection):
+    """URL of the database a Connection or Session is bound to, as a cache key"""
+    bind = connection.engine if hasattr(connection, 'engine') else connection.get_bind()
+    return str(bind.url)
+
+# Create database engine
+engine = create_db_engine()
+Base = declarative_base()
+Session = sessionmaker(bind=engine)
+
+def get_session():
+    return Session()
+
+def verify_db_connection():
+    """Verify database connection and reset it if necessary"""
+    try:
+        session = get_session()
+        # Try a simple query
+        session.query(Settings).first()
+        session.close()
+        return True
+    except Exception as e:
+        print(f"Database connection error: {str(e)}")
+        try:
+            # Try to reset the connection
+            configure_engine()
+            # Create tables if they don't exist
+            Base.metadata.create_all(engine)
+            return True
+        except Exception as e:
+            print(f"Failed to reset database connection: {str(e)}")
+            return False
+
+def ensure_default_settings():
+    """Create the Settings row with default hours if the database has none"""
+    session = get_session()
+    try:
+        if not session.query(Settings).first():
+            session.add(Settings(fte_hours=34.5, contractor_hours=39.0))
+            session.commit()
+    finally:
+        session.close()
+
+# Enums
+class EmploymentType(enum.Enum):
+    FTE = "FTE"
+    CONTRACTOR = "CONTRACTOR"
+
+class ChangeType(enum.Enum):
+    NEW_HIRE = "New Hire"
+    CONVERSION = "Conversion"
+    TERMINATION = "Termination"
+
+# Database Models
+class Employee(Base):
+    __tablename__ = 'employees'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    manager_code = Column(String, nullable=False)
+    cost_center = Column(String, nullable=False)
+    employment_type = Column(String, nullable=False)
+    work_code = Column(String, nullable=True)  # Added work code field
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date)
+
+class ProjectAllocation(Base):
+    __tablename__ = 'project_allocations'
+
+    id = Column(Integer, primary_key=True)
+    manager_code = Column(String, nullable=False)
+    cost_center = Column(String, nullable=False)
+    work_code = Column(String, nullable=False)
+    year = Column(Integer, nullable=False)
+    jan = Column(Float, default=0)
+    feb = Column(Float, default=0)
+    mar = Column(Float, default=0)
+    apr = Column(Float, default=0)
+    may = Column(Float, default=0)
+    jun = Column(Float, default=0)
+    jul = Column(Float, default=0)
+    aug = Column(Float, default=0)
+    sep = Column(Float, default=0)
+    oct = Column(Float, default=0)
+    nov = Column(Float, default=0)
+    dec = Column(Float, default=0)
+
+    __table_args__ = (
+        # Allocations are looked up and edited by this key
+        Index('ux_project_allocations_group', 'manager_code', 'year', 'cost_center', 'work_code', unique=True),
+    )
+
+class Settings(Base):
+    __tablename__ = 'settings'
+
+    id = Column(Integer, primary_key=True)
+    fte_hours = Column(Float, default=34.5)
+    contractor_hours = Column(Float, default=39.0)
+
+class GA01Week(Base):
+    __tablename__ = 'ga01_weeks'
+
+    id = Column(Integer, primary_key=True)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    weeks = Column(Float, nullable=False)
+
+class PlannedChange(Base):
+    __tablename__ = 'planned_changes'
+
+    id = Column(Integer, primary_key=True)
+    description = Column(String, nullable=False)
+    change_type = Column(String, nullable=False)
+    effective_date = Column(Date, nullable=False)
+    employee_id = Column(Integer)
+    target_type = Column(String)
+    name = Column(String)
+    team = Column(String)
+    manager_code = Column(String)
+    cost_center = Column(String)
+    employment_type = Column(String)
+    status = Column(String, nullable=False)
+
+    __table_args__ = (
+        # Planned changes are listed and charted by effective date range
+        Index('ix_planned_changes_effective_date', 'effective_date'),
+    )
+
+class Forecast(Base):
+    __tablename__ = 'forecasts'
+
+    id = Column(Integer, primary_key=True)
+    year = Column(Integer, nullable=False)
+    cost_center = Column(String, nullable=False)
+    manager_code = Column(String, nullable=False)
+    work_code = Column(String, nullable=False)
+    jan = Column(Float, default=0)
+    feb = Column(Float, default=0)
+    mar = Column(Float, default=0)
+    apr = Column(Float, default=0)
+    may = Column(Float, default=0)
+    jun = Column(Float, default=0)
+    jul = Column(Float, default=0)
+    aug = Column(Float, default=0)
+    sep = Column(Float, default=0)
+    oct = Column(Float, default=0)
+    nov = Column(Float, default=0)
+    dec = Column(Float, default=0)
+    total_hours = Column(Float, default=0)
+
+    __table_args__ = (
+        # One row per group and year; the target of the bulk upsert in forecast_writer.
+        # Its leading year column also serves the per-year filters.
+        Index('ux_forecasts_year_group', 'year', 'manager_code', 'cost_center', 'work_code', unique=True),
+    )
+
+# What-if scenarios: overlays on the base tables, read by forecast_engine.evaluate_scenario.
+# A scenario stores only what it changes; everything else comes from the base rows.
+class Scenario(Base):
+    __tablename__ = 'scenarios'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+    description = Column(String)
+
+class ScenarioEmployee(Base):
+    """Copy of an employee as changed by a scenario; employee_id is None for added employees"""
+    __tablename__ = 'scenario_employees'
+
+    id = Column(Integer, primary_key=True)
+    scenario_id = Column(Integer, ForeignKey('scenarios.id'), nullable=False)
+    employee_id = Column(Integer)
+    name = Column(String)
+    manager_code = Column(String)
+    cost_center = Column(String)
+    employment_type = Column(String)
+    work_code = Column(String)
+    start_date = Column(Date)
+    end_date = Column(Date)
+    removed = Column(Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        Index('ix_scenario_employees_scenario', 'scenario_id', 'employee_id'),
+    )
+
+class ScenarioSettings(Base):
+    """Weekly hours of a scenario; None keeps the base value"""
+    __tablename__ = 'scenario_settings'
+
+    scenario_id = Column(Integer, ForeignKey('scenarios.id'), primary_key=True)
+    fte_hours = Column(Float)
+    contractor_hours = Column(Float)
+
+class ScenarioGA01Week(Base):
+    __tablename__ = 'scenario_ga01_weeks'
+
+    id = Column(Integer, primary_key=True)
+    scenario_id = Column(Integer, ForeignKey('scenarios.id'), nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    weeks = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index('ux_scenario_ga01_weeks_month', 'scenario_id', 'year', 'month', unique=True),
+    )
+
+class ScenarioPlannedChange(Base):
+    """Planned change that only exists in a scenario"""
+    __tablename__ = 'scenario_planned_changes'
+
+    id = Column(Integer, primary_key=True)
+    scenario_id = Column(Integer, ForeignKey('scenarios.id'), nullable=False)
+    description = Column(String, nullable=False)
+    change_type = Column(String, nullable=False)
+    effective_date = Column(Date, nullable=False)
+    employee_id = Column(Integer)
+    target_type = Column(String)
+    name = Column(String)
+    team = Column(String)
+    manager_code = Column(String)
+    cost_center = Column(String)
+    employment_type = Column(String)
+    status = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index('ix_scenario_planned_changes_scenario', 'scenario_id'),
+    )
+
+class ChangeLog(Base):
+    """One row per committed write to a table the forecast depends on.
+
+    Filled by SQLite triggers, so writes from any process or tool are
+    logged.  employee_id is None for changes that affect every employee
+    (settings, GA01 weeks, planned changes) and for edits of the stored
+    forecasts, which a full recalculation restores.
+    """
+    __tablename__ = 'change_log'
+
+    id = Column(Integer, primary_key=True)
+    employee_id = Column(Integer)
+
+    # AUTOINCREMENT ids are never reused, so a reader's last id stays meaningful after pruning
+    __table_args__ = {'sqlite_autoincrement': True}
+
+# Long-format copies of the jan..dec columns, one row per entity and month.
+# SQLite triggers keep them in sync with every write to the wide tables,
+# including the bulk upsert in forecast_writer which bypasses ORM events.
+class ForecastMonth(Base):
+    __tablename__ = 'forecast_months'
+
+    forecast_id = Column(Integer, ForeignKey('forecasts.id'), primary_key=True)
+    month = Column(Integer, primary_key=True)  # 1-12
+    year = Column(Integer, nullable=False)
+    hours = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        # Covers per-year, per-month aggregates without touching the table
+        Index('ix_forecast_months_year_month', 'year', 'month', 'forecast_id', 'hours'),
+        {'sqlite_with_rowid': False},
+    )
+
+class AllocationMonth(Base):
+    __tablename__ = 'allocation_months'
+
+    allocation_id = Column(Integer, ForeignKey('project_allocations.id'), primary_key=True)
+    month = Column(Integer, primary_key=True)  # 1-12
+    year = Column(Integer, nullable=False)
+    hours = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        Index('ix_allocation_months_year_month', 'year', 'month', 'allocation_id', 'hours'),
+        {'sqlite_with_rowid': False},
+    )
+
+# (wide table, long table, long table id column)
+MONTHLY_HOURS_TABLES = [
+    ('forecasts', 'forecast_months', 'forecast_id'),
+    ('project_allocations', 'allocation_months', 'allocation_id'),
+]
+
+def monthly_hours_trigger_sql(wide_table, long_table, id_column):
+    """CREATE TRIGGER statements that mirror ``wide_table`` into ``long_table``"""
+    values = ", ".join(f"(NEW.id, NEW.year, {number}, COALESCE(NEW.{month}, 0))"
+                       for number, month in enumerate(MONTH_COLUMNS, 1))
+    upsert = f"INSERT OR REPLACE INTO {long_table} ({id_column}, year, month, hours) VALUES {values};"
+    # An UPDATE, not INSERT OR REPLACE: SQLite makes trigger statements use the
+    # conflict policy of the outer statement, which aborts under an upsert
+    hours = " ".join(f"WHEN {number} THEN COALESCE(NEW.{month}, 0)"
+                     for number, month in enumerate(MONTH_COLUMNS, 1))
+    update = (f"UPDATE {long_table} SET year = NEW.year, hours = CASE month {hours} END "
+              f"WHERE {id_column} = NEW.id;")
+    # A full recalculation rewrites every forecast, mostly with the same hours
+    changed = " OR ".join(f"OLD.{column} IS NOT NEW.{column}" for column in ['year'] + MONTH_COLUMNS)
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_{wide_table}_months_insert AFTER INSERT ON {wide_table} "
+        f"BEGIN {upsert} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{wide_table}_months_update "
+        f"AFTER UPDATE OF year, {', '.join(MONTH_COLUMNS)} ON {wide_table} WHEN {changed} "
+        f"BEGIN {update} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{wide_table}_months_delete AFTER DELETE ON {wide_table} "
+        f"BEGIN DELETE FROM {long_table} WHERE {id_column} = OLD.id; END",
+    ]
+
+def monthly_hours_fill_sql(wide_table, long_table, id_column):
+    """INSERT ... SELECT that fills an empty ``long_table`` from ``wide_table``"""
+    selects = " UNION ALL ".join(
+        f"SELECT id, year, {number}, COALESCE({month}, 0) FROM {wide_table}"
+        for number, month in enumerate(MONTH_COLUMNS, 1)
+    )
+    return f"INSERT INTO {long_table} ({id_column}, year, month, hours) {selects}"
+
+# Install the triggers whenever create_all() creates a long-format table
+for _wide_table, _long_table, _id_column in MONTHLY_HOURS_TABLES:
+    for _statement in monthly_hours_trigger_sql(_wide_table, _long_table, _id_column):
+        event.listen(Base.metadata.tables[_long_table], 'after_create',
+                     DDL(_statement).execute_if(dialect='sqlite'))
+
+# (table, row id logged for an insert/update, for a delete); None logs a global change
+CHANGE_LOG_TABLES = [
+    ('employees', 'NEW.id', 'OLD.id'),
+    ('settings', None, None),
+    ('ga01_weeks', None, None),
+    ('planned_changes', None, None),
+    # The engine pauses these triggers for its own writes
+    ('forecasts', None, None),
+]
+
+def change_log_trigger_sql():
+    """CREATE TRIGGER statements that log writes to the CHANGE_LOG_TABLES"""
+    statements = []
+    for table, new_id, old_id in CHANGE_LOG_TABLES:
+        for operation, row_id in (('insert', new_id), ('update', new_id), ('delete', old_id)):
+            statements.append(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{table}_change_log_{operation} "
+                f"AFTER {operation.upper()} ON {table} "
+                f"BEGIN INSERT INTO change_log (employee_id) VALUES ({row_id or 'NULL'}); END"
+            )
+    return statements
+
+# The logged tables may be created after change_log, so install once create_all() is done
+for _statement in change_log_trigger_sql():
+    event.listen(Base.metadata, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+
+# Trigger groups that bulk writes can pause
+CHANGE_LOG_TRIGGERS = 'change_log'
+MONTHLY_HOURS_TRIGGERS = 'monthly_hours'
+
+def trigger_group_sql(group):
+    """CREATE TRIGGER statements of a trigger group"""
+    if group == CHANGE_LOG_TRIGGERS:
+        return change_log_trigger_sql()
+    return [statement for wide_table, long_table, id_column in MONTHLY_HOURS_TABLES
+            for statement in monthly_hours_trigger_sql(wide_table, long_table, id_column)]
+
+def trigger_name(statement):
+    # CREATE TRIGGER IF NOT EXISTS <name> ...
+    return statement.split()[5]
+
+@contextmanager
+def pause_triggers(connection, *groups):
+    """Drop the triggers of ``groups`` for the writes made inside the block.
+
+    The triggers are recreated before the block returns.  SQLite DDL is
+    transactional and other connections cannot write until the transaction
+    ends, so they never see the triggers missing, and a rollback restores
+    them.  ``connection`` may be a Connection or a Session.
+    """
+    if not isinstance(connection, Connection):
+        connection = connection.connection()
+    # pysqlite only opens a transaction before DML, so the DROPs would otherwise commit at once
+    driver_connection = connection.connection.driver_connection
+    if not driver_connection.in_transaction:
+        driver_connection.execute("BEGIN")
+
+    statements = [statement for group in groups for statement in trigger_group_sql(group)]
+    for statement in statements:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger_name(statement)}"))
+    try:
+        yield
+    finally:
+        for statement in statements:
+            connection.execute(text(statement))
@@ -0,0 +1,131 @@
+"""Streaming CSV import of employees.
+
+The file is read in chunks of rows.  Each chunk is validated into a batch
+of plain dicts and written with one executemany INSERT, so memory stays
+bounded and no ORM objects are created.  Dates go through a memoized
+parser because HR extracts repeat the same few thousand dates.  Every
+invalid row is recorded in the report rather than aborting the import.
+"""
+import csv
+import os
+from datetime import datetime
+from functools import lru_cache
+
+import change_tracking
+from database import Employee, CHANGE_LOG_TRIGGERS, pause_triggers
+
+REQUIRED_COLUMNS = ['name', 'manager_code', 'cost_center', 'employment_type', 'start_date']
+DATE_FORMAT = "%m/%d/%y"
+CHUNK_SIZE = 10000
+
+
+class ImportReport:
+    """Outcome of an import: the number of rows written and every row error"""
+
+    def __init__(self):
+        self.imported = 0
+        self.errors = []
+
+    @property
+    def error_count(self):
+        return len(self.errors)
+
+    def add_error(self, line_num, message):
+        self.errors.append((line_num, message))
+
+    def error_lines(self, limit=None):
+        errors = self.errors if limit is None else self.errors[:limit]
+        return [f"Row {line_num}: {message}" for line_num, message in errors]
+
+    def write_errors(self, file_path):
+        """Save every row error as a CSV report"""
+        with open(file_path, 'w', newline='', encoding='utf-8') as report_file:
+            writer = csv.writer(report_file)
+            writer.writerow(['row', 'error'])
+            writer.writerows(self.errors)
+
+
+@lru_cache(maxsize=65536)
+def parse_date(text):
+    """Parse a MM/DD/YY date; raises ValueError"""
+    return datetime.strptime(text, DATE_FORMAT).date()
+
+
+def missing_columns(headers):
+    return [column for column in REQUIRED_COLUMNS if column not in (headers or [])]
+
+
+def validate_row(row):
+    """Turn a CSV row into the values of an employees INSERT; raises ValueError"""
+    try:
+        start_date = parse_date(row['start_date'])
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid start date format for {row['name']}: {row['start_date']}. Use MM/DD/YY.")
+
+    end_date = None
+    if row.get('end_date'):
+        try:
+            end_date = parse_date(row['end_date'])
+        except ValueError:
+            raise ValueError(f"Invalid end date format for {row['name']}: {row['end_date']}. Use MM/DD/YY.")
+
+    for column in ('name', 'manager_code', 'cost_center', 'employment_type'):
+        if not row[column]:
+            raise ValueError(f"Missing {column} for {row['name'] or 'unnamed employee'}")
+
+    return {
+        'name': row['name'],
+        'manager_code': row['manager_code'],
+        'cost_center': row['cost_center'],
+        'employment_type': row['employment_type'],
+        'start_date': start_date,
+        'end_date': end_date,
+    }
+
+
+def import_employees(connection, file_path, chunk_size=CHUNK_SIZE, progress=None):
+    """Stream ``file_path`` into the employees table and return an ImportReport.
+
+    ``connection`` may be a Connection or a Session; the caller commits.
+    ``progress(fraction, message)`` is called after every chunk and may
+    raise to abort before the caller commits.  Raises ValueError when
+    required columns are missing.
+    """
+    report = ImportReport()
+    insert = Employee.__table__.insert()
+    file_size = os.path.getsize(file_path) or 1
+
+    # One global change_log row for the whole import instead of one per employee
+    with open(file_path, 'r', newline='', encoding='utf-8-sig') as csvfile, \
+            pause_triggers(connection, CHANGE_LOG_TRIGGERS):
+        reader = csv.DictReader(csvfile)
+        missing = missing_columns(reader.fieldnames)
+        if missing:
+            raise ValueError(f"CSV file is missing required columns: {', '.join(missing)}\n\n"
+                             f"Required columns are: {', '.join(REQUIRED_COLUMNS)}")
+
+        batch = []
+        for row in reader:
+            try:
+                batch.append(validate_row(row))
+            except ValueError as e:
+                report.add_error(reader.line_num, str(e))
+
+            if len(batch) >= chunk_size:
+                connection.execute(insert, batch)
+                report.imported += len(batch)
+                batch = []
+                if progress:
+                    # The underlying binary buffer tracks how far the file has been read
+                    progress(min(csvfile.buffer.tell() / file_size, 1.0),
+                             f"{report.imported:,} employees imported")
+
+        if batch:
+            connection.execute(insert, batch)
+            report.imported += len(batch)
+
+    # The INSERTs bypass the ORM events that feed incremental recalculation
+    if report.imported:
+        change_tracking.log_global_change(connection)
+        change_tracking.mark_all(connection)
+    return report
@@ -0,0 +1,167 @@
+"""Streaming Excel export of forecasts, allocations and employees.
+
+Rows are read in batches from the database cursor and appended to an
+openpyxl ``write_only`` workbook, which spools each sheet to disk as it is
+written.  Memory use therefore stays flat no matter how many rows are
+exported.  Forecasts and allocations get one sheet per manager with
+cost center subtotals, plus a Summary sheet of manager totals.  A forecast
+export of a single year also lists that year's GA01 weeks on the Summary.
+"""
+import re
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from sqlalchemy import select, func
+
+import ga01_calendar
+from database import Employee, Forecast, ProjectAllocation, MONTH_COLUMNS
+
+MONTH_HEADINGS = [month.capitalize() for month in MONTH_COLUMNS]
+
+# Rows fetched from the cursor at a time
+BATCH_SIZE = 2000
+
+# Excel limits sheet titles to 31 characters without []:*?/\
+_INVALID_TITLE_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+_BOLD = Font(bold=True)
+
+
+def sheet_title(name, used):
+    """Return a valid, unique sheet title for ``name`` and record it in ``used``"""
+    title = _INVALID_TITLE_CHARS.sub('_', name or '(blank)')[:31]
+    base, suffix = title, 2
+    while title.lower() in used:
+        tag = f" ({suffix})"
+        title = base[:31 - len(tag)] + tag
+        suffix += 1
+    used.add(title.lower())
+    return title
+
+
+def _bold_row(sheet, values):
+    row = []
+    for value in values:
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.font = _BOLD
+        row.append(cell)
+    return row
+
+
+def _stream(connection, query):
+    """Execute ``query`` and yield its rows in batches without loading them all"""
+    result = connection.execute(query.execution_options(yield_per=BATCH_SIZE))
+    for partition in result.partitions():
+        yield from partition
+
+
+def _count(connection, table, year):
+    query = select(func.count()).select_from(table)
+    if year is not None:
+        query = query.where(table.c.year == year)
+    return connection.execute(query).scalar()
+
+
+def export_monthly(connection, file_path, model, year=None, progress=None, weeks=None):
+    """Export a wide monthly table (forecasts or allocations) by manager.
+
+    Each manager gets a sheet with one row per (year, cost center, work
+    code), a subtotal row after every cost center and a manager total.
+    ``weeks`` (GA01 weeks per month) adds a row under the Summary heading.
+    ``progress(fraction, message)`` is called every batch.  Returns the
+    number of data rows written.
+    """
+    table = model.__table__
+    month_columns = [table.c[month] for month in MONTH_COLUMNS]
+    query = select(table.c.manager_code, table.c.year, table.c.cost_center,
+                   table.c.work_code, *month_columns).order_by(
+        table.c.manager_code, table.c.cost_center, table.c.year, table.c.work_code)
+    if year is not None:
+        query = query.where(table.c.year == year)
+    total_rows = _count(connection, table, year) or 1
+
+    workbook = Workbook(write_only=True)
+    summary = workbook.create_sheet("Summary")
+    summary.append(_bold_row(summary, ["Manager"] + MONTH_HEADINGS + ["Total"]))
+    if weeks is not None:
+        summary.append(["GA01 Weeks"] + list(weeks) + [sum(weeks)])
+    used_titles = {"summary"}
+
+    headers = ["Year", "Cost Center", "Work Code"] + MONTH_HEADINGS + ["Total"]
+    grand_total = [0.0] * 13
+    sheet = manager = cost_center = None
+    manager_total = cost_center_total = None
+    written = 0
+
+    def close_cost_center():
+        sheet.append(_bold_row(sheet, ["", f"{cost_center} Subtotal", ""] + cost_center_total))
+
+    def close_manager():
+        close_cost_center()
+        sheet.append(_bold_row(sheet, ["", "Total", ""] + manager_total))
+        summary.append([manager] + manager_total)
+
+    for row in _stream(connection, query):
+        if sheet is None or row.manager_code != manager:
+            if sheet is not None:
+                close_manager()
+            manager, cost_center = row.manager_code, row.cost_center
+            sheet = workbook.create_sheet(sheet_title(manager, used_titles))
+            sheet.append(_bold_row(sheet, headers))
+            manager_total = [0.0] * 13
+            cost_center_total = [0.0] * 13
+        elif row.cost_center != cost_center:
+            close_cost_center()
+            cost_center = row.cost_center
+            cost_center_total = [0.0] * 13
+
+        hours = [value or 0 for value in row[4:]]
+        hours.append(sum(hours))
+        sheet.append([row.year, row.cost_center, row.work_code] + hours)
+        for totals in (cost_center_total, manager_total, grand_total):
+            for i, value in enumerate(hours):
+                totals[i] += value
+
+        written += 1
+        if progress and written % BATCH_SIZE == 0:
+            progress(written / total_rows, f"{written:,} rows exported")
+
+    if sheet is not None:
+        close_manager()
+    summary.append(_bold_row(summary, ["Grand Total"] + grand_total))
+
+    workbook.save(file_path)
+    return written
+
+
+def export_forecasts(connection, file_path, year=None, progress=None):
+    weeks = ga01_calendar.get_weeks(year, connection).weeks if year is not None else None
+    return export_monthly(connection, file_path, Forecast, year, progress, weeks)
+
+
+def export_allocations(connection, file_path, year=None, progress=None):
+    return export_monthly(connection, file_path, ProjectAllocation, year, progress)
+
+
+def export_employees(connection, file_path, progress=None):
+    """Export every employee to a single sheet; returns the number of rows"""
+    table = Employee.__table__
+    query = select(table.c.id, table.c.name, table.c.manager_code, table.c.cost_center,
+                   table.c.employment_type, table.c.work_code, table.c.start_date,
+                   table.c.end_date).order_by(table.c.manager_code, table.c.name)
+    total_rows = connection.execute(select(func.count()).select_from(table)).scalar() or 1
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Employees")
+    sheet.append(_bold_row(sheet, ["ID", "Name", "Manager Code", "Cost Center", "Type",
+                                   "Work Code", "Start Date", "End Date"]))
+    written = 0
+    for row in _stream(connection, query):
+        sheet.append(list(row))
+        written += 1
+        if progress and written % BATCH_SIZE == 0:
+            progress(written / total_rows, f"{written:,} rows exported")
+
+    workbook.save(file_path)
+    return written
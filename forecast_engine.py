@@ -0,0 +1,763 @@
+"""Headless, vectorized forecast calculation.
+
+The engine loads Employee and Settings rows once, turns them into NumPy
+arrays (employees x 12 months), scales weekly hours by the year's cached
+GA01 weeks in one broadcast multiply and reduces them into the
+(manager_code, cost_center, work_code) x month forecast matrix in a single
+grouped reduction.  Pending planned changes are loaded in one query, sorted
+into a per-employee timeline and applied to those arrays as terminations,
+conversion segments and synthetic new hires.  Several years can be
+computed from one load as a years x employees x 12 array.  It has no GUI
+dependencies so it can be driven from the Tkinter application, tests and
+scripts alike.
+"""
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+import change_tracking
+import database
+import ga01_calendar
+from database import Employee, Settings, PlannedChange, EmploymentType, ChangeType
+from forecast_writer import ForecastWriter
+
+DEFAULT_WORK_CODE = "DEFAULT"
+
+# Above this many changed employees a full rebuild is cheaper than deltas
+INCREMENTAL_LIMIT = 5000
+
+# Planned changes with these statuses are applied; Completed ones are expected
+# to be reflected in the employee rows already and Cancelled ones never happen
+APPLIED_STATUSES = ("Planned", "In Progress")
+
+
+class ForecastInputs:
+    """Employee, settings and GA01 data for one forecast year as arrays"""
+
+    def __init__(self, year, employee_ids, group_keys, employment_types,
+                 start_dates, end_dates, fte_hours, contractor_hours, ga01_weeks):
+        self.year = year
+        self.employee_ids = employee_ids
+        self.group_keys = group_keys
+        self.employment_types = employment_types
+        self.start_dates = start_dates
+        self.end_dates = end_dates
+        self.fte_hours = fte_hours
+        self.contractor_hours = contractor_hours
+        self.ga01_weeks = ga01_weeks
+        # Conversions: employee row, effective date and change in weekly hours
+        self.conversion_rows = np.zeros(0, dtype=np.intp)
+        self.conversion_dates = np.zeros(0, dtype='datetime64[D]')
+        self.conversion_deltas = np.zeros(0)
+
+    @property
+    def employee_count(self):
+        return len(self.employee_ids)
+
+    def type_hours(self, employment_type):
+        """Weekly hours of one employment type"""
+        return self.fte_hours if employment_type == EmploymentType.FTE.value else self.contractor_hours
+
+    def weekly_hours(self):
+        """Weekly hours per employee based on employment type"""
+        is_fte = self.employment_types == EmploymentType.FTE.value
+        return np.where(is_fte, self.fte_hours, self.contractor_hours)
+
+    def hours(self):
+        """Return (hours, active): employees x 12 monthly hours and who works at all this year.
+
+        Monthly hours are weekly hours x GA01 weeks x fraction of the month
+        worked.  A conversion splits an employee-year into segments with
+        different weekly hours; adding the difference in weekly hours from
+        the conversion date on gives the same total as summing the segments.
+        """
+        hours, active = self.hours_by_year([self.year], [self.ga01_weeks])
+        return hours[0], active[0]
+
+    def hours_by_year(self, years, ga01_weeks):
+        """Return (hours, active) as years x employees x 12 and years x employees arrays.
+
+        ``ga01_weeks`` holds the twelve GA01 weeks of each year.  The inputs
+        must include every planned change up to the end of the last year;
+        changes dated after a year contribute nothing to it.
+        """
+        ga01_weeks = np.asarray(ga01_weeks, dtype=float)
+        fractions = np.stack([activity_fractions(self.start_dates, self.end_dates, year) for year in years])
+        hours = self.weekly_hours()[None, :, None] * ga01_weeks[:, None, :] * fractions
+        if len(self.conversion_rows):
+            rows = self.conversion_rows
+            conversion_starts = np.maximum(self.start_dates[rows], self.conversion_dates)
+            for index, year in enumerate(years):
+                after = activity_fractions(conversion_starts, self.end_dates[rows], year,
+                                           late_start_counts_month=False)
+                np.add.at(hours[index], rows,
+                          np.multiply.outer(self.conversion_deltas, ga01_weeks[index]) * after)
+        return hours, fractions.any(axis=2)
+
+
+class ForecastResult:
+    """Forecast hours per (manager_code, cost_center, work_code) group"""
+
+    def __init__(self, year, keys, hours, employee_count):
+        self.year = year
+        self.keys = keys
+        self.hours = hours
+        self.employee_count = employee_count
+
+    def __len__(self):
+        return len(self.keys)
+
+    def totals(self):
+        return self.hours.sum(axis=1)
+
+    def rows(self):
+        """Yield (manager_code, cost_center, work_code, monthly_hours) tuples"""
+        for key, month_hours in zip(self.keys, self.hours.tolist()):
+            yield key + (month_hours,)
+
+
+class YearCalendar:
+    """Per-year calendar table used for proration.
+
+    Days are indexed from 0 = January 1.  Holds each month's first and last
+    day, its calendar and business (Monday-Friday) days, the day its 2nd
+    GA01 week ends (its 10th business day) and a running count of business
+    days, so the business days between any two days is one subtraction.
+    """
+
+    def __init__(self, year):
+        self.year = year
+        self.first_day = np.datetime64(f'{year}-01-01', 'D')
+        self.day_count = int((np.datetime64(f'{year + 1}-01-01', 'D') - self.first_day).astype(np.int64))
+        month_starts = np.arange(f'{year}-01', f'{year + 1}-01', dtype='datetime64[M]').astype('datetime64[D]')
+        self.month_first = (month_starts - self.first_day).astype(np.int32)
+        self.month_last = np.append(self.month_first[1:], self.day_count).astype(np.int32) - 1
+        self.days = self.month_last - self.month_first + 1
+        self.month_of_day = np.repeat(np.arange(12, dtype=np.int32), self.days)
+
+        is_business = np.is_busday(self.first_day + np.arange(self.day_count))
+        # business_before[d] = business days on days 0 .. d-1
+        self.business_before = np.concatenate([[0], np.cumsum(is_business)]).astype(np.int32)
+        self.business_days = self.business_before[self.month_last + 1] - self.business_before[self.month_first]
+        business_day_index = np.flatnonzero(is_business).astype(np.int32)
+        self.second_week_end = business_day_index[self.business_before[self.month_first] + 2 * 5 - 1]
+
+    def day_index(self, dates):
+        """Day index of each date relative to January 1 (NaT becomes 0)"""
+        offsets = np.asarray(dates, dtype='datetime64[D]') - self.first_day
+        return np.where(np.isnat(offsets), 0, offsets.astype(np.int64)).astype(np.int32)
+
+
+@lru_cache(maxsize=16)
+def year_calendar(year):
+    return YearCalendar(year)
+
+
+def load_inputs(session, year, employee_ids=None, overlay=None):
+    """Load everything the forecast for a year depends on in one pass.
+
+    When ``employee_ids`` is given only those employees and their planned
+    changes are loaded, without planned new hires.  A scenarios.ScenarioOverlay
+    is applied on top of the base rows; its added employees and new hires
+    are always included.
+    """
+    settings = session.query(Settings).first()
+    if not settings:
+        raise ValueError("Settings not found. Please configure settings first.")
+    fte_hours, contractor_hours = settings.fte_hours, settings.contractor_hours
+    ga01_weeks = ga01_calendar.get_weeks(year, session).weeks
+
+    query = session.query(
+        Employee.id, Employee.manager_code, Employee.cost_center, Employee.work_code,
+        Employee.employment_type, Employee.start_date, Employee.end_date
+    )
+    if employee_ids is not None:
+        query = query.filter(Employee.id.in_(list(employee_ids)))
+    rows = query.all()
+
+    if overlay is not None:
+        rows = overlay.employee_rows(rows)
+        fte_hours, contractor_hours = overlay.weekly_hours(fte_hours, contractor_hours)
+        ga01_weeks = overlay.weeks(year, ga01_weeks)
+
+    inputs = ForecastInputs(
+        year=year,
+        employee_ids=np.array([r[0] for r in rows], dtype=np.int64),
+        group_keys=[(r[1], r[2], r[3] or DEFAULT_WORK_CODE) for r in rows],
+        employment_types=np.array([r[4] for r in rows], dtype=object),
+        start_dates=np.array([r[5] for r in rows], dtype='datetime64[D]'),
+        end_dates=np.array([r[6] for r in rows], dtype='datetime64[D]'),
+        fte_hours=fte_hours,
+        contractor_hours=contractor_hours,
+        ga01_weeks=np.array(ga01_weeks),
+    )
+    apply_timeline(inputs, load_timeline(session, year, employee_ids, overlay))
+    return inputs
+
+
+class ChangeTimeline:
+    """Planned changes up to the end of a year, sorted by employee and effective date"""
+
+    def __init__(self, employee_ids, change_types, dates, target_types, new_hires):
+        order = np.lexsort((dates, employee_ids))
+        self.employee_ids = employee_ids[order]
+        self.change_types = change_types[order]
+        self.dates = dates[order]
+        self.target_types = target_types[order]
+        # (synthetic employee id, manager_code, cost_center, employment_type, effective date)
+        self.new_hires = new_hires
+
+    def __len__(self):
+        return len(self.employee_ids) + len(self.new_hires)
+
+    def of_type(self, change_type):
+        """Boolean mask of the sorted changes of ``change_type``"""
+        return self.change_types == change_type.value
+
+
+def load_timeline(session, year, employee_ids=None, overlay=None):
+    """Load the applied planned changes effective up to the end of ``year`` in one query.
+
+    The planned changes of an ``overlay`` are added to the base ones.  New
+    hires become synthetic employees: -change id for base changes and
+    ScenarioOverlay.new_hire_id() for the overlay's, so the two never collide.
+    """
+    query = session.query(
+        PlannedChange.id, PlannedChange.change_type, PlannedChange.effective_date,
+        PlannedChange.employee_id, PlannedChange.target_type, PlannedChange.manager_code,
+        PlannedChange.cost_center, PlannedChange.employment_type
+    ).filter(
+        PlannedChange.status.in_(APPLIED_STATUSES),
+        PlannedChange.effective_date <= date(year, 12, 31)
+    )
+    if employee_ids is not None:
+        query = query.filter(PlannedChange.employee_id.in_(list(employee_ids)))
+
+    # Base new hires are left out of partial loads; scenario new hires never are
+    rows = [(row, -row.id if employee_ids is None else None) for row in query]
+    if overlay is not None:
+        last_day = date(year, 12, 31)
+        rows.extend((change, overlay.new_hire_id(change)) for change in overlay.planned_changes
+                    if change.status in APPLIED_STATUSES and change.effective_date <= last_day
+                    and (employee_ids is None or change.employee_id is None
+                         or change.employee_id in employee_ids))
+
+    changes, new_hires = [], []
+    for row, hire_id in rows:
+        if row.change_type == ChangeType.NEW_HIRE.value:
+            # A new hire needs a group to be counted in
+            if hire_id is not None and row.manager_code and row.cost_center:
+                new_hires.append((hire_id, row.manager_code, row.cost_center,
+                                  row.employment_type, row.effective_date))
+        elif row.employee_id is not None:
+            changes.append(row)
+
+    return ChangeTimeline(
+        employee_ids=np.array([row.employee_id for row in changes], dtype=np.int64),
+        change_types=np.array([row.change_type for row in changes], dtype=object),
+        dates=np.array([row.effective_date for row in changes], dtype='datetime64[D]'),
+        target_types=np.array([row.target_type for row in changes], dtype=object),
+        new_hires=new_hires,
+    )
+
+
+def apply_timeline(inputs, timeline):
+    """Apply planned terminations, conversions and new hires to ``inputs``.
+
+    A termination's effective date is the employee's last day.  A
+    conversion switches to its target_type, or to the other employment
+    type when none is set, from its effective date on.  New hires become
+    synthetic employees with the negative ids load_timeline() gave them,
+    so they never collide with real ones.
+    """
+    if not len(timeline):
+        return
+
+    # Map each change to its employee's row; changes of unknown employees are dropped
+    order = np.argsort(inputs.employee_ids, kind='stable')
+    positions = np.searchsorted(inputs.employee_ids[order], timeline.employee_ids)
+    positions = np.minimum(positions, max(len(order) - 1, 0))
+    known = (np.zeros(len(timeline.employee_ids), dtype=bool) if not len(order)
+             else inputs.employee_ids[order][positions] == timeline.employee_ids)
+    rows = order[positions] if len(order) else positions
+
+    # Terminations end employment on the earliest termination date
+    terminations = known & timeline.of_type(ChangeType.TERMINATION)
+    if terminations.any():
+        # Sorted by employee then date, so each employee's first termination is the earliest
+        term_rows, first = np.unique(rows[terminations], return_index=True)
+        term_dates = timeline.dates[terminations][first]
+        current = inputs.end_dates[term_rows]
+        inputs.end_dates[term_rows] = np.where(np.isnat(current) | (term_dates < current),
+                                               term_dates, current)
+
+    # Conversions: one pass over the sorted timeline tracks each employee's type
+    conversions = known & timeline.of_type(ChangeType.CONVERSION)
+    if conversions.any():
+        fte = EmploymentType.FTE.value
+        conversion_rows = rows[conversions]
+        deltas = np.empty(len(conversion_rows))
+        current_types = {}
+        for i, (row, target) in enumerate(zip(conversion_rows.tolist(),
+                                              timeline.target_types[conversions].tolist())):
+            before = current_types.get(row, inputs.employment_types[row])
+            if target not in (fte, EmploymentType.CONTRACTOR.value):
+                target = EmploymentType.CONTRACTOR.value if before == fte else fte
+            current_types[row] = target
+            deltas[i] = inputs.type_hours(target) - inputs.type_hours(before)
+        inputs.conversion_rows = conversion_rows
+        inputs.conversion_dates = timeline.dates[conversions]
+        inputs.conversion_deltas = deltas
+
+    if timeline.new_hires:
+        hires = timeline.new_hires
+        inputs.employee_ids = np.concatenate(
+            [inputs.employee_ids, np.array([hire[0] for hire in hires], dtype=np.int64)])
+        inputs.group_keys = inputs.group_keys + [(hire[1], hire[2], DEFAULT_WORK_CODE) for hire in hires]
+        inputs.employment_types = np.concatenate(
+            [inputs.employment_types, np.array([hire[3] or EmploymentType.FTE.value for hire in hires],
+                                               dtype=object)])
+        inputs.start_dates = np.concatenate(
+            [inputs.start_dates, np.array([hire[4] for hire in hires], dtype='datetime64[D]')])
+        inputs.end_dates = np.concatenate(
+            [inputs.end_dates, np.full(len(hires), np.datetime64('NaT'), dtype='datetime64[D]')])
+
+
+def activity_fractions(start_dates, end_dates, year, late_start_counts_month=True):
+    """Return an (employees x 12) array of the fraction of each month worked.
+
+    Fractions are business days worked / business days in the month.  An
+    employee who starts or ends after the 2nd GA01 week of a month is
+    counted for the entire month; earlier starts and ends are prorated.
+    With ``late_start_counts_month`` False a late start instead takes
+    effect from the next month, as conversions do.  Employees who left
+    before the year or start after it get all zeros.
+    """
+    calendar = year_calendar(year)
+    last_day = calendar.day_count - 1
+    start_dates = np.asarray(start_dates, dtype='datetime64[D]')
+    end_dates = np.asarray(end_dates, dtype='datetime64[D]')
+    starts = calendar.day_index(start_dates)
+    ends = calendar.day_index(end_dates)
+
+    start_in_year = (starts >= 0) & (starts <= last_day)
+    start_month = calendar.month_of_day[np.clip(starts, 0, last_day)]
+    late_start = start_in_year & (starts > calendar.second_week_end[start_month])
+    late_start_day = (calendar.month_first[start_month] if late_start_counts_month
+                      else calendar.month_last[start_month] + 1)
+    starts = np.where(late_start, late_start_day, np.clip(starts, 0, calendar.day_count))
+
+    has_end = ~np.isnat(end_dates)
+    end_in_year = has_end & (ends >= 0) & (ends <= last_day)
+    end_month = calendar.month_of_day[np.clip(ends, 0, last_day)]
+    late_end = end_in_year & (ends > calendar.second_week_end[end_month])
+    ends = np.where(has_end, np.clip(ends, -1, last_day), last_day)
+    ends = np.where(late_end, calendar.month_last[end_month], ends)
+
+    # Business days worked in each month, as differences of the running count
+    first = np.maximum(starts[:, None], calendar.month_first)
+    after_last = np.maximum(np.minimum(ends[:, None], calendar.month_last) + 1, first)
+    worked = calendar.business_before[after_last] - calendar.business_before[first]
+    return worked / calendar.business_days
+
+
+def group_codes(keys):
+    """Map each group key to a dense integer code, returning (codes, unique keys)"""
+    index = {}
+    codes = np.fromiter((index.setdefault(key, len(index)) for key in keys),
+                        dtype=np.intp, count=len(keys))
+    return codes, list(index)
+
+
+def reduce_by_group(codes, hours, group_count):
+    """Sum an (employees x 12) hours array into a (groups x 12) matrix"""
+    flat = (codes[:, None] * 12 + np.arange(12)).ravel()
+    totals = np.bincount(flat, weights=hours.ravel(), minlength=group_count * 12)
+    return totals.reshape(group_count, 12)
+
+
+def compute_forecast(inputs):
+    """Compute the forecast matrix for the year described by ``inputs``"""
+    hours, active = inputs.hours()
+
+    # Only employees active at some point in the year produce forecast rows
+    keys = [key for key, is_active in zip(inputs.group_keys, active) if is_active]
+    codes, unique_keys = group_codes(keys)
+    matrix = reduce_by_group(codes, hours[active], len(unique_keys))
+    return ForecastResult(inputs.year, unique_keys, matrix, int(active.sum()))
+
+
+def calculate_forecast(session, year):
+    """Load inputs for ``year`` and compute its forecast"""
+    return compute_forecast(load_inputs(session, year))
+
+
+class ForecastState:
+    """Cached forecast for one year that can be updated by deltas.
+
+    Keeps each active employee's group and monthly hours so that a change
+    to a few employees only subtracts their old contribution and adds the
+    new one, touching just the affected groups.
+    """
+
+    def __init__(self, year):
+        self.year = year
+        self.dirty = change_tracking.new_dirty_set()
+        # Last change_log id this state reflects; None until the first rebuild
+        self.change_id = None
+        self.dirty.mark_all()
+        self.keys = []
+        self.key_codes = {}
+        self.totals = np.zeros((0, 12))
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.contributions = {}
+        # Group codes updated by refresh_state() but not written yet
+        self.unsaved = set()
+
+    def _code(self, key):
+        code = self.key_codes.get(key)
+        if code is None:
+            code = self.key_codes[key] = len(self.keys)
+            self.keys.append(key)
+            if code >= len(self.totals):
+                grow = max(16, len(self.totals))
+                self.totals = np.vstack([self.totals, np.zeros((grow, 12))])
+                self.counts = np.concatenate([self.counts, np.zeros(grow, dtype=np.int64)])
+        return code
+
+    def rebuild(self, session):
+        """Recompute every employee from scratch"""
+        inputs = load_inputs(session, self.year)
+        hours, active = inputs.hours()
+
+        keys = [key for key, is_active in zip(inputs.group_keys, active) if is_active]
+        codes, keys = group_codes(keys)
+        totals = reduce_by_group(codes, hours[active], len(keys))
+        counts = np.bincount(codes, minlength=len(keys))
+        return self.assign(keys, totals, counts, inputs.employee_ids[active], codes, hours[active])
+
+    def assign(self, keys, totals, counts, employee_ids, codes, hours):
+        """Replace the state with computed group ``totals`` and ``counts``.
+
+        ``employee_ids``, ``codes`` (indexes into ``keys``) and ``hours`` are
+        the active employees' contributions.  Groups without employees are
+        dropped.  Returns the number of active employees.
+        """
+        # Group codes are renumbered; whoever rebuilds writes every group
+        self.unsaved = set()
+        used = counts > 0
+        new_codes = np.cumsum(used) - 1
+        self.keys = [key for key, is_used in zip(keys, used.tolist()) if is_used]
+        self.key_codes = {key: code for code, key in enumerate(self.keys)}
+        self.totals = totals[used]
+        self.counts = counts[used]
+        self.contributions = dict(zip(employee_ids.tolist(), zip(new_codes[codes].tolist(), hours)))
+        return len(self.contributions)
+
+    def apply_changes(self, session, employee_ids):
+        """Re-derive only ``employee_ids``; returns the affected group codes"""
+        affected = set()
+        for employee_id in employee_ids:
+            previous = self.contributions.pop(employee_id, None)
+            if previous is not None:
+                code, hours = previous
+                self.totals[code] -= hours
+                self.counts[code] -= 1
+                affected.add(code)
+
+        inputs = load_inputs(session, self.year, employee_ids)
+        hours, active = inputs.hours()
+        for employee_id, key, row, is_active in zip(inputs.employee_ids.tolist(), inputs.group_keys,
+                                                    hours, active):
+            if not is_active:
+                continue
+            code = self._code(key)
+            self.totals[code] += row
+            self.counts[code] += 1
+            self.contributions[employee_id] = (code, row)
+            affected.add(code)
+
+        # Groups that lost their last employee are exactly zero, not float residue
+        for code in affected:
+            if not self.counts[code]:
+                self.totals[code] = 0.0
+        return affected
+
+    def result(self, codes=None):
+        """Build a ForecastResult for ``codes`` (all groups when None)"""
+        if codes is None:
+            codes = range(len(self.keys))
+        codes = sorted(codes)
+        return ForecastResult(self.year, [self.keys[code] for code in codes],
+                              self.totals[codes].copy(), int(self.counts[codes].sum()))
+
+
+class ScenarioComparison:
+    """Base and scenario forecast of one year for the groups a scenario changes"""
+
+    def __init__(self, year, name, keys, base_hours, scenario_hours):
+        self.year = year
+        self.name = name
+        self.keys = keys
+        self.base_hours = base_hours
+        self.scenario_hours = scenario_hours
+
+    def __len__(self):
+        return len(self.keys)
+
+    def rows(self):
+        """Yield (manager_code, cost_center, work_code, base_total, scenario_total, monthly differences)"""
+        differences = self.scenario_hours - self.base_hours
+        for key, base, scenario, monthly in zip(self.keys, self.base_hours.sum(axis=1).tolist(),
+                                                self.scenario_hours.sum(axis=1).tolist(),
+                                                differences.tolist()):
+            yield key + (base, scenario, monthly)
+
+    def totals(self):
+        """(base total, scenario total) over the compared groups"""
+        return float(self.base_hours.sum()), float(self.scenario_hours.sum())
+
+
+def evaluate_scenario(session, scenario_id, year):
+    """Compare a scenario with the base forecast of ``year``.
+
+    The cached base ForecastState is brought up to date with refresh_state(),
+    which writes nothing, and reused: the base contributions of the
+    employees the overlay touches are swapped for their scenario
+    contributions, so only the affected groups are recomputed.  Overlays
+    that change weekly hours or the year's GA01 weeks affect every employee
+    and are computed in full.  Returns a ScenarioComparison of the groups
+    whose hours differ.
+    """
+    import scenarios
+
+    overlay = scenarios.load_overlay(session, scenario_id)
+    state = refresh_state(session, year)
+    group_count = len(state.keys)
+    keys = list(state.keys)
+    key_codes = dict(state.key_codes)
+
+    def code_of(key):
+        code = key_codes.get(key)
+        if code is None:
+            code = key_codes[key] = len(keys)
+            keys.append(key)
+        return code
+
+    if overlay.changes_globals(year):
+        result = compute_forecast(load_inputs(session, year, overlay=overlay))
+        codes = [code_of(key) for key in result.keys]
+        scenario_totals = np.zeros((len(keys), 12))
+        scenario_totals[codes] = result.hours
+    else:
+        scenario_totals = state.totals[:group_count].copy()
+        counts = state.counts[:group_count].copy()
+        touched = overlay.touched_employee_ids()
+        for employee_id in touched:
+            previous = state.contributions.get(employee_id)
+            if previous is not None:
+                code, hours = previous
+                scenario_totals[code] -= hours
+                counts[code] -= 1
+
+        inputs = load_inputs(session, year, touched, overlay)
+        hours, active = inputs.hours()
+        codes = np.array([code_of(key) for key, is_active in zip(inputs.group_keys, active) if is_active],
+                         dtype=np.intp)
+        grow = len(keys) - group_count
+        scenario_totals = np.vstack([scenario_totals, np.zeros((grow, 12))])
+        counts = np.concatenate([counts, np.zeros(grow, dtype=np.int64)])
+        np.add.at(scenario_totals, codes, hours[active])
+        np.add.at(counts, codes, 1)
+        # Groups that lost their last employee are exactly zero, not float residue
+        scenario_totals[counts == 0] = 0.0
+
+    base_totals = np.zeros((len(keys), 12))
+    base_totals[:group_count] = state.totals[:group_count]
+    changed = np.flatnonzero(np.abs(scenario_totals - base_totals).max(axis=1) > 1e-9)
+    changed = sorted(changed.tolist(), key=lambda code: keys[code])
+    return ScenarioComparison(year, overlay.name, [keys[code] for code in changed],
+                              base_totals[changed], scenario_totals[changed])
+
+
+# ForecastState per (database URL, year)
+_states = {}
+
+
+def get_state(session, year):
+    """Return the cached ForecastState for ``year`` of the database ``session`` uses"""
+    key = (database.database_url(session), year)
+    state = _states.get(key)
+    if state is None:
+        state = _states[key] = ForecastState(year)
+    return state
+
+
+def take_changes(session, state):
+    """Return (change_id, full, employee_ids) that ``state`` has to catch up on.
+
+    Combines this process's tracked changes with the change_log, which
+    also holds writes committed by other processes.
+    """
+    change_id, logged_full, logged_ids = change_tracking.read_change_log(session, state.change_id)
+    if logged_full:
+        # Writes to ga01_weeks by other processes never reach the cached weeks
+        ga01_calendar.invalidate()
+    full, employee_ids = state.dirty.take()
+    if full or logged_full:
+        return change_id, True, set()
+    return change_id, False, employee_ids | logged_ids
+
+
+def refresh_state(session, year):
+    """Bring the cached ForecastState of ``year`` up to date without writing.
+
+    The groups it updates are remembered in ``state.unsaved`` so that the
+    next recalculate() writes them; after a rebuild the next one rebuilds
+    and writes in full.  Returns the state.
+    """
+    state = get_state(session, year)
+    change_id, full, employee_ids = take_changes(session, state)
+    try:
+        if full or len(employee_ids) > INCREMENTAL_LIMIT:
+            state.rebuild(session)
+            state.dirty.mark_all()
+        elif employee_ids:
+            state.unsaved |= state.apply_changes(session, employee_ids)
+    except Exception:
+        state.dirty.mark_all()
+        raise
+    state.change_id = change_id
+    return state
+
+
+def recalculate(session, year, incremental=True, progress=None):
+    """Bring the stored forecast for ``year`` up to date.
+
+    With ``incremental`` only groups touched by employees changed since the
+    last run are re-derived and written; the first run for a year, settings
+    or GA01 changes, stored forecasts edited or deleted by hand, and large
+    change sets fall back to a full rebuild.  Changes committed by other
+    processes are found in the change_log.
+    ``progress(fraction, message)`` is called between stages and may raise
+    to abort before anything is written.
+    Returns (result, processed_employees, created, updated); the caller commits.
+    """
+    state = get_state(session, year)
+    change_id, full, employee_ids = take_changes(session, state)
+    try:
+        if progress:
+            progress(0.0, "Computing forecast")
+        rebuilt = not incremental or full or len(employee_ids) > INCREMENTAL_LIMIT
+        if rebuilt:
+            processed = state.rebuild(session)
+            result = state.result()
+        else:
+            processed = len(employee_ids)
+            codes = state.apply_changes(session, employee_ids) if employee_ids else set()
+            result = state.result(codes | state.unsaved)
+        if progress:
+            progress(0.7, f"Writing {len(result)} forecasts")
+        created, updated = save_forecast(session, result, replace=rebuilt)
+        change_tracking.prune_change_log(session)
+    except Exception:
+        # The cached state may be ahead of the database now
+        state.dirty.mark_all()
+        raise
+    state.change_id = change_id
+    state.unsaved = set()
+    return result, processed, created, updated
+
+
+def recalculate_years(session, years, progress=None):
+    """Fully recalculate and store the forecasts of several years in one pass.
+
+    Employees and planned changes are loaded once, for the last year, and
+    their hours computed as one years x employees x 12 array that is
+    reduced into every year's groups at once.  All years are written with a
+    single upsert that also zeroes stored groups left without employees.
+    Each year's cached ForecastState is replaced so later recalculate()
+    calls stay incremental.  ``progress`` works as in recalculate().
+    Returns (results, processed_employees, created, updated) with one
+    ForecastResult per year in ascending order; the caller commits.
+    """
+    years = sorted(set(years))
+    if not years:
+        raise ValueError("No years to calculate")
+    states = [get_state(session, year) for year in years]
+    for state in states:
+        state.dirty.take()
+    # Everything is rebuilt, so only the newest change_log id matters
+    change_id, _, _ = change_tracking.read_change_log(session, None)
+    # The cached weeks may predate GA01 writes made by other processes
+    ga01_calendar.invalidate()
+    try:
+        if progress:
+            progress(0.0, "Loading employees")
+        inputs = load_inputs(session, years[-1])
+        if progress:
+            progress(0.2, f"Computing {len(years)} years")
+        hours, active = inputs.hours_by_year(
+            years, [ga01_calendar.get_weeks(year, session).weeks for year in years])
+
+        # One grouped reduction over (year, group) codes for every year at once
+        codes, keys = group_codes(inputs.group_keys)
+        year_codes = np.arange(len(years))[:, None] * len(keys) + codes
+        totals = reduce_by_group(year_codes.ravel(), hours.reshape(-1, 12), len(years) * len(keys))
+        totals = totals.reshape(len(years), len(keys), 12)
+        counts = np.bincount(year_codes[active], minlength=len(years) * len(keys))
+        counts = counts.reshape(len(years), len(keys))
+
+        results = []
+        for index, state in enumerate(states):
+            year_active = active[index]
+            state.assign(keys, totals[index], counts[index], inputs.employee_ids[year_active],
+                         codes[year_active], hours[index][year_active])
+            results.append(state.result())
+
+        if progress:
+            progress(0.7, f"Writing {sum(len(result) for result in results)} forecasts")
+        writer = ForecastWriter()
+        for result in results:
+            writer.stage_result(result)
+            writer.stage_stale(session, result.year, result.keys)
+        updated = writer.count_existing(session)
+        written = writer.flush(session)
+        change_tracking.prune_change_log(session)
+    except Exception:
+        for state in states:
+            state.dirty.mark_all()
+        raise
+    for state in states:
+        state.change_id = change_id
+    return results, inputs.employee_count, written - updated, updated
+
+
+def invalidate(year=None):
+    """Force the next recalculate() for ``year`` (or every year) to rebuild"""
+    for (_, state_year), state in list(_states.items()):
+        if year is None or state_year == year:
+            state.dirty.mark_all()
+
+
+# States of the previous database must not be applied to the next one
+database.on_configure(_states.clear)
+
+
+def save_forecast(session, result, replace=False):
+    """Write a ForecastResult into the forecasts table.
+
+    Rows are upserted on (year, manager_code, cost_center, work_code) in a
+    single executemany.  With ``replace`` the result holds every group of
+    its year, and stored groups missing from it are set to zero hours.
+    Returns a (created, updated) tuple; the caller commits.
+    """
+    writer = ForecastWriter()
+    writer.stage_result(result)
+    if replace:
+        writer.stage_stale(session, result.year, result.keys)
+    if not len(writer):
+        return 0, 0
+    updated = writer.count_existing(session)
+    written = writer.flush(session)
+    return written - updated, updated
@@ -0,0 +1,230 @@
+"""Command-line interface for unattended forecast runs.
+
+    python -m forecast_tool calculate --year 2027 --db forecast_tool.db
+    python -m forecast_tool calculate --year 2025 --year 2026 --year 2027
+    python -m forecast_tool calculate --years 2025-2031
+    python -m forecast_tool import-employees hr_extract.csv --errors errors.csv --quiet
+    python -m forecast_tool export-excel forecasts forecast_2027.xlsx --year 2027
+    python -m forecast_tool export-snapshot snapshots/2027-01 --format arrow
+    python -m forecast_tool import-snapshot snapshots/2027-01
+    python -m forecast_tool calculate --year 2027 --sql-stats
+    python -m forecast_tool compare-scenario "Hiring freeze" --year 2027
+
+Nothing here imports tkinter or matplotlib, so it runs from cron or on a
+server without a display.  Every command prints how long it took.
+"""
+import argparse
+import os
+import sys
+import time
+
+import database
+import sql_stats
+from migrate_db import migrate_database
+
+
+def open_database(path):
+    """Point the shared engine at ``path`` and bring its schema up to date"""
+    if path:
+        database.configure_engine(f"sqlite:///{os.path.abspath(path)}")
+    database.Base.metadata.create_all(database.engine)
+    migrate_database(database.engine)
+
+
+def print_progress(fraction, message=None):
+    print(f"  {fraction * 100:5.1f}%  {message or ''}")
+
+
+def year_range(text):
+    """Parse ``2025-2031`` (or a single year) into a list of years"""
+    first, _, last = text.partition('-')
+    try:
+        first, last = int(first), int(last or first)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid year range: {text}")
+    if first > last:
+        raise argparse.ArgumentTypeError(f"first year after last year: {text}")
+    return list(range(first, last + 1))
+
+
+def calculate(args):
+    import forecast_engine
+
+    years = sorted(set(args.year or []).union(*(args.years or [])))
+    if not years:
+        raise ValueError("Give --year or --years")
+    session = database.get_session()
+    try:
+        started = time.perf_counter()
+        # Every year in one pass over the employees and one transaction
+        results, processed, created, updated = forecast_engine.recalculate_years(session, years)
+        session.commit()
+    finally:
+        session.close()
+    for result in results:
+        print(f"{result.year}: {result.employee_count} employees, {len(result)} forecasts")
+    print(f"{len(years)} years from {processed} employees ({created} created, {updated} updated) "
+          f"in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+def compare_scenario(args):
+    import forecast_engine
+    import scenarios
+
+    session = database.get_session()
+    try:
+        scenario = scenarios.get_scenario(session, args.name)
+        started = time.perf_counter()
+        comparison = forecast_engine.evaluate_scenario(session, scenario.id, args.year)
+        elapsed = time.perf_counter() - started
+    finally:
+        session.close()
+
+    for manager_code, cost_center, work_code, base, scenario_total, _ in comparison.rows():
+        print(f"  {manager_code:<10} {cost_center:<10} {work_code:<10} "
+              f"{base:12,.1f} {scenario_total:12,.1f} {scenario_total - base:+12,.1f}")
+    base, scenario_total = comparison.totals()
+    print(f"{args.name} vs base {args.year}: {len(comparison)} groups changed, "
+          f"{scenario_total - base:+,.1f} hours in {elapsed:.2f}s")
+    return 0
+
+
+def import_employees(args):
+    import employee_import
+
+    session = database.get_session()
+    try:
+        report = employee_import.import_employees(session, args.csv_file,
+                                                  progress=None if args.quiet else print_progress)
+        if report.imported:
+            session.commit()
+    finally:
+        session.close()
+
+    print(f"Imported {report.imported} employees with {report.error_count} errors")
+    for line in report.error_lines(limit=5):
+        print(f"  {line}")
+    if args.errors and report.error_count:
+        report.write_errors(args.errors)
+        print(f"Wrote error report to {args.errors}")
+    return 1 if report.error_count else 0
+
+
+def export_excel(args):
+    import excel_export
+
+    progress = None if args.quiet else print_progress
+    session = database.get_session()
+    try:
+        if args.table == 'employees':
+            count = excel_export.export_employees(session, args.output, progress=progress)
+        elif args.table == 'allocations':
+            count = excel_export.export_allocations(session, args.output, args.year, progress=progress)
+        else:
+            count = excel_export.export_forecasts(session, args.output, args.year, progress=progress)
+    finally:
+        session.close()
+    print(f"Exported {count} {args.table} rows to {args.output}")
+    return 0
+
+
+def export_snapshot(args):
+    import snapshot
+
+    session = database.get_session()
+    try:
+        counts = snapshot.export_snapshot(session, args.directory, args.format,
+                                          progress=None if args.quiet else print_progress)
+    finally:
+        session.close()
+    for table, count in counts.items():
+        print(f"  {table}: {count} rows")
+    print(f"Exported snapshot to {args.directory}")
+    return 0
+
+
+def import_snapshot(args):
+    import snapshot
+
+    session = database.get_session()
+    try:
+        counts = snapshot.import_snapshot(session, args.directory,
+                                          progress=None if args.quiet else print_progress)
+        session.commit()
+    finally:
+        session.close()
+    for table, count in counts.items():
+        print(f"  {table}: {count} rows")
+    print(f"Imported snapshot from {args.directory}")
+    return 0
+
+
+def build_parser():
+    # Accepted after every command
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--db', help="SQLite database file (default: forecast_tool.ini or forecast_tool.db)")
+    common.add_argument('--quiet', action='store_true', help="Do not print progress")
+    common.add_argument('--sql-stats', action='store_true',
+                        help="Print SQL statement counts and the slowest statements")
+
+    parser = argparse.ArgumentParser(prog="forecast_tool", description="Forecast Tool batch operations")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('calculate', parents=[common], help="Recalculate and store forecasts")
+    command.add_argument('--year', type=int, action='append',
+                         help="Year to calculate; repeat for several years")
+    command.add_argument('--years', type=year_range, action='append',
+                         help="Range of years to calculate, e.g. 2025-2031")
+    command.set_defaults(func=calculate)
+
+    command = commands.add_parser('compare-scenario', parents=[common],
+                                  help="Compare a what-if scenario with the base forecast")
+    command.add_argument('name', help="Scenario name")
+    command.add_argument('--year', type=int, required=True)
+    command.set_defaults(func=compare_scenario)
+
+    command = commands.add_parser('import-employees', parents=[common], help="Import employees from a CSV file")
+    command.add_argument('csv_file')
+    command.add_argument('--errors', help="Write every row error to this CSV file")
+    command.set_defaults(func=import_employees)
+
+    command = commands.add_parser('export-excel', parents=[common], help="Export a table to an Excel workbook")
+    command.add_argument('table', choices=['forecasts', 'allocations', 'employees'])
+    command.add_argument('output')
+    command.add_argument('--year', type=int, help="Only export this year (forecasts and allocations)")
+    command.set_defaults(func=export_excel)
+
+    command = commands.add_parser('export-snapshot', parents=[common], help="Write every table to columnar files")
+    command.add_argument('directory')
+    command.add_argument('--format', choices=['parquet', 'arrow'], default='parquet')
+    command.set_defaults(func=export_snapshot)
+
+    command = commands.add_parser('import-snapshot', parents=[common], help="Replace all data with a snapshot")
+    command.add_argument('directory')
+    command.set_defaults(func=import_snapshot)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    started = time.perf_counter()
+    if args.sql_stats:
+        sql_stats.enable()
+    with sql_stats.action("open database"):
+        open_database(args.db)
+    try:
+        with sql_stats.action(args.command):
+            status = args.func(args)
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        status = 2
+    if args.sql_stats:
+        for line in sql_stats.report_lines():
+            print(line)
+    print(f"Total time: {time.perf_counter() - started:.2f}s")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Bulk write layer for the forecasts table.
+
+Rows are staged in memory and applied with a single executemany of
+``INSERT ... ON CONFLICT(year, manager_code, cost_center, work_code) DO UPDATE``
+inside the caller's transaction, instead of one ORM UPDATE per object.
+The writes are calculated forecasts, so they are not entered in the
+change_log, which only logs forecasts edited by hand.
+"""
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.sqlite import insert
+
+from database import Forecast, MONTH_COLUMNS, CHANGE_LOG_TRIGGERS, pause_triggers
+
+FORECAST_KEY_COLUMNS = ['year', 'manager_code', 'cost_center', 'work_code']
+
+
+def _upsert_statement():
+    stmt = insert(Forecast.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=FORECAST_KEY_COLUMNS,
+        set_={column: stmt.excluded[column] for column in MONTH_COLUMNS + ['total_hours']}
+    )
+
+
+class ForecastWriter:
+    """Stages forecast rows and upserts them in one statement"""
+
+    def __init__(self):
+        self._rows = []
+
+    def __len__(self):
+        return len(self._rows)
+
+    def stage(self, year, manager_code, cost_center, work_code, month_hours):
+        row = {'year': year, 'manager_code': manager_code,
+               'cost_center': cost_center, 'work_code': work_code}
+        row.update(zip(MONTH_COLUMNS, month_hours))
+        row['total_hours'] = sum(month_hours)
+        self._rows.append(row)
+
+    def stage_result(self, result):
+        """Stage every group of a forecast_engine.ForecastResult"""
+        for manager_code, cost_center, work_code, month_hours in result.rows():
+            self.stage(result.year, manager_code, cost_center, work_code, month_hours)
+
+    def stage_stale(self, connection, year, keys):
+        """Stage zero hours for the stored groups of ``year`` that are not in ``keys``.
+
+        A full recalculation only produces groups that still have employees;
+        this clears the forecast rows of groups that lost all of them.
+        Returns the number of rows staged.
+        """
+        table = Forecast.__table__
+        query = select(table.c.manager_code, table.c.cost_center, table.c.work_code).where(
+            table.c.year == year, table.c.total_hours != 0)
+        keys = set(keys)
+        stale = [tuple(key) for key in connection.execute(query) if tuple(key) not in keys]
+        for manager_code, cost_center, work_code in stale:
+            self.stage(year, manager_code, cost_center, work_code, [0.0] * 12)
+        return len(stale)
+
+    def count_existing(self, connection):
+        """Number of staged rows that will update an existing forecast"""
+        existing = 0
+        table = Forecast.__table__
+        for year in {row['year'] for row in self._rows}:
+            keys = {(row['manager_code'], row['cost_center'], row['work_code'])
+                    for row in self._rows if row['year'] == year}
+            query = select(table.c.manager_code, table.c.cost_center,
+                           table.c.work_code).where(table.c.year == year)
+            if len(keys) <= 500:
+                query = query.where(tuple_(table.c.manager_code, table.c.cost_center,
+                                           table.c.work_code).in_(list(keys)))
+            existing += sum(1 for key in connection.execute(query) if tuple(key) in keys)
+        return existing
+
+    def flush(self, connection):
+        """Upsert all staged rows; returns the number of rows written.
+
+        ``connection`` may be a Connection or a Session; the caller commits.
+        """
+        if not self._rows:
+            return 0
+        with pause_triggers(connection, CHANGE_LOG_TRIGGERS):
+            connection.execute(_upsert_statement(), self._rows)
+        written = len(self._rows)
+        self._rows = []
+        return written
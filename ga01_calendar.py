@@ -0,0 +1,91 @@
+"""GA01 weeks per month, cached per year.
+
+GA01 weeks are the working weeks of a month and turn weekly hours into
+monthly hours.  The twelve values of a year are read once and shared by
+the forecast engine, the forecast grid, the charts and the Excel export
+until a GA01Week change is committed.  Changes made by other processes
+only reach the cache through invalidate(), which the forecast engine
+calls when the change_log reports them.  Months without a configured row
+fall back to their business days / 5.
+"""
+import calendar
+import threading
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import object_session
+
+import change_tracking
+import database
+from database import GA01Week, get_session
+
+
+def business_days(year, month):
+    """Number of Monday-Friday days in a month"""
+    first_weekday, days = calendar.monthrange(year, month)
+    return sum(1 for day in range(days) if (first_weekday + day) % 7 < 5)
+
+
+def default_weeks(year, month):
+    return business_days(year, month) / 5
+
+
+class YearWeeks:
+    """GA01 weeks of the twelve months of one year"""
+
+    def __init__(self, year, configured):
+        self.year = year
+        # {month: weeks} of the months that have a GA01Week row
+        self.configured = configured
+        self.weeks = tuple(configured[month] if month in configured else default_weeks(year, month)
+                           for month in range(1, 13))
+
+    @property
+    def is_configured(self):
+        return bool(self.configured)
+
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def get_weeks(year, connection=None):
+    """Return the cached YearWeeks for ``year``, loading them on first use.
+
+    ``connection`` may be a Connection or a Session; without one a new
+    session is used.
+    """
+    session = None
+    if connection is None:
+        connection = session = get_session()
+    try:
+        # Sessions and Connections to different database files must not share entries
+        key = (database.database_url(connection), year)
+        year_weeks = _cache.get(key)
+        if year_weeks is not None:
+            return year_weeks
+
+        rows = connection.execute(select(GA01Week.month, GA01Week.weeks).where(GA01Week.year == year))
+        year_weeks = YearWeeks(year, {month: weeks for month, weeks in rows if 1 <= month <= 12})
+        with _lock:
+            _cache[key] = year_weeks
+        return year_weeks
+    finally:
+        if session is not None:
+            session.close()
+
+
+def invalidate():
+    """Drop every cached year, e.g. after a bulk write to ga01_weeks"""
+    with _lock:
+        _cache.clear()
+
+
+def _on_ga01_change(mapper, connection, target):
+    # Until the commit other threads still read the old weeks, which must not be cached
+    change_tracking.on_commit(object_session(target), invalidate)
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(GA01Week, _event_name, _on_ga01_change)
+
+database.on_configure(invalidate)
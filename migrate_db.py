@@ -1,20 +1,94 @@
-from sqlalchemy import create_engine, text
-from app_tkinter import Base
+from sqlalchemy import text
+import database
 
-def migrate_database():
-    """Add cost_center column to employees table if it doesn't exist"""
-    engine = create_engine('sqlite:///forecast_tool.db')
+def migrate_database(engine=None):
+    """Bring an existing forecast_tool.db up to the current schema"""
+    if engine is None:
+        engine = database.engine
     
     with engine.connect() as conn:
-        # Check if cost_center column exists
-        result = conn.execute(text("SELECT name FROM pragma_table_info('employees') WHERE name='cost_center'"))
-        if not result.fetchone():
-            # Add cost_center column
-            conn.execute(text("ALTER TABLE employees ADD COLUMN cost_center VARCHAR"))
-            conn.execute(text("UPDATE employees SET cost_center = manager_code"))  # Set default value
-            print("Added cost_center column to employees table")
-        
+        add_cost_center_column(conn)
+        add_indexes(conn)
+        add_monthly_hours(conn)
+        add_change_log(conn)
         conn.commit()
 
+def add_cost_center_column(conn):
+    """Add cost_center column to employees table if it doesn't exist"""
+    # Check if cost_center column exists
+    result = conn.execute(text("SELECT name FROM pragma_table_info('employees') WHERE name='cost_center'"))
+    if not result.fetchone():
+        # Add cost_center column
+        conn.execute(text("ALTER TABLE employees ADD COLUMN cost_center VARCHAR"))
+        conn.execute(text("UPDATE employees SET cost_center = manager_code"))  # Set default value
+        print("Added cost_center column to employees table")
+
+def index_exists(conn, name):
+    result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='index' AND name=:name"), {"name": name})
+    return result.fetchone() is not None
+
+def remove_duplicates(conn, table, columns, keep):
+    """Delete rows sharing the same key, keeping the MIN or MAX id of each group"""
+    key = ", ".join(columns)
+    deleted = conn.execute(text(
+        f"DELETE FROM {table} WHERE id NOT IN (SELECT {keep}(id) FROM {table} GROUP BY {key})"
+    )).rowcount
+    if deleted:
+        print(f"Removed {deleted} duplicate rows from {table}")
+
+def add_indexes(conn):
+    """Create the lookup indexes and unique constraints declared on the models"""
+    # Older versions could store the same forecast group twice; the newest row wins
+    if not index_exists(conn, 'ux_forecasts_year_group'):
+        remove_duplicates(conn, 'forecasts', ['year', 'manager_code', 'cost_center', 'work_code'], 'MAX')
+        conn.execute(text(
+            "CREATE UNIQUE INDEX ux_forecasts_year_group "
+            "ON forecasts (year, manager_code, cost_center, work_code)"
+        ))
+        print("Added unique index on forecasts (year, manager_code, cost_center, work_code)")
+    
+    # Edits always picked the first matching allocation, so keep the oldest row
+    if not index_exists(conn, 'ux_project_allocations_group'):
+        remove_duplicates(conn, 'project_allocations', ['manager_code', 'year', 'cost_center', 'work_code'], 'MIN')
+        conn.execute(text(
+            "CREATE UNIQUE INDEX ux_project_allocations_group "
+            "ON project_allocations (manager_code, year, cost_center, work_code)"
+        ))
+        print("Added unique index on project_allocations (manager_code, year, cost_center, work_code)")
+    
+    if not index_exists(conn, 'ix_planned_changes_effective_date'):
+        conn.execute(text(
+            "CREATE INDEX ix_planned_changes_effective_date ON planned_changes (effective_date)"
+        ))
+        print("Added index on planned_changes (effective_date)")
+
+def replace_triggers(conn, statements):
+    """Recreate triggers so that databases made by older versions get the current bodies"""
+    for statement in statements:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {database.trigger_name(statement)}"))
+        conn.execute(text(statement))
+
+def add_monthly_hours(conn):
+    """Create the long-format monthly hours tables and fill them from the wide tables"""
+    for wide_table, long_table, id_column in database.MONTHLY_HOURS_TABLES:
+        # create_all() installs the triggers along with a new table
+        database.Base.metadata.tables[long_table].create(conn, checkfirst=True)
+        replace_triggers(conn, database.monthly_hours_trigger_sql(wide_table, long_table, id_column))
+        
+        expected = conn.execute(text(f"SELECT COUNT(*) * 12 FROM {wide_table}")).scalar()
+        actual = conn.execute(text(f"SELECT COUNT(*) FROM {long_table}")).scalar()
+        if expected == actual:
+            continue
+        
+        # Rebuild from the wide columns, which remain the source of truth
+        conn.execute(text(f"DELETE FROM {long_table}"))
+        conn.execute(text(database.monthly_hours_fill_sql(wide_table, long_table, id_column)))
+        print(f"Filled {long_table} from {wide_table}")
+
+def add_change_log(conn):
+    """Create the change_log table and the triggers that fill it"""
+    database.Base.metadata.tables['change_log'].create(conn, checkfirst=True)
+    replace_triggers(conn, database.change_log_trigger_sql())
+
 if __name__ == '__main__':
-    migrate_database() 
\ No newline at end of file
+    migrate_database()
@@ -1,8 +1,12 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Date, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Enum, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import relationship, object_session
 import enum
 import datetime
+import threading
+
+import change_tracking
+import database
 
 Base = declarative_base()
 
@@ -26,20 +30,7 @@ class Employee(Base):
     
     @property
     def weekly_hours(self):
-        session = get_session()
-        settings = session.query(Settings).first()
-        if not settings:
-            if self.employment_type == "FTE":
-                return 34.5
-            else:  # Contractor
-                return 39.0
-        else:
-            if self.employment_type == "FTE":
-                hours = settings.fte_hours
-            else:  # Contractor
-                hours = settings.contractor_hours
-            session.close()
-            return hours
+        return get_settings_snapshot().weekly_hours(self.employment_type)
 
 class GA01Week(Base):
     __tablename__ = 'ga01_weeks'
@@ -112,12 +103,67 @@ class PlannedChange(Base):
     
     employee = relationship("Employee", foreign_keys=[employee_id])
 
+class SettingsSnapshot:
+    """Read-only copy of the Settings row used for weekly hours lookups"""
+
+    def __init__(self, fte_hours=34.5, contractor_hours=39.0):
+        self.fte_hours = fte_hours
+        self.contractor_hours = contractor_hours
+
+    def weekly_hours(self, employment_type):
+        if employment_type == "FTE":
+            return self.fte_hours
+        else:  # Contractor
+            return self.contractor_hours
+
+_settings_snapshot = None
+_settings_lock = threading.Lock()
+
+def get_settings_snapshot():
+    """Return the cached settings, loading them on first use"""
+    global _settings_snapshot
+    snapshot = _settings_snapshot
+    if snapshot is not None:
+        return snapshot
+    with _settings_lock:
+        if _settings_snapshot is None:
+            session = get_session()
+            try:
+                settings = session.query(Settings).first()
+            finally:
+                session.close()
+            if settings:
+                _settings_snapshot = SettingsSnapshot(settings.fte_hours, settings.contractor_hours)
+            else:
+                _settings_snapshot = SettingsSnapshot()
+        return _settings_snapshot
+
+def invalidate_settings():
+    """Drop the cached settings so the next lookup reloads them"""
+    global _settings_snapshot
+    with _settings_lock:
+        _settings_snapshot = None
+
+def _on_settings_change(mapper, connection, target):
+    # Until the commit other threads still read the old row, which must not be cached
+    change_tracking.on_commit(object_session(target), invalidate_settings)
+
+# Both schemas map the same settings table
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Settings, _event_name, _on_settings_change)
+    event.listen(database.Settings, _event_name, _on_settings_change)
+
+# The previous database's hours must not be served for the next one
+database.on_configure(invalidate_settings)
+
+def get_engine():
+    """Return the engine shared with the database module"""
+    return database.engine
+
 def init_db():
-    engine = create_engine('sqlite:///forecast_tool.db')
+    engine = get_engine()
     Base.metadata.create_all(engine)
     return engine
 
 def get_session():
-    engine = create_engine('sqlite:///forecast_tool.db')
-    Session = sessionmaker(bind=engine)
-    return Session() 
\ No newline at end of file
+    return database.Session() 
\ No newline at end of file
@@ -0,0 +1,222 @@
+"""What-if scenarios stored as copy-on-write overlays on the base data.
+
+A scenario records only what it changes: employees it edits, removes or
+adds, weekly hours, GA01 weeks and extra planned changes.  An employee is
+copied into the overlay the first time a scenario edits it, so the base
+tables are never touched and a scenario costs nothing until it changes
+something.  forecast_engine.evaluate_scenario() reads the overlay through
+ScenarioOverlay and compares the result with the base forecast.
+
+Functions take a Session; the caller commits.
+"""
+from database import (Employee, Scenario, ScenarioEmployee, ScenarioSettings, ScenarioGA01Week,
+                      ScenarioPlannedChange)
+
+EMPLOYEE_FIELDS = ['name', 'manager_code', 'cost_center', 'employment_type', 'work_code',
+                   'start_date', 'end_date']
+
+PLANNED_CHANGE_FIELDS = ['description', 'change_type', 'effective_date', 'employee_id', 'target_type',
+                         'name', 'team', 'manager_code', 'cost_center', 'employment_type', 'status']
+
+# Synthetic employees have negative ids.  Base planned new hires use -change id
+# (see forecast_engine.load_timeline); a scenario's own rows get ranges of
+# their own so none of them can collide.
+SCENARIO_HIRE_IDS = -10 ** 12
+ADDED_EMPLOYEE_IDS = -2 * 10 ** 12
+
+
+def list_scenarios(session):
+    return session.query(Scenario).order_by(Scenario.name).all()
+
+
+def get_scenario(session, name):
+    """Return the scenario called ``name``; raises ValueError if there is none"""
+    scenario = session.query(Scenario).filter(Scenario.name == name).first()
+    if scenario is None:
+        raise ValueError(f"Scenario not found: {name}")
+    return scenario
+
+
+def create_scenario(session, name, description=None):
+    name = (name or "").strip()
+    if not name:
+        raise ValueError("Scenario name is required")
+    if session.query(Scenario.id).filter(Scenario.name == name).first():
+        raise ValueError(f"A scenario called {name} already exists")
+    scenario = Scenario(name=name, description=description)
+    session.add(scenario)
+    session.flush()
+    return scenario
+
+
+def delete_scenario(session, scenario_id):
+    """Delete a scenario and its overlay"""
+    for model in (ScenarioEmployee, ScenarioGA01Week, ScenarioPlannedChange, ScenarioSettings):
+        session.query(model).filter(model.scenario_id == scenario_id).delete(synchronize_session=False)
+    session.query(Scenario).filter(Scenario.id == scenario_id).delete(synchronize_session=False)
+
+
+def _employee_copy(session, scenario_id, employee_id):
+    """The scenario's copy of a base employee, made on first use"""
+    copy = session.query(ScenarioEmployee).filter(
+        ScenarioEmployee.scenario_id == scenario_id,
+        ScenarioEmployee.employee_id == employee_id
+    ).first()
+    if copy is None:
+        employee = session.get(Employee, employee_id)
+        if employee is None:
+            raise ValueError(f"Employee not found: {employee_id}")
+        copy = ScenarioEmployee(scenario_id=scenario_id, employee_id=employee_id,
+                                **{field: getattr(employee, field) for field in EMPLOYEE_FIELDS})
+        session.add(copy)
+    return copy
+
+
+def set_employee(session, scenario_id, employee_id, **values):
+    """Change fields of a base employee in the scenario only"""
+    unknown = set(values) - set(EMPLOYEE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown employee fields: {', '.join(sorted(unknown))}")
+    copy = _employee_copy(session, scenario_id, employee_id)
+    for field, value in values.items():
+        setattr(copy, field, value)
+    copy.removed = False
+    return copy
+
+
+def remove_employee(session, scenario_id, employee_id):
+    """Leave a base employee out of the scenario"""
+    copy = _employee_copy(session, scenario_id, employee_id)
+    copy.removed = True
+    return copy
+
+
+def add_employee(session, scenario_id, **values):
+    """Add an employee that only exists in the scenario"""
+    missing = [field for field in EMPLOYEE_FIELDS
+               if field not in ('work_code', 'end_date') and not values.get(field)]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)} for the new employee")
+    employee = ScenarioEmployee(scenario_id=scenario_id, employee_id=None, **values)
+    session.add(employee)
+    return employee
+
+
+def set_weekly_hours(session, scenario_id, fte_hours=None, contractor_hours=None):
+    """Override weekly hours in the scenario; None keeps the base value"""
+    settings = session.get(ScenarioSettings, scenario_id)
+    if settings is None:
+        settings = ScenarioSettings(scenario_id=scenario_id)
+        session.add(settings)
+    settings.fte_hours = fte_hours
+    settings.contractor_hours = contractor_hours
+    return settings
+
+
+def set_ga01_weeks(session, scenario_id, year, month, weeks):
+    row = session.query(ScenarioGA01Week).filter(
+        ScenarioGA01Week.scenario_id == scenario_id,
+        ScenarioGA01Week.year == year,
+        ScenarioGA01Week.month == month
+    ).first()
+    if row is None:
+        row = ScenarioGA01Week(scenario_id=scenario_id, year=year, month=month)
+        session.add(row)
+    row.weeks = weeks
+    return row
+
+
+def add_planned_change(session, scenario_id, **values):
+    """Add a planned change that only exists in the scenario"""
+    unknown = set(values) - set(PLANNED_CHANGE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown planned change fields: {', '.join(sorted(unknown))}")
+    values.setdefault('status', "Planned")
+    change = ScenarioPlannedChange(scenario_id=scenario_id, **values)
+    session.add(change)
+    return change
+
+
+class ScenarioOverlay:
+    """Everything a scenario changes, loaded once for evaluation"""
+
+    def __init__(self, scenario, employees, settings, ga01_weeks, planned_changes):
+        self.scenario_id = scenario.id
+        self.name = scenario.name
+        # Base employee id -> (manager_code, cost_center, work_code, employment_type,
+        # start_date, end_date), or None when the scenario removes the employee
+        self.employees = {}
+        self.added_employees = []
+        for row in employees:
+            values = None if row.removed else (row.manager_code, row.cost_center, row.work_code,
+                                               row.employment_type, row.start_date, row.end_date)
+            if row.employee_id is None:
+                if values is not None:
+                    self.added_employees.append(values)
+            else:
+                self.employees[row.employee_id] = values
+        self.fte_hours = settings.fte_hours if settings else None
+        self.contractor_hours = settings.contractor_hours if settings else None
+        # {year: {month: weeks}}
+        self.ga01_weeks = {}
+        for row in ga01_weeks:
+            self.ga01_weeks.setdefault(row.year, {})[row.month] = row.weeks
+        self.planned_changes = planned_changes
+
+    def changes_globals(self, year):
+        """Whether the overlay changes something every employee of ``year`` depends on"""
+        return (self.fte_hours is not None or self.contractor_hours is not None
+                or bool(self.ga01_weeks.get(year)))
+
+    def touched_employee_ids(self):
+        """Base employees whose forecast the overlay can change"""
+        ids = set(self.employees)
+        ids.update(change.employee_id for change in self.planned_changes if change.employee_id is not None)
+        return ids
+
+    def new_hire_id(self, change):
+        """Synthetic employee id of a new hire planned in the scenario"""
+        return SCENARIO_HIRE_IDS - change.id
+
+    def weekly_hours(self, fte_hours, contractor_hours):
+        return (fte_hours if self.fte_hours is None else self.fte_hours,
+                contractor_hours if self.contractor_hours is None else self.contractor_hours)
+
+    def weeks(self, year, weeks):
+        """Apply the overlay's GA01 weeks to the twelve base ``weeks`` of a year"""
+        overrides = self.ga01_weeks.get(year, {})
+        return [overrides.get(month, base) for month, base in enumerate(weeks, 1)]
+
+    def employee_rows(self, rows):
+        """Replace or drop edited base employee rows and append added employees.
+
+        ``rows`` are (id, manager_code, cost_center, work_code, employment_type,
+        start_date, end_date) tuples; added employees get ids below
+        ADDED_EMPLOYEE_IDS.
+        """
+        result = []
+        for row in rows:
+            if row[0] in self.employees:
+                values = self.employees[row[0]]
+                if values is not None:
+                    result.append((row[0],) + values)
+            else:
+                result.append(tuple(row))
+        for position, values in enumerate(self.added_employees, 1):
+            result.append((ADDED_EMPLOYEE_IDS - position,) + values)
+        return result
+
+
+def load_overlay(session, scenario_id):
+    """Read a scenario's overlay; raises ValueError for an unknown scenario"""
+    scenario = session.get(Scenario, scenario_id)
+    if scenario is None:
+        raise ValueError(f"Scenario not found: {scenario_id}")
+    return ScenarioOverlay(
+        scenario,
+        employees=session.query(ScenarioEmployee).filter(ScenarioEmployee.scenario_id == scenario_id).all(),
+        settings=session.get(ScenarioSettings, scenario_id),
+        ga01_weeks=session.query(ScenarioGA01Week).filter(ScenarioGA01Week.scenario_id == scenario_id).all(),
+        planned_changes=session.query(ScenarioPlannedChange).filter(
+            ScenarioPlannedChange.scenario_id == scenario_id).all(),
+    )
@@ -0,0 +1,175 @@
+"""Columnar snapshots of the whole dataset.
+
+Each table is written to its own Parquet (for analytics tools) or Arrow
+IPC file (memory-mapped on read) in a snapshot directory.  Export streams
+rows from the cursor into record batches; import reads record batches and
+writes them with one executemany per batch straight through the DB-API
+cursor, so neither side creates ORM objects.  The import pauses the
+per-row triggers, then refills the long-format monthly hours tables with
+one INSERT ... SELECT each and logs a single global change.
+
+pyarrow is only needed when a snapshot is written or read.
+"""
+import os
+
+from sqlalchemy import select, Integer, Float, Date
+from sqlalchemy.orm import Session
+
+import change_tracking
+import ga01_calendar
+import database
+from database import Settings, Employee, GA01Week, ProjectAllocation, PlannedChange, Forecast
+
+# Export and import order; imports delete in reverse
+SNAPSHOT_MODELS = [Settings, Employee, GA01Week, ProjectAllocation, PlannedChange, Forecast]
+
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+BATCH_SIZE = 50000
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Snapshots need the pyarrow package: pip install pyarrow")
+    return pyarrow
+
+
+def arrow_schema(table):
+    """Arrow schema matching the columns of a SQLAlchemy table"""
+    pa = _pyarrow()
+    fields = []
+    for column in table.columns:
+        if isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, Date):
+            arrow_type = pa.date32()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type, nullable=column.nullable or column.primary_key))
+    return pa.schema(fields)
+
+
+def snapshot_path(directory, table, format):
+    return os.path.join(directory, table.name + FORMATS[format])
+
+
+def find_snapshot_file(directory, table):
+    """Return (path, format) of a table's file in a snapshot directory, or (None, None)"""
+    for format in FORMATS:
+        path = snapshot_path(directory, table, format)
+        if os.path.exists(path):
+            return path, format
+    return None, None
+
+
+def export_snapshot(connection, directory, format='parquet', progress=None):
+    """Write every snapshot table to ``directory``; returns {table name: rows}.
+
+    ``connection`` may be a Connection or a Session.
+    """
+    pa = _pyarrow()
+    if format not in FORMATS:
+        raise ValueError(f"Unknown snapshot format: {format}")
+    os.makedirs(directory, exist_ok=True)
+
+    counts = {}
+    for position, model in enumerate(SNAPSHOT_MODELS):
+        table = model.__table__
+        schema = arrow_schema(table)
+        path = snapshot_path(directory, table, format)
+        if progress:
+            progress(position / len(SNAPSHOT_MODELS), f"Exporting {table.name}")
+
+        if format == 'parquet':
+            writer = pa.parquet.ParquetWriter(path, schema)
+        else:
+            writer = pa.ipc.new_file(path, schema)
+        try:
+            result = connection.execute(select(table).execution_options(yield_per=BATCH_SIZE))
+            written = 0
+            for rows in result.partitions():
+                columns = list(zip(*rows))
+                writer.write_batch(pa.record_batch(
+                    [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                    schema=schema))
+                written += len(rows)
+        finally:
+            writer.close()
+        counts[table.name] = written
+    return counts
+
+
+def _read_batches(path, format):
+    pa = _pyarrow()
+    if format == 'parquet':
+        yield from pa.parquet.ParquetFile(path).iter_batches(batch_size=BATCH_SIZE)
+    else:
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i)
+
+
+def import_snapshot(connection, directory, progress=None):
+    """Replace the snapshot tables with the files in ``directory``.
+
+    Every table must be present.  ``connection`` may be a Connection or a
+    Session; the caller commits, so a failed import leaves the database
+    unchanged.  Returns {table name: rows}.
+    """
+    pa = _pyarrow()
+    files = []
+    for model in SNAPSHOT_MODELS:
+        path, format = find_snapshot_file(directory, model.__table__)
+        if path is None:
+            raise ValueError(f"Snapshot is missing the {model.__tablename__} table")
+        files.append((model.__table__, path, format))
+
+    # Raw DB-API executemany skips SQLAlchemy's per-row bind processing
+    session = connection
+    if isinstance(connection, Session):
+        connection = connection.connection()
+
+    with database.pause_triggers(connection, database.CHANGE_LOG_TRIGGERS,
+                                 database.MONTHLY_HOURS_TRIGGERS):
+        for wide_table, long_table, id_column in database.MONTHLY_HOURS_TABLES:
+            connection.execute(database.Base.metadata.tables[long_table].delete())
+        for table in reversed([table for table, path, format in files]):
+            connection.execute(table.delete())
+
+        counts = {}
+        for position, (table, path, format) in enumerate(files):
+            if progress:
+                progress(position / len(files), f"Importing {table.name}")
+            names = [column.name for column in table.columns]
+            sql = (f"INSERT INTO {table.name} ({', '.join(names)}) "
+                   f"VALUES ({', '.join('?' for _ in names)})")
+            written = 0
+            for batch in _read_batches(path, format):
+                columns = []
+                for name in names:
+                    column = batch.column(name)
+                    # SQLite stores dates as ISO strings, which is what a date32 casts to
+                    if pa.types.is_date(column.type):
+                        column = pa.compute.cast(column, pa.string())
+                    columns.append(column.to_pylist())
+                connection.exec_driver_sql(sql, list(zip(*columns)))
+                written += batch.num_rows
+            counts[table.name] = written
+
+        for wide_table, long_table, id_column in database.MONTHLY_HOURS_TABLES:
+            connection.exec_driver_sql(database.monthly_hours_fill_sql(wide_table, long_table, id_column))
+
+    # The INSERTs bypass the ORM events that feed incremental recalculation and the GA01 cache
+    change_tracking.log_global_change(connection)
+    change_tracking.mark_all(session)
+    change_tracking.on_commit(session, ga01_calendar.invalidate)
+    return counts
+
@@ -0,0 +1,155 @@
+"""Statement counts and timings of SQL per UI action.
+
+While enabled, engine events time every statement and charge it to the
+action running on the current thread: the background task's name (e.g.
+"Loading employees", set by TaskRunner) or the innermost action() block.
+Statements outside any action are recorded under "Other".  Disabling
+removes the event listeners again, so when statistics are off the only
+cost left is entering and leaving action() blocks.
+"""
+import heapq
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Slowest statements kept per action
+SLOWEST_KEPT = 10
+OTHER_ACTION = "Other"
+
+
+class ActionStats:
+    """Statements issued under one action"""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        # Min-heap of (seconds, sequence, statement) so the fastest is replaced first
+        self._slowest = []
+
+    @property
+    def mean_s(self):
+        return self.total_s / self.count if self.count else 0.0
+
+    def record(self, statement, seconds, rows=None):
+        self.count += 1
+        self.total_s += seconds
+        self.max_s = max(self.max_s, seconds)
+        if len(self._slowest) >= SLOWEST_KEPT and seconds <= self._slowest[0][0]:
+            return
+        text = " ".join(statement.split())
+        if rows is not None:
+            text = f"{text}  [executemany x{rows}]"
+        entry = (seconds, self.count, text)
+        if len(self._slowest) < SLOWEST_KEPT:
+            heapq.heappush(self._slowest, entry)
+        else:
+            heapq.heapreplace(self._slowest, entry)
+
+    def slowest(self):
+        """Return [(seconds, statement)], slowest first"""
+        return [(seconds, text) for seconds, _, text in sorted(self._slowest, reverse=True)]
+
+    def copy(self):
+        stats = ActionStats(self.name)
+        stats.count, stats.total_s, stats.max_s = self.count, self.total_s, self.max_s
+        stats._slowest = list(self._slowest)
+        return stats
+
+
+_lock = threading.Lock()
+_stats = {}
+_local = threading.local()
+_enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable():
+    """Start recording statements"""
+    global _enabled
+    with _lock:
+        if not _enabled:
+            event.listen(Engine, 'before_cursor_execute', _before_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_execute)
+            _enabled = True
+
+
+def disable():
+    """Stop recording; collected statistics are kept until reset()"""
+    global _enabled
+    with _lock:
+        if _enabled:
+            event.remove(Engine, 'before_cursor_execute', _before_execute)
+            event.remove(Engine, 'after_cursor_execute', _after_execute)
+            _enabled = False
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+@contextmanager
+def action(name):
+    """Charge statements issued by this thread inside the block to ``name``"""
+    previous = getattr(_local, 'action', None)
+    _local.action = name
+    try:
+        yield
+    finally:
+        _local.action = previous
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._sql_stats_started = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    # Missing when statistics were enabled while the statement ran
+    started = getattr(context, '_sql_stats_started', None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    name = getattr(_local, 'action', None) or OTHER_ACTION
+    rows = len(parameters) if executemany else None
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = ActionStats(name)
+        stats.record(statement, seconds, rows)
+
+
+def snapshot():
+    """Copies of every action's statistics, most total time first"""
+    with _lock:
+        copies = [stats.copy() for stats in _stats.values()]
+    return sorted(copies, key=lambda stats: stats.total_s, reverse=True)
+
+
+def report_lines(slowest=3):
+    """Plain-text report of every action and its ``slowest`` statements"""
+    lines = []
+    for stats in snapshot():
+        lines.append(f"{stats.name}: {stats.count} statements, {stats.total_s * 1000:.1f} ms total, "
+                     f"{stats.mean_s * 1000:.2f} ms mean, {stats.max_s * 1000:.1f} ms slowest")
+        for seconds, text in stats.slowest()[:slowest]:
+            lines.append(f"    {seconds * 1000:8.1f} ms  {text}")
+    return lines
+
+
+def write_log(file_path, slowest=SLOWEST_KEPT):
+    """Append a timestamped report to ``file_path``"""
+    with open(file_path, 'a', encoding='utf-8') as log_file:
+        log_file.write(f"SQL statistics {datetime.now().isoformat(timespec='seconds')}\n")
+        for line in report_lines(slowest) or ["No statements recorded"]:
+            log_file.write(line + "\n")
+        log_file.write("\n")
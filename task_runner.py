@@ -0,0 +1,173 @@
+"""Background execution of database work with Tk-safe result delivery.
+
+Jobs run on a concurrent.futures thread pool.  Read jobs share a small pool;
+write jobs go through a single-thread executor so that SQLite sees at most
+one writer at a time.  Workers never touch Tk: results, errors and progress
+are put on a queue which the Tk main thread drains with ``after()`` polling.
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import sql_stats
+
+
+class TaskCancelled(Exception):
+    """Raised inside a job when its task has been cancelled"""
+
+
+class Task:
+    """Handle for a submitted job, used for cancellation and progress"""
+
+    def __init__(self, runner, name):
+        self.runner = runner
+        self.name = name
+        self.future = None
+        self.write = False
+        self.on_done = None
+        self.on_error = None
+        self.progress = None
+        self.message = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """Ask the job to stop; results of a cancelled task are discarded"""
+        self._cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise TaskCancelled(self.name)
+
+    def report(self, fraction, message=None):
+        """Report progress (0.0 - 1.0) from the worker thread.
+
+        Also acts as a cancellation point, so long jobs can pass this method
+        as a progress callback and be stopped between stages.
+        """
+        self.check_cancelled()
+        self.runner._queue.put(('progress', self, fraction, message))
+
+
+class TaskRunner:
+    """Runs jobs off the Tk main thread and delivers their results back to it"""
+
+    def __init__(self, widget, max_workers=4, poll_ms=50):
+        self.widget = widget
+        self.poll_ms = poll_ms
+        self.on_status = None
+        self.on_error = None
+        self._readers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='forecast-read')
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='forecast-write')
+        self._queue = queue.Queue()
+        self._active = []
+        self._polling = False
+
+    @property
+    def active_tasks(self):
+        return list(self._active)
+
+    def submit(self, name, func, *args, on_done=None, on_error=None, write=False, replace=False):
+        """Run ``func(task, *args)`` in the background.
+
+        ``on_done(result)`` and ``on_error(exception)`` are called on the Tk
+        main thread.  ``write`` routes the job through the single writer
+        thread.  ``replace`` cancels running tasks with the same name first,
+        e.g. a grid reload superseded by a newer one.
+        """
+        if replace:
+            self.cancel_named(name)
+
+        task = Task(self, name)
+        task.write = write
+        task.on_done = on_done
+        task.on_error = on_error
+        executor = self._writer if write else self._readers
+        task.future = executor.submit(self._run, task, func, args)
+        self._active.append(task)
+        self._update_status()
+        self._schedule_poll()
+        return task
+
+    def cancel_named(self, name):
+        """Cancel running tasks called ``name``"""
+        for task in self._active:
+            if task.name == name:
+                task.cancel()
+
+    def cancel_all(self):
+        for task in self._active:
+            task.cancel()
+
+    def shutdown(self):
+        """Cancel pending work and stop the worker threads"""
+        self.cancel_all()
+        self._readers.shutdown(wait=False, cancel_futures=True)
+        self._writer.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, task, func, args):
+        try:
+            task.check_cancelled()
+            # SQL statistics are grouped by the task that issued the statements
+            with sql_stats.action(task.name):
+                result = func(task, *args)
+            self._queue.put(('done', task, result, None))
+        except TaskCancelled:
+            self._queue.put(('cancelled', task, None, None))
+        except Exception as e:
+            self._queue.put(('error', task, None, e))
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            kind, task = item[0], item[1]
+            if kind == 'progress':
+                task.progress, task.message = item[2], item[3]
+                continue
+
+            if task in self._active:
+                self._active.remove(task)
+            # A write that finished despite a late cancel has still been committed
+            if kind == 'cancelled' or (task.cancelled and not (task.write and kind == 'done')):
+                continue
+            if kind == 'done':
+                if task.on_done:
+                    task.on_done(item[2])
+            else:
+                handler = task.on_error or self.on_error
+                if handler:
+                    handler(item[3])
+
+        # Futures cancelled before they started never report back
+        self._active = [task for task in self._active if not task.future.cancelled()]
+        self._update_status()
+        if self._active or not self._queue.empty():
+            self._schedule_poll()
+
+    def _update_status(self):
+        if not self.on_status:
+            return
+        if not self._active:
+            self.on_status(None, None)
+            return
+        task = self._active[0]
+        text = task.name
+        if task.message:
+            text = f"{text}: {task.message}"
+        if len(self._active) > 1:
+            text = f"{text} (+{len(self._active) - 1} more)"
+        self.on_status(text, task.progress)
@@ -0,0 +1,26 @@
+"""Shared fixtures: every test gets its own SQLite database file."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from migrate_db import migrate_database
+
+
+@pytest.fixture
+def session(tmp_path):
+    database.configure_engine(f"sqlite:///{tmp_path / 'forecast_tool.db'}")
+    database.Base.metadata.create_all(database.engine)
+    migrate_database(database.engine)
+    database.ensure_default_settings()
+
+    import forecast_engine
+    forecast_engine.invalidate()
+
+    session = database.get_session()
+    yield session
+    session.close()
+    database.engine.dispose()
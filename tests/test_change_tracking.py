@@ -0,0 +1,60 @@
+from datetime import date
+
+import change_tracking
+import database
+import ga01_calendar
+from database import Employee, GA01Week
+
+
+def new_employee():
+    return Employee(name="E", manager_code="M1", cost_center="C1", employment_type="FTE",
+                    start_date=date(2020, 1, 1))
+
+
+def test_employee_changes_are_recorded_on_commit(session):
+    dirty = change_tracking.new_dirty_set()
+    employee = new_employee()
+    session.add(employee)
+    session.flush()
+    assert not dirty
+
+    session.commit()
+    assert dirty.take() == (False, {employee.id})
+
+    session.delete(employee)
+    session.flush()
+    assert not dirty
+    session.commit()
+    assert dirty.take() == (False, {employee.id})
+
+
+def test_rolled_back_changes_are_dropped(session):
+    dirty = change_tracking.new_dirty_set()
+    session.add(new_employee())
+    session.flush()
+    session.rollback()
+    session.commit()
+    assert not dirty
+
+
+def test_bulk_marks_wait_for_the_session(session):
+    dirty = change_tracking.new_dirty_set()
+    change_tracking.mark_all(session)
+    assert not dirty
+    session.commit()
+    assert dirty.take() == (True, set())
+
+
+def test_ga01_weeks_are_reloaded_after_commit(session):
+    assert not ga01_calendar.get_weeks(2026, session).is_configured
+
+    session.add(GA01Week(year=2026, month=1, weeks=3.0))
+    session.flush()
+    # A reader that cannot see the flushed row yet must not cache the old weeks for good
+    reader = database.get_session()
+    try:
+        assert ga01_calendar.get_weeks(2026, reader).weeks[0] != 3.0
+        session.commit()
+        assert ga01_calendar.get_weeks(2026, reader).weeks[0] == 3.0
+    finally:
+        reader.close()
@@ -0,0 +1,64 @@
+from datetime import date
+
+import pytest
+
+import chart_data
+from database import ChangeType, Employee, PlannedChange
+
+YEAR = 2026
+
+
+def test_employee_type_distribution_counts_employees_of_the_year(session):
+    session.add_all([
+        Employee(name="Left", manager_code="M1", cost_center="C1", employment_type="FTE",
+                 start_date=date(2020, 1, 1), end_date=date(YEAR - 1, 12, 31)),
+        Employee(name="Leaving", manager_code="M1", cost_center="C1", employment_type="FTE",
+                 start_date=date(2020, 1, 1), end_date=date(YEAR, 1, 1)),
+        Employee(name="Staying", manager_code="M1", cost_center="C1", employment_type="Contractor",
+                 start_date=date(2020, 1, 1)),
+        Employee(name="Joining", manager_code="M1", cost_center="C1", employment_type="Contractor",
+                 start_date=date(YEAR + 1, 1, 1)),
+    ])
+    session.commit()
+
+    assert chart_data.employee_type_distribution(session, YEAR) == {"FTE": 1, "Contractor": 1}
+    assert chart_data.employee_type_distribution(session, YEAR + 1) == {"Contractor": 2}
+
+
+def test_planned_changes_are_counted_in_change_type_order(session):
+    assert chart_data.planned_changes(session, YEAR) is None
+
+    session.add_all([
+        PlannedChange(description=f"Change {i}", change_type=change_type.value,
+                      effective_date=effective_date, status="Planned")
+        for i, (change_type, effective_date) in enumerate([
+            (ChangeType.TERMINATION, date(YEAR, 3, 1)),
+            (ChangeType.TERMINATION, date(YEAR, 12, 31)),
+            (ChangeType.NEW_HIRE, date(YEAR + 1, 1, 1)),
+        ])
+    ])
+    session.commit()
+
+    counts = chart_data.planned_changes(session, YEAR)
+    assert counts == [2 if change_type == ChangeType.TERMINATION.value else 0
+                      for change_type in chart_data.CHANGE_TYPES]
+
+
+def test_monthly_forecast_and_manager_allocation_follow_stored_forecasts(session):
+    import forecast_engine
+
+    assert chart_data.monthly_forecast(session, YEAR) is None
+    session.add_all([
+        Employee(name=f"E{i}", manager_code=manager_code, cost_center="C1", employment_type="FTE",
+                 start_date=date(2020, 1, 1))
+        for i, manager_code in enumerate(["M1", "M2", "M2"])
+    ])
+    session.commit()
+    result, *_ = forecast_engine.recalculate(session, YEAR)
+    session.commit()
+
+    monthly = chart_data.monthly_forecast(session, YEAR)
+    assert monthly == pytest.approx(result.hours.sum(axis=0).tolist())
+    allocation = chart_data.manager_allocation(session, YEAR)
+    assert [manager_code for manager_code, _ in allocation] == ["M2", "M1"]
+    assert allocation[0][1] == 2 * allocation[1][1]
@@ -0,0 +1,39 @@
+import sqlite3
+
+import database
+
+CHANGE_LOG_TRIGGER_COUNT = "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%change_log%'"
+
+
+def test_paused_triggers_are_only_missing_inside_the_transaction(session):
+    expected = len(database.change_log_trigger_sql())
+    with database.pause_triggers(session, database.CHANGE_LOG_TRIGGERS):
+        assert session.connection().exec_driver_sql(CHANGE_LOG_TRIGGER_COUNT).scalar() == 0
+        with sqlite3.connect(database.engine.url.database) as other:
+            assert other.execute(CHANGE_LOG_TRIGGER_COUNT).fetchone()[0] == expected
+        other.close()
+    assert session.connection().exec_driver_sql(CHANGE_LOG_TRIGGER_COUNT).scalar() == expected
+
+
+def test_rolling_back_restores_paused_triggers(session):
+    groups = (database.CHANGE_LOG_TRIGGERS, database.MONTHLY_HOURS_TRIGGERS)
+    with database.engine.connect() as connection:
+        with database.pause_triggers(connection, *groups):
+            connection.rollback()
+            names = {name for name, in connection.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    for group in groups:
+        assert {database.trigger_name(statement) for statement in database.trigger_group_sql(group)} <= names
+
+
+def test_config_is_read_next_to_the_database(tmp_path, monkeypatch):
+    monkeypatch.delenv(database.CONFIG_ENV, raising=False)
+    (tmp_path / database.CONFIG_NAME).write_text("[sqlite]\ncache_size = -1000\n")
+    engine = database.create_db_engine(f"sqlite:///{tmp_path / 'forecast_tool.db'}")
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA cache_size").scalar() == -1000
+    engine.dispose()
+
+    assert database.config_file() == database.CONFIG_NAME
+    monkeypatch.setenv(database.CONFIG_ENV, str(tmp_path / "other.ini"))
+    assert database.config_file(f"sqlite:///{tmp_path / 'forecast_tool.db'}") == str(tmp_path / "other.ini")
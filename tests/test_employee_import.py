@@ -0,0 +1,84 @@
+import csv
+
+import pytest
+
+import employee_import
+from database import ChangeLog, Employee
+
+HEADER = ['name', 'manager_code', 'cost_center', 'employment_type', 'start_date', 'end_date']
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    return str(path)
+
+
+def employee_rows(count):
+    return [[f"E{i}", "M1", "C1", "FTE", "01/15/26", ""] for i in range(count)]
+
+
+def test_import_logs_one_global_change(session, tmp_path):
+    session.query(ChangeLog).delete()
+    session.commit()
+
+    report = employee_import.import_employees(session, write_csv(tmp_path / "e.csv", employee_rows(25)),
+                                              chunk_size=10)
+    session.commit()
+
+    assert report.imported == 25
+    assert [row.employee_id for row in session.query(ChangeLog)] == [None]
+
+
+def test_import_writes_one_insert_per_chunk(session, tmp_path):
+    progress = []
+    report = employee_import.import_employees(session, write_csv(tmp_path / "e.csv", employee_rows(25)),
+                                              chunk_size=10,
+                                              progress=lambda fraction, message: progress.append(message))
+    session.commit()
+
+    assert report.imported == 25
+    assert session.query(Employee).count() == 25
+    # Progress is reported after each full chunk; the remainder is written at the end
+    assert progress == ["10 employees imported", "20 employees imported"]
+
+
+def test_progress_can_abort_the_import(session, tmp_path):
+    def cancel(fraction, message):
+        raise RuntimeError("cancelled")
+
+    with pytest.raises(RuntimeError):
+        employee_import.import_employees(session, write_csv(tmp_path / "e.csv", employee_rows(25)),
+                                         chunk_size=10, progress=cancel)
+    session.rollback()
+    assert session.query(Employee).count() == 0
+
+
+def test_invalid_rows_are_reported_and_skipped(session, tmp_path):
+    rows = employee_rows(2) + [
+        ["Bad start", "M1", "C1", "FTE", "2026-01-15", ""],
+        ["Bad end", "M1", "C1", "FTE", "01/15/26", "soon"],
+        ["No manager", "", "C1", "FTE", "01/15/26", ""],
+    ]
+    report = employee_import.import_employees(session, write_csv(tmp_path / "e.csv", rows))
+    session.commit()
+
+    assert report.imported == 2
+    assert [line for line, message in report.errors] == [4, 5, 6]
+    assert report.error_lines(limit=1) == [
+        "Row 4: Invalid start date format for Bad start: 2026-01-15. Use MM/DD/YY."]
+
+    report.write_errors(tmp_path / "errors.csv")
+    with open(tmp_path / "errors.csv", newline='', encoding='utf-8') as errors_file:
+        saved = list(csv.reader(errors_file))
+    assert saved[0] == ['row', 'error']
+    assert saved[3] == ['6', 'Missing manager_code for No manager']
+
+
+def test_missing_columns_abort_the_import(session, tmp_path):
+    path = tmp_path / "e.csv"
+    path.write_text("name,start_date\nE,01/15/26\n", encoding='utf-8')
+    with pytest.raises(ValueError, match="manager_code, cost_center, employment_type"):
+        employee_import.import_employees(session, str(path))
@@ -0,0 +1,76 @@
+from datetime import date
+
+from openpyxl import load_workbook
+
+import excel_export
+from database import Employee, Forecast
+
+YEAR = 2026
+
+
+def add_forecast(session, manager_code, cost_center, work_code, hours, year=YEAR):
+    session.add(Forecast(year=year, manager_code=manager_code, cost_center=cost_center,
+                         work_code=work_code, total_hours=hours * 12,
+                         **{month: hours for month in excel_export.MONTH_COLUMNS}))
+
+
+def sheet_rows(workbook, title):
+    return [list(row) for row in workbook[title].iter_rows(values_only=True)]
+
+
+def test_forecasts_get_a_sheet_per_manager_with_subtotals(session, tmp_path):
+    add_forecast(session, "M1", "C1", "W1", 1.0)
+    add_forecast(session, "M1", "C1", "W2", 2.0)
+    add_forecast(session, "M1", "C2", "W1", 4.0)
+    add_forecast(session, "M2/X", "C1", "W1", 8.0)
+    add_forecast(session, "M1", "C1", "W1", 100.0, year=YEAR + 1)
+    session.commit()
+    path = tmp_path / "forecasts.xlsx"
+
+    assert excel_export.export_forecasts(session, path, YEAR) == 4
+
+    workbook = load_workbook(path)
+    assert workbook.sheetnames == ["Summary", "M1", "M2_X"]
+    rows = sheet_rows(workbook, "M1")
+    # Blank cells read back as None
+    assert [row[:3] + row[-1:] for row in rows] == [
+        ["Year", "Cost Center", "Work Code", "Total"],
+        [YEAR, "C1", "W1", 12.0],
+        [YEAR, "C1", "W2", 24.0],
+        [None, "C1 Subtotal", None, 36.0],
+        [YEAR, "C2", "W1", 48.0],
+        [None, "C2 Subtotal", None, 48.0],
+        [None, "Total", None, 84.0],
+    ]
+    summary = sheet_rows(workbook, "Summary")
+    # A single year also lists its GA01 weeks
+    assert summary[1][0] == "GA01 Weeks" and len(summary[1]) == 14
+    assert [(row[0], row[1], row[-1]) for row in summary[2:]] == [
+        ("M1", 7.0, 84.0), ("M2/X", 8.0, 96.0), ("Grand Total", 15.0, 180.0)]
+
+
+def test_sheet_titles_are_valid_and_unique():
+    used = {"summary"}
+    assert excel_export.sheet_title("Summary", used) == "Summary (2)"
+    assert excel_export.sheet_title("a:b", used) == "a_b"
+    assert excel_export.sheet_title("a?b", used) == "a_b (2)"
+    assert len(excel_export.sheet_title("x" * 40, used)) == 31
+    assert excel_export.sheet_title(None, used) == "(blank)"
+
+
+def test_employees_are_exported_in_batches(session, tmp_path, monkeypatch):
+    monkeypatch.setattr(excel_export, "BATCH_SIZE", 2)
+    session.add_all([Employee(name=f"E{i}", manager_code="M1", cost_center="C1",
+                              employment_type="FTE", start_date=date(2020, 1, 1))
+                     for i in range(5)])
+    session.commit()
+    path = tmp_path / "employees.xlsx"
+    messages = []
+
+    count = excel_export.export_employees(session, path,
+                                          progress=lambda fraction, message: messages.append(message))
+
+    assert count == 5
+    assert messages == ["2 rows exported", "4 rows exported"]
+    rows = sheet_rows(load_workbook(path), "Employees")
+    assert [row[1] for row in rows[1:]] == [f"E{i}" for i in range(5)]
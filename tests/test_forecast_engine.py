@@ -0,0 +1,249 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+import database
+import forecast_engine
+from database import ChangeType, Employee, Forecast, GA01Week, PlannedChange
+
+YEAR = 2026
+
+
+def add_employees(session, *groups):
+    employees = [Employee(name=f"E{i}", manager_code=manager_code, cost_center=cost_center,
+                          employment_type="FTE", start_date=date(2020, 1, 1))
+                 for i, (manager_code, cost_center) in enumerate(groups)]
+    session.add_all(employees)
+    session.commit()
+    return employees
+
+
+def stored_totals(session, year=YEAR):
+    return {(f.manager_code, f.cost_center, f.work_code): f.total_hours
+            for f in session.query(Forecast).filter(Forecast.year == year)}
+
+
+def test_rebuild_zeroes_groups_that_lost_their_employees(session):
+    employees = add_employees(session, ("M1", "C1"), ("M2", "C2"), ("M2", "C2"))
+    moved = employees[2]
+    for manager_code in ("M1", "M2"):
+        moved.manager_code = manager_code
+        session.commit()
+        forecast_engine.invalidate(YEAR)
+        result, *_ = forecast_engine.recalculate(session, YEAR)
+        session.commit()
+
+    assert len(result) == 2
+    totals = stored_totals(session)
+    assert totals[("M1", "C2", "DEFAULT")] == 0
+    assert sum(totals.values()) == pytest.approx(result.totals().sum())
+
+
+def test_range_run_zeroes_groups_that_lost_their_employees(session):
+    employees = add_employees(session, ("M1", "C1"), ("M2", "C2"))
+    forecast_engine.recalculate_years(session, [YEAR, YEAR + 1])
+    session.commit()
+
+    employees[1].manager_code = "M1"
+    session.commit()
+    results, *_ = forecast_engine.recalculate_years(session, [YEAR, YEAR + 1])
+    session.commit()
+
+    for result in results:
+        totals = stored_totals(session, result.year)
+        assert totals[("M2", "C2", "DEFAULT")] == 0
+        assert sum(totals.values()) == pytest.approx(result.totals().sum())
+
+
+def full_forecast(session, year=YEAR):
+    result = forecast_engine.calculate_forecast(session, year)
+    return dict(zip(result.keys, result.totals().tolist()))
+
+
+def test_range_run_matches_per_year_recalculation(session):
+    employees = add_employees(session, ("M1", "C1"), ("M1", "C1"), ("M2", "C2"))
+    employees[1].end_date = date(YEAR + 1, 5, 20)
+    session.add_all([
+        Employee(name="Late", manager_code="M3", cost_center="C3", employment_type="CONTRACTOR",
+                 start_date=date(YEAR + 1, 8, 3)),
+        PlannedChange(description="Convert", change_type=ChangeType.CONVERSION.value,
+                      effective_date=date(YEAR, 11, 2), employee_id=employees[2].id,
+                      target_type="CONTRACTOR", status="Planned"),
+        PlannedChange(description="Hire", change_type=ChangeType.NEW_HIRE.value,
+                      effective_date=date(YEAR + 2, 3, 2), manager_code="M4", cost_center="C4",
+                      employment_type="FTE", status="Planned"),
+        GA01Week(year=YEAR + 1, month=2, weeks=3.5),
+    ])
+    session.commit()
+    years = [YEAR, YEAR + 1, YEAR + 2]
+
+    results, processed, *_ = forecast_engine.recalculate_years(session, years)
+    session.commit()
+
+    # Four employees and the planned new hire
+    assert processed == 5
+    for year, result in zip(years, results):
+        expected = full_forecast(session, year)
+        assert dict(zip(result.keys, result.totals().tolist())) == pytest.approx(expected)
+        stored = {key: total for key, total in stored_totals(session, year).items() if total}
+        assert stored == pytest.approx(expected)
+
+        # The cached state is reused by the next per-year run
+        _, processed, *_ = forecast_engine.recalculate(session, year)
+        assert processed == 0
+
+
+def test_recalculate_sees_writes_from_other_processes(session):
+    employees = add_employees(session, ("M1", "C1"), ("M2", "C2"), ("M2", "C2"))
+    forecast_engine.recalculate(session, YEAR)
+    session.commit()
+
+    # Another process (e.g. the command-line tool) edits an employee directly
+    with sqlite3.connect(database.engine.url.database) as other:
+        other.execute("UPDATE employees SET manager_code = 'M3' WHERE id = ?", (employees[1].id,))
+    other.close()
+
+    forecast_engine.recalculate(session, YEAR)
+    session.commit()
+    stored = {key: total for key, total in stored_totals(session).items() if total}
+    assert stored == pytest.approx(full_forecast(session))
+
+
+def test_states_are_not_shared_between_databases(session, tmp_path):
+    add_employees(session, ("M1", "C1"))
+    forecast_engine.recalculate(session, YEAR)
+    session.commit()
+    state = forecast_engine.get_state(session, YEAR)
+
+    database.configure_engine(f"sqlite:///{tmp_path / 'other.db'}")
+    database.Base.metadata.create_all(database.engine)
+    other = database.get_session()
+    try:
+        assert forecast_engine.get_state(other, YEAR) is not state
+    finally:
+        other.close()
+
+
+def test_incremental_results_match_a_full_rebuild(session):
+    add_employees(session, ("M1", "C1"), ("M1", "C1"), ("M2", "C2"), ("M3", "C3"))
+    contractor = Employee(name="C", manager_code="M2", cost_center="C2",
+                          employment_type="CONTRACTOR", start_date=date(YEAR, 3, 16))
+    session.add(contractor)
+    session.flush()
+    session.add(PlannedChange(description="Convert", change_type=ChangeType.CONVERSION.value,
+                              effective_date=date(YEAR, 6, 20), employee_id=contractor.id,
+                              target_type="FTE", status="Planned"))
+    session.commit()
+    forecast_engine.recalculate(session, YEAR)
+    session.commit()
+
+    employees = session.query(Employee).order_by(Employee.id).all()
+    edits = [
+        lambda: setattr(employees[0], "manager_code", "M2"),
+        lambda: setattr(employees[1], "end_date", date(YEAR, 4, 10)),
+        lambda: setattr(contractor, "start_date", date(YEAR, 2, 2)),
+        lambda: session.delete(employees[3]),
+        lambda: session.add(Employee(name="N", manager_code="M4", cost_center="C4",
+                                     employment_type="FTE", start_date=date(YEAR, 9, 1))),
+    ]
+    for edit in edits:
+        edit()
+        session.commit()
+        result, processed, *_ = forecast_engine.recalculate(session, YEAR)
+        session.commit()
+        assert processed == 1
+
+        state = forecast_engine.get_state(session, YEAR)
+        cached = {key: total for key, total in zip(state.keys, state.totals.sum(axis=1).tolist())
+                  if total}
+        stored = {key: total for key, total in stored_totals(session).items() if total}
+        expected = full_forecast(session)
+        assert cached == pytest.approx(expected)
+        assert stored == pytest.approx(expected)
+
+
+# March 2026 has 22 business days and its 10th business day (the end of
+# the 2nd GA01 week) is Friday the 13th.
+@pytest.mark.parametrize("start, end, march, april", [
+    (date(YEAR, 3, 13), None, 13 / 22, 1.0),  # last day of the 2nd week is prorated
+    (date(YEAR, 3, 16), None, 1.0, 1.0),      # later starts count the whole month
+    (date(YEAR, 3, 2), None, 1.0, 1.0),
+    (date(2020, 1, 1), date(YEAR, 3, 13), 10 / 22, 0.0),
+    (date(2020, 1, 1), date(YEAR, 3, 16), 1.0, 0.0),
+    (date(2020, 1, 1), date(YEAR, 3, 31), 1.0, 0.0),
+])
+def test_proration_around_the_second_ga01_week(start, end, march, april):
+    fractions = forecast_engine.activity_fractions([start], [end], YEAR)
+    assert fractions[0, 2] == pytest.approx(march)
+    assert fractions[0, 3] == pytest.approx(april)
+    assert fractions[0, 1] == (0.0 if start.year == YEAR else 1.0)
+
+
+@pytest.mark.parametrize("start, march", [
+    (date(YEAR, 3, 13), 13 / 22),
+    (date(YEAR, 3, 16), 0.0),  # late conversions take effect next month
+])
+def test_late_start_can_wait_for_the_next_month(start, march):
+    fractions = forecast_engine.activity_fractions([start], [None], YEAR, late_start_counts_month=False)
+    assert fractions[0, 2] == pytest.approx(march)
+    assert fractions[0, 3] == 1.0
+
+
+def test_recalculate_restores_deleted_forecasts(session):
+    add_employees(session, ("M1", "C1"), ("M2", "C2"))
+    forecast_engine.recalculate(session, YEAR)
+    session.commit()
+    expected = stored_totals(session)
+
+    session.query(Forecast).filter(Forecast.manager_code == "M1").delete()
+    session.commit()
+    forecast_engine.recalculate(session, YEAR)
+    session.commit()
+    assert stored_totals(session) == pytest.approx(expected)
+
+
+def test_recalculate_restores_forecasts_edited_by_hand(session):
+    add_employees(session, ("M1", "C1"), ("M2", "C2"))
+    forecast_engine.recalculate(session, YEAR)
+    session.commit()
+    expected = stored_totals(session)
+
+    forecast = session.query(Forecast).filter(Forecast.manager_code == "M2").one()
+    forecast.jan, forecast.total_hours = 1.0, 1.0
+    session.commit()
+    forecast_engine.recalculate(session, YEAR)
+    session.commit()
+    assert stored_totals(session) == pytest.approx(expected)
+
+
+def test_calculated_forecasts_are_not_logged(session):
+    add_employees(session, ("M1", "C1"))
+    forecast_engine.recalculate(session, YEAR)
+    session.commit()
+    state = forecast_engine.get_state(session, YEAR)
+    assert forecast_engine.take_changes(session, state)[1:] == (False, set())
+
+
+def test_rebuild_reloads_ga01_weeks_written_by_other_processes(session):
+    add_employees(session, ("M1", "C1"))
+    forecast_engine.recalculate(session, YEAR)
+    session.commit()
+
+    with sqlite3.connect(database.engine.url.database) as other:
+        other.execute("INSERT INTO ga01_weeks (year, month, weeks) VALUES (?, 1, 10)", (YEAR,))
+    other.close()
+
+    forecast_engine.recalculate(session, YEAR)
+    session.commit()
+    forecast = session.query(Forecast).filter(Forecast.year == YEAR).one()
+    assert forecast.jan == pytest.approx(34.5 * 10)
+
+    with sqlite3.connect(database.engine.url.database) as other:
+        other.execute("UPDATE ga01_weeks SET weeks = 4 WHERE year = ?", (YEAR,))
+    other.close()
+
+    forecast_engine.recalculate_years(session, [YEAR])
+    session.commit()
+    session.refresh(forecast)
+    assert forecast.jan == pytest.approx(34.5 * 4)
@@ -0,0 +1,114 @@
+import argparse
+from datetime import date
+
+import pytest
+
+import database
+import forecast_tool
+import scenarios
+import sql_stats
+from database import Employee, Forecast
+
+YEAR = 2026
+
+
+@pytest.fixture
+def db_path(session):
+    session.add_all([Employee(name=f"E{i}", manager_code=manager_code, cost_center="C1",
+                              employment_type="FTE", start_date=date(2020, 1, 1))
+                     for i, manager_code in enumerate(["M1", "M1", "M2"])])
+    session.commit()
+    return database.engine.url.database
+
+
+def stored_years(path):
+    session = database.get_session()
+    try:
+        return sorted({year for year, in session.query(Forecast.year).filter(Forecast.total_hours != 0)})
+    finally:
+        session.close()
+
+
+def test_calculate_stores_every_requested_year(db_path, capsys):
+    status = forecast_tool.main(["calculate", "--years", f"{YEAR}-{YEAR + 1}", "--year", str(YEAR + 3),
+                                 "--db", db_path, "--quiet"])
+
+    assert status == 0
+    assert stored_years(db_path) == [YEAR, YEAR + 1, YEAR + 3]
+    out = capsys.readouterr().out
+    assert f"{YEAR}: 3 employees, 2 forecasts" in out
+    assert "3 years from 3 employees (6 created, 0 updated)" in out
+
+
+def test_calculate_without_years_fails(db_path, capsys):
+    assert forecast_tool.main(["calculate", "--db", db_path]) == 2
+    assert "Error: Give --year or --years" in capsys.readouterr().err
+
+
+def test_year_range():
+    assert forecast_tool.year_range("2025-2027") == [2025, 2026, 2027]
+    assert forecast_tool.year_range("2025") == [2025]
+    for text in ("2027-2025", "next"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            forecast_tool.year_range(text)
+
+
+def test_import_employees_reports_errors(db_path, tmp_path, capsys):
+    csv_path = tmp_path / "hr.csv"
+    csv_path.write_text("name,manager_code,cost_center,employment_type,start_date,end_date\n"
+                        "New,M3,C3,FTE,01/15/26,\n"
+                        "Broken,M3,C3,FTE,not a date,\n")
+    errors_path = tmp_path / "errors.csv"
+
+    status = forecast_tool.main(["import-employees", str(csv_path), "--errors", str(errors_path),
+                                 "--db", db_path, "--quiet"])
+
+    assert status == 1
+    assert "Imported 1 employees with 1 errors" in capsys.readouterr().out
+    assert errors_path.exists()
+    session = database.get_session()
+    assert session.query(Employee).filter(Employee.name == "New").count() == 1
+    session.close()
+
+
+def test_export_excel_and_snapshot_round_trip(db_path, tmp_path, capsys):
+    assert forecast_tool.main(["calculate", "--year", str(YEAR), "--db", db_path, "--quiet"]) == 0
+    workbook = tmp_path / "forecast.xlsx"
+    assert forecast_tool.main(["export-excel", "forecasts", str(workbook), "--year", str(YEAR),
+                               "--db", db_path, "--quiet"]) == 0
+    assert workbook.exists()
+    assert f"Exported 2 forecasts rows to {workbook}" in capsys.readouterr().out
+
+    directory = tmp_path / "snapshot"
+    assert forecast_tool.main(["export-snapshot", str(directory), "--db", db_path, "--quiet"]) == 0
+    restored = str(tmp_path / "restored.db")
+    assert forecast_tool.main(["import-snapshot", str(directory), "--db", restored, "--quiet"]) == 0
+    assert stored_years(restored) == [YEAR]
+
+
+def test_compare_scenario_prints_changed_groups(db_path, capsys):
+    session = database.get_session()
+    scenario = scenarios.create_scenario(session, "Freeze")
+    session.flush()
+    employee = session.query(Employee).filter(Employee.manager_code == "M2").one()
+    scenarios.remove_employee(session, scenario.id, employee.id)
+    session.commit()
+    session.close()
+
+    assert forecast_tool.main(["compare-scenario", "Freeze", "--year", str(YEAR), "--db", db_path]) == 0
+
+    out = capsys.readouterr().out
+    assert f"Freeze vs base {YEAR}: 1 groups changed" in out
+    assert stored_years(db_path) == []
+
+
+def test_sql_stats_are_printed_per_command(db_path, capsys):
+    try:
+        forecast_tool.main(["calculate", "--year", str(YEAR), "--db", db_path, "--quiet", "--sql-stats"])
+    finally:
+        sql_stats.disable()
+        sql_stats.reset()
+
+    out = capsys.readouterr().out
+    assert any(line.startswith("calculate: ") for line in out.splitlines())
+    assert any(line.startswith("open database: ") for line in out.splitlines())
@@ -0,0 +1,59 @@
+from database import Forecast, ForecastMonth
+from forecast_writer import ForecastWriter
+
+YEAR = 2026
+
+
+def stored(session, year=YEAR):
+    return {(f.manager_code, f.cost_center, f.work_code): (f.jan, f.dec, f.total_hours)
+            for f in session.query(Forecast).filter(Forecast.year == year)}
+
+
+def test_flush_inserts_then_updates_in_place(session):
+    writer = ForecastWriter()
+    writer.stage(YEAR, "M1", "C1", "DEFAULT", [10.0] * 12)
+    writer.stage(YEAR, "M2", "C2", "DEFAULT", [5.0] * 12)
+    assert writer.count_existing(session) == 0
+    assert writer.flush(session) == 2
+    assert len(writer) == 0
+    session.commit()
+    ids = {f.manager_code: f.id for f in session.query(Forecast)}
+
+    writer.stage(YEAR, "M1", "C1", "DEFAULT", [1.0] * 11 + [2.0])
+    writer.stage(YEAR, "M3", "C3", "DEFAULT", [3.0] * 12)
+    assert writer.count_existing(session) == 1
+    writer.flush(session)
+    session.commit()
+
+    assert stored(session) == {("M1", "C1", "DEFAULT"): (1.0, 2.0, 13.0),
+                               ("M2", "C2", "DEFAULT"): (5.0, 5.0, 60.0),
+                               ("M3", "C3", "DEFAULT"): (3.0, 3.0, 36.0)}
+    assert session.query(Forecast).filter(Forecast.manager_code == "M1").one().id == ids["M1"]
+    # The monthly hours triggers keep the long table in step with the upsert
+    december = session.query(ForecastMonth.hours).filter(
+        ForecastMonth.forecast_id == ids["M1"], ForecastMonth.month == 12).scalar()
+    assert december == 2.0
+
+
+def test_stage_stale_zeroes_only_missing_groups_of_the_year(session):
+    writer = ForecastWriter()
+    for year in (YEAR, YEAR + 1):
+        writer.stage(year, "M1", "C1", "DEFAULT", [10.0] * 12)
+        writer.stage(year, "M2", "C2", "DEFAULT", [5.0] * 12)
+    writer.flush(session)
+    session.commit()
+
+    assert writer.stage_stale(session, YEAR, [("M1", "C1", "DEFAULT")]) == 1
+    writer.flush(session)
+    session.commit()
+    # Already zero, so nothing is staged again
+    assert writer.stage_stale(session, YEAR, [("M1", "C1", "DEFAULT")]) == 0
+
+    assert stored(session)[("M2", "C2", "DEFAULT")] == (0.0, 0.0, 0.0)
+    assert stored(session)[("M1", "C1", "DEFAULT")] == (10.0, 10.0, 120.0)
+    assert stored(session, YEAR + 1)[("M2", "C2", "DEFAULT")] == (5.0, 5.0, 60.0)
+
+
+def test_empty_flush_writes_nothing(session):
+    assert ForecastWriter().flush(session) == 0
+    assert session.query(Forecast).count() == 0
@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import text
+
+import database
+from migrate_db import migrate_database
+
+MONTHS = ", ".join(database.MONTH_COLUMNS)
+
+
+@pytest.fixture
+def old_engine(tmp_path):
+    """A database as written by versions before the unique indexes"""
+    engine = database.create_db_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    database.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for name in ('ux_forecasts_year_group', 'ux_project_allocations_group',
+                     'ix_planned_changes_effective_date'):
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    yield engine
+    engine.dispose()
+
+
+def insert_row(conn, table, hours, **key):
+    columns = ", ".join(key)
+    values = ", ".join(f":{column}" for column in key)
+    extra, extra_values = ("", "") if table != 'forecasts' else (", total_hours", f", {hours * 12}")
+    conn.execute(text(f"INSERT INTO {table} ({columns}, {MONTHS}{extra}) "
+                      f"VALUES ({values}, {', '.join([str(hours)] * 12)}{extra_values})"), key)
+
+
+def indexes(conn):
+    return {name for name, in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+
+
+def test_duplicates_are_removed_before_the_unique_indexes(old_engine):
+    group = dict(year=2026, manager_code="M1", cost_center="C1", work_code="W1")
+    with old_engine.begin() as conn:
+        for hours in (1.0, 2.0, 3.0):
+            insert_row(conn, 'forecasts', hours, **group)
+            insert_row(conn, 'project_allocations', hours, **group)
+        insert_row(conn, 'forecasts', 9.0, **dict(group, work_code="W2"))
+
+    migrate_database(old_engine)
+
+    with old_engine.connect() as conn:
+        # The newest forecast and the oldest allocation of each group are kept
+        forecasts = conn.execute(text("SELECT work_code, jan FROM forecasts ORDER BY work_code")).all()
+        assert [tuple(row) for row in forecasts] == [("W1", 3.0), ("W2", 9.0)]
+        assert conn.execute(text("SELECT jan FROM project_allocations")).scalars().all() == [1.0]
+        assert {'ux_forecasts_year_group', 'ux_project_allocations_group',
+                'ix_planned_changes_effective_date'} <= indexes(conn)
+
+
+def test_migration_is_idempotent(old_engine, capsys):
+    migrate_database(old_engine)
+    capsys.readouterr()
+    migrate_database(old_engine)
+    assert capsys.readouterr().out == ""
+
+
+def test_long_tables_are_backfilled_and_kept_in_step(old_engine):
+    with old_engine.begin() as conn:
+        # Databases from before the long tables have neither them nor their triggers
+        for name, in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).all():
+            conn.execute(text(f"DROP TRIGGER {name}"))
+        conn.execute(text("DROP TABLE forecast_months"))
+        conn.execute(text("DROP TABLE allocation_months"))
+        insert_row(conn, 'forecasts', 2.0, year=2026, manager_code="M1", cost_center="C1", work_code="W1")
+        insert_row(conn, 'project_allocations', 3.0, year=2026, manager_code="M1", cost_center="C1",
+                   work_code="W1")
+
+    migrate_database(old_engine)
+
+    with old_engine.begin() as conn:
+        assert conn.execute(text("SELECT COUNT(*), SUM(hours) FROM forecast_months")).one() == (12, 24.0)
+        assert conn.execute(text("SELECT COUNT(*), SUM(hours) FROM allocation_months")).one() == (12, 36.0)
+        conn.execute(text("UPDATE forecasts SET dec = 5"))
+        assert conn.execute(text("SELECT hours FROM forecast_months WHERE month = 12")).scalar() == 5.0
+        conn.execute(text("DELETE FROM project_allocations"))
+        assert conn.execute(text("SELECT COUNT(*) FROM allocation_months")).scalar() == 0
+        triggers = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars())
+        assert {database.trigger_name(statement) for statement in database.change_log_trigger_sql()} <= triggers
+
+
+def test_partial_long_tables_are_rebuilt(old_engine):
+    migrate_database(old_engine)
+    with old_engine.begin() as conn:
+        insert_row(conn, 'forecasts', 2.0, year=2026, manager_code="M1", cost_center="C1", work_code="W1")
+        conn.execute(text("DELETE FROM forecast_months WHERE month > 6"))
+
+    migrate_database(old_engine)
+
+    with old_engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*), SUM(hours) FROM forecast_months")).one() == (12, 24.0)
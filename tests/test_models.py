@@ -0,0 +1,28 @@
+import database
+import models
+from database import Settings
+
+
+def test_settings_snapshot_is_reloaded_after_the_commit(session):
+    assert models.get_settings_snapshot().fte_hours == 34.5
+
+    settings = session.query(Settings).one()
+    settings.fte_hours = 40.0
+    session.flush()
+    # Another thread reading before the commit still sees the old row
+    assert models.get_settings_snapshot().fte_hours == 34.5
+
+    session.commit()
+    assert models.get_settings_snapshot().fte_hours == 40.0
+
+
+def test_settings_snapshot_follows_the_configured_database(session, tmp_path):
+    session.query(Settings).one().fte_hours = 40.0
+    session.commit()
+    assert models.get_settings_snapshot().fte_hours == 40.0
+
+    database.configure_engine(f"sqlite:///{tmp_path / 'other.db'}")
+    database.Base.metadata.create_all(database.engine)
+    with database.engine.begin() as connection:
+        connection.execute(Settings.__table__.insert().values(fte_hours=36.0, contractor_hours=39.0))
+    assert models.get_settings_snapshot().fte_hours == 36.0
@@ -0,0 +1,115 @@
+from datetime import date
+
+import pytest
+
+import forecast_engine
+import scenarios
+from database import ChangeType, Employee, Forecast, PlannedChange
+
+YEAR = 2026
+
+
+def add_employees(session, *groups):
+    employees = [Employee(name=f"E{i}", manager_code=manager_code, cost_center=cost_center,
+                          employment_type="FTE", start_date=date(2020, 1, 1))
+                 for i, (manager_code, cost_center) in enumerate(groups)]
+    session.add_all(employees)
+    session.commit()
+    return employees
+
+
+def totals_by_group(result):
+    return {key: total for key, total in zip(result.keys, result.totals().tolist()) if total}
+
+
+def compared_totals(comparison):
+    base = {row[:3]: row[3] for row in comparison.rows() if row[3]}
+    changed = {row[:3]: row[4] for row in comparison.rows()}
+    return base, changed
+
+
+def full_scenario(session, overlay):
+    inputs = forecast_engine.load_inputs(session, YEAR, overlay=overlay)
+    return totals_by_group(forecast_engine.compute_forecast(inputs))
+
+
+def test_comparison_matches_a_full_recompute(session):
+    employees = add_employees(session, ("M1", "C1"), ("M1", "C1"), ("M2", "C2"))
+    forecast_engine.recalculate(session, YEAR)
+    session.commit()
+
+    scenario = scenarios.create_scenario(session, "Reorganise")
+    session.flush()
+    scenarios.set_employee(session, scenario.id, employees[1].id, manager_code="M3")
+    scenarios.remove_employee(session, scenario.id, employees[2].id)
+    scenarios.add_employee(session, scenario.id, name="New", manager_code="M2", cost_center="C2",
+                           employment_type="Contractor", start_date=date(YEAR, 7, 1))
+    session.commit()
+
+    comparison = forecast_engine.evaluate_scenario(session, scenario.id, YEAR)
+    base = totals_by_group(forecast_engine.calculate_forecast(session, YEAR))
+    expected = full_scenario(session, scenarios.load_overlay(session, scenario.id))
+
+    compared_base, compared_scenario = compared_totals(comparison)
+    assert compared_base == pytest.approx({key: base[key] for key in compared_base})
+    for key in set(base) | set(expected):
+        if base.get(key, 0) != pytest.approx(expected.get(key, 0)):
+            assert compared_scenario[key] == pytest.approx(expected.get(key, 0))
+
+
+def test_comparison_writes_nothing(session):
+    employees = add_employees(session, ("M1", "C1"), ("M2", "C2"))
+    scenario = scenarios.create_scenario(session, "Leaver")
+    session.flush()
+    scenarios.remove_employee(session, scenario.id, employees[0].id)
+    session.commit()
+
+    comparison = forecast_engine.evaluate_scenario(session, scenario.id, YEAR)
+
+    assert len(comparison) == 1
+    assert not session.new and not session.dirty
+    assert session.query(Forecast).count() == 0
+
+
+def test_comparison_leaves_base_changes_pending(session):
+    employees = add_employees(session, ("M1", "C1"), ("M2", "C2"))
+    forecast_engine.recalculate(session, YEAR)
+    session.commit()
+    scenario = scenarios.create_scenario(session, "Empty")
+    employees[1].manager_code = "M3"
+    session.commit()
+
+    forecast_engine.evaluate_scenario(session, scenario.id, YEAR)
+    forecast_engine.recalculate(session, YEAR)
+    session.commit()
+
+    stored = {(f.manager_code, f.cost_center, f.work_code): f.total_hours
+              for f in session.query(Forecast).filter(Forecast.year == YEAR) if f.total_hours}
+    assert stored == pytest.approx(totals_by_group(forecast_engine.calculate_forecast(session, YEAR)))
+
+
+def test_scenario_hires_and_added_employees_do_not_collide(session):
+    add_employees(session, ("M1", "C1"))
+    scenario = scenarios.create_scenario(session, "Growth")
+    session.flush()
+    # The base hire, the scenario hire and the added employee all used to get id -1
+    session.add(PlannedChange(description="Base hire", change_type=ChangeType.NEW_HIRE.value,
+                              effective_date=date(YEAR, 1, 1), manager_code="M2",
+                              cost_center="C2", employment_type="FTE", status="Planned"))
+    hire = scenarios.add_planned_change(session, scenario.id, description="Hire",
+                                        change_type=ChangeType.NEW_HIRE.value,
+                                        effective_date=date(YEAR, 1, 1), manager_code="M2",
+                                        cost_center="C2", employment_type="FTE")
+    scenarios.add_employee(session, scenario.id, name="New", manager_code="M2", cost_center="C2",
+                           employment_type="FTE", start_date=date(YEAR, 1, 1))
+    session.commit()
+    assert hire.id == 1
+
+    inputs = forecast_engine.load_inputs(session, YEAR, overlay=scenarios.load_overlay(session, scenario.id))
+    assert len(set(inputs.employee_ids.tolist())) == inputs.employee_count == 4
+
+    comparison = forecast_engine.evaluate_scenario(session, scenario.id, YEAR)
+
+    (manager_code, cost_center, _, base, scenario_total, _), = comparison.rows()
+    assert (manager_code, cost_center) == ("M2", "C2")
+    assert scenario_total == pytest.approx(3 * base)
@@ -0,0 +1,57 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+import database
+import snapshot
+from database import (AllocationMonth, ChangeLog, Employee, Forecast, ForecastMonth, GA01Week,
+                      PlannedChange, ProjectAllocation)
+
+pytest.importorskip("pyarrow")
+
+
+def table_rows(session):
+    return {model.__tablename__: session.execute(
+                model.__table__.select().order_by(*model.__table__.primary_key.columns)).all()
+            for model in snapshot.SNAPSHOT_MODELS}
+
+
+@pytest.mark.parametrize("file_format", sorted(snapshot.FORMATS))
+def test_snapshot_round_trip(session, tmp_path, file_format):
+    employee = Employee(name="E", manager_code="M1", cost_center="C1", work_code="W1",
+                        employment_type="FTE", start_date=date(2024, 2, 29), end_date=date(2026, 3, 13))
+    session.add_all([
+        employee,
+        Employee(name="C", manager_code="M1", cost_center="C2", employment_type="CONTRACTOR",
+                 start_date=date(2025, 1, 6)),
+        ProjectAllocation(manager_code="M1", cost_center="C1", work_code="W1", year=2026, jan=0.5, dec=1.0),
+        GA01Week(year=2026, month=3, weeks=4.4),
+        Forecast(year=2026, manager_code="M1", cost_center="C1", work_code="W1", mar=123.25,
+                 total_hours=123.25),
+    ])
+    session.flush()
+    session.add(PlannedChange(description="Leave", change_type="Termination",
+                              effective_date=date(2026, 6, 30), employee_id=employee.id, status="Planned"))
+    session.commit()
+    expected = table_rows(session)
+
+    directory = tmp_path / "snapshot"
+    counts = snapshot.export_snapshot(session, str(directory), file_format)
+    assert counts == {name: len(rows) for name, rows in expected.items()}
+
+    database.configure_engine(f"sqlite:///{tmp_path / 'restored.db'}")
+    database.Base.metadata.create_all(database.engine)
+    restored = database.get_session()
+    try:
+        snapshot.import_snapshot(restored, str(directory))
+        restored.commit()
+        assert table_rows(restored) == expected
+
+        # The paused monthly hours triggers are replaced by one refill per long table
+        months = restored.execute(select(ForecastMonth.month, ForecastMonth.hours)).all()
+        assert sorted(months) == [(month, 123.25 if month == 3 else 0.0) for month in range(1, 13)]
+        assert restored.query(AllocationMonth).count() == 12
+        assert [row.employee_id for row in restored.query(ChangeLog)] == [None]
+    finally:
+        restored.close()
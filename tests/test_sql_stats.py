@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+from sqlalchemy import text
+
+import database
+import sql_stats
+
+
+@pytest.fixture
+def stats():
+    sql_stats.reset()
+    sql_stats.enable()
+    yield sql_stats
+    sql_stats.disable()
+    sql_stats.reset()
+
+
+def by_name():
+    return {action.name: action for action in sql_stats.snapshot()}
+
+
+def test_statements_are_counted_per_action(session, stats):
+    with database.engine.connect() as connection:
+        with sql_stats.action("Loading"):
+            for _ in range(3):
+                connection.execute(text("SELECT 1"))
+            with sql_stats.action("Nested"):
+                connection.execute(text("SELECT 2"))
+            connection.execute(text("SELECT 3"))
+        connection.execute(text("SELECT 4"))
+
+    actions = by_name()
+    assert actions["Loading"].count == 4
+    assert actions["Nested"].count == 1
+    assert actions[sql_stats.OTHER_ACTION].count >= 1
+    assert actions["Loading"].total_s >= actions["Loading"].max_s > 0
+    assert {text for _, text in actions["Nested"].slowest()} == {"SELECT 2"}
+
+
+def test_actions_are_per_thread(session, stats):
+    def worker():
+        with sql_stats.action("Worker"), database.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    with sql_stats.action("Main"):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+    actions = by_name()
+    assert actions["Worker"].count == 1
+    assert "Main" not in actions
+
+
+def test_executemany_is_one_statement_with_its_row_count(session, stats):
+    with database.engine.begin() as connection, sql_stats.action("Insert"):
+        connection.execute(text("CREATE TEMP TABLE numbers (n INTEGER)"))
+        connection.execute(text("INSERT INTO numbers (n) VALUES (:n)"), [{"n": n} for n in range(5)])
+
+    actions = by_name()
+    assert actions["Insert"].count == 2
+    assert any(text.endswith("[executemany x5]") for _, text in actions["Insert"].slowest())
+
+
+def test_slowest_statements_are_capped(monkeypatch):
+    monkeypatch.setattr(sql_stats, "SLOWEST_KEPT", 2)
+    action = sql_stats.ActionStats("Capped")
+    for seconds in (0.3, 0.1, 0.5, 0.2):
+        action.record(f"SELECT {seconds}", seconds)
+
+    assert action.count == 4
+    assert action.mean_s == pytest.approx(0.275)
+    assert action.slowest() == [(0.5, "SELECT 0.5"), (0.3, "SELECT 0.3")]
+
+
+def test_disabled_statistics_record_nothing(session):
+    sql_stats.reset()
+    with database.engine.connect() as connection, sql_stats.action("Off"):
+        connection.execute(text("SELECT 1"))
+    assert not sql_stats.is_enabled()
+    assert sql_stats.snapshot() == []
+
+
+def test_report_and_log(session, stats, tmp_path):
+    with database.engine.connect() as connection, sql_stats.action("Report"):
+        connection.execute(text("SELECT 1"))
+
+    lines = sql_stats.report_lines()
+    assert any(line.startswith("Report: 1 statements") for line in lines)
+    log_path = tmp_path / "sql.log"
+    sql_stats.write_log(log_path)
+    assert "Report: 1 statements" in log_path.read_text()
@@ -0,0 +1,131 @@
+import threading
+import time
+from concurrent.futures import wait
+
+from task_runner import TaskRunner
+
+
+class FakeWidget:
+    """Stands in for the Tk root; the tests run the polling themselves"""
+
+    def after(self, ms, callback):
+        pass
+
+
+def finish(runner, *tasks):
+    """Wait for ``tasks`` and deliver their results as the Tk main loop would"""
+    wait([task.future for task in tasks], timeout=5)
+    runner._poll()
+
+
+def test_writes_run_one_at_a_time_in_submission_order():
+    runner = TaskRunner(FakeWidget())
+    lock = threading.Lock()
+    running, overlap, order = [0], [0], []
+
+    def job(task, number):
+        with lock:
+            running[0] += 1
+            overlap[0] = max(overlap[0], running[0])
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+            order.append(number)
+        return number
+
+    results = []
+    tasks = [runner.submit("Write", job, number, on_done=results.append, write=True) for number in range(5)]
+    finish(runner, *tasks)
+    runner.shutdown()
+
+    assert overlap[0] == 1
+    assert order == results == list(range(5))
+    assert runner.active_tasks == []
+
+
+def test_cancelled_task_never_runs_or_reports():
+    runner = TaskRunner(FakeWidget())
+    release = threading.Event()
+    ran, delivered = [], []
+    blocker = runner.submit("Blocker", lambda task: release.wait(5), write=True)
+    queued = runner.submit("Queued", lambda task: ran.append(task), on_done=delivered.append, write=True)
+
+    queued.cancel()
+    release.set()
+    finish(runner, blocker)
+    runner.shutdown()
+
+    assert ran == [] and delivered == []
+    assert runner.active_tasks == []
+
+
+def test_report_stops_a_cancelled_job():
+    runner = TaskRunner(FakeWidget())
+    started, release = threading.Event(), threading.Event()
+    stages, delivered, errors = [], [], []
+
+    def job(task):
+        started.set()
+        release.wait(5)
+        for stage in range(3):
+            task.report(stage / 3, f"stage {stage}")
+            stages.append(stage)
+
+    task = runner.submit("Load", job, on_done=delivered.append, on_error=errors.append)
+    started.wait(5)
+    task.cancel()
+    release.set()
+    finish(runner, task)
+    runner.shutdown()
+
+    assert stages == [] and delivered == [] and errors == []
+
+
+def test_write_finished_despite_a_late_cancel_is_delivered():
+    runner = TaskRunner(FakeWidget())
+    delivered = []
+    task = runner.submit("Save", lambda task: "saved", on_done=delivered.append, write=True)
+    wait([task.future], timeout=5)
+    task.cancel()
+    runner._poll()
+    runner.shutdown()
+
+    assert delivered == ["saved"]
+
+
+def test_errors_go_to_the_task_handler_or_the_runner_default():
+    runner = TaskRunner(FakeWidget())
+    task_errors, default_errors = [], []
+    runner.on_error = default_errors.append
+
+    def fail(task, message):
+        raise ValueError(message)
+
+    first = runner.submit("A", fail, "own handler", on_error=task_errors.append)
+    second = runner.submit("B", fail, "default handler")
+    finish(runner, first, second)
+    runner.shutdown()
+
+    assert [str(e) for e in task_errors] == ["own handler"]
+    assert [str(e) for e in default_errors] == ["default handler"]
+
+
+def test_replace_cancels_the_running_task_of_the_same_name():
+    runner = TaskRunner(FakeWidget())
+    statuses = []
+    runner.on_status = lambda text, progress: statuses.append(text)
+    release = threading.Event()
+    delivered = []
+
+    old = runner.submit("Reload", lambda task: release.wait(5) and "old", on_done=delivered.append)
+    new = runner.submit("Reload", lambda task: release.wait(5) and "new", on_done=delivered.append,
+                        replace=True)
+    assert old.cancelled and not new.cancelled
+    assert statuses[-1] == "Reload (+1 more)"
+
+    release.set()
+    finish(runner, old, new)
+    runner.shutdown()
+
+    assert delivered == ["new"]
+    assert statuses[-1] is None
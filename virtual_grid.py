@@ -0,0 +1,182 @@
+"""Virtualized Treeview for large result sets.
+
+A plain ttk.Treeview keeps one Tk item per row, so loading tens of thousands
+of rows freezes the UI and grows Tk memory.  VirtualTreeview keeps the rows
+in a Python sequence and only materializes the visible window, recycling a
+fixed pool of item IDs as the user scrolls.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+# Rows moved per mouse wheel notch
+WHEEL_ROWS = 3
+
+
+class VirtualTreeview(ttk.Frame):
+    """Treeview with a vertical scrollbar that renders only the visible rows.
+
+    ``columns`` is a sequence of (column_id, heading, width) tuples.  Rows are
+    any indexable sequence of tuples; ``formatter`` optionally turns a row
+    into the values shown in the tree.  ``row_colors`` maps the 'oddrow' and
+    'evenrow' tags to background colours; the application passes its own.
+    """
+
+    def __init__(self, parent, columns, formatter=None, row_colors=None):
+        super().__init__(parent)
+        self.formatter = formatter
+        self.rows = []
+        self.offset = 0
+        self.selected_index = None
+        self._pool = []
+        self._attached = 0
+        self._header_height = None
+
+        self.tree = ttk.Treeview(self, columns=[c[0] for c in columns], show="headings",
+                                 selectmode="browse")
+        for column_id, heading, width in columns:
+            self.tree.heading(column_id, text=heading)
+            self.tree.column(column_id, width=width)
+
+        for tag, color in (row_colors or {}).items():
+            self.tree.tag_configure(tag, background=color)
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+        style_height = ttk.Style().lookup('Treeview', 'rowheight')
+        self.row_height = int(style_height) if style_height else 20
+
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self._scroll_rows(-WHEEL_ROWS))
+        self.tree.bind('<Button-5>', lambda e: self._scroll_rows(WHEEL_ROWS))
+        self.tree.bind('<Up>', lambda e: self._move_selection(-1))
+        self.tree.bind('<Down>', lambda e: self._move_selection(1))
+        self.tree.bind('<Prior>', lambda e: self._move_selection(-self.visible_count()))
+        self.tree.bind('<Next>', lambda e: self._move_selection(self.visible_count()))
+        self.tree.bind('<Home>', lambda e: self._move_selection(-len(self.rows)))
+        self.tree.bind('<End>', lambda e: self._move_selection(len(self.rows)))
+
+    def set_rows(self, rows):
+        """Replace the result set and redraw the visible window"""
+        self.rows = rows
+        self.selected_index = None
+        self.offset = min(self.offset, self._max_offset())
+        self.refresh()
+
+    def selected_row(self):
+        """Return the selected row from the result set, or None"""
+        if self.selected_index is None or self.selected_index >= len(self.rows):
+            return None
+        return self.rows[self.selected_index]
+
+    def visible_count(self):
+        return max(1, len(self._pool))
+
+    def see(self, index):
+        """Scroll so that row ``index`` is visible"""
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.visible_count():
+            self.offset = index - self.visible_count() + 1
+        self.offset = max(0, min(self.offset, self._max_offset()))
+        self.refresh()
+
+    def refresh(self):
+        """Write the rows of the current window into the recycled items"""
+        visible = self.rows[self.offset:self.offset + len(self._pool)]
+        for position, (item_id, row) in enumerate(zip(self._pool, visible)):
+            index = self.offset + position
+            values = self.formatter(row) if self.formatter else tuple(row)
+            self.tree.item(item_id, values=values,
+                           tags=('evenrow',) if index % 2 else ('oddrow',))
+
+        # Detach pooled items beyond the end of the result set
+        shown = len(visible)
+        if shown < self._attached:
+            self.tree.detach(*self._pool[shown:self._attached])
+        else:
+            for position in range(self._attached, shown):
+                self.tree.move(self._pool[position], '', position)
+        self._attached = shown
+
+        if self.selected_index is not None and self.offset <= self.selected_index < self.offset + shown:
+            item_id = self._pool[self.selected_index - self.offset]
+            if self.tree.selection() != (item_id,):
+                self.tree.selection_set(item_id)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+        self._update_scrollbar()
+
+    def _max_offset(self):
+        return max(0, len(self.rows) - self.visible_count())
+
+    def _update_scrollbar(self):
+        if not self.rows:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        total = float(len(self.rows))
+        self.scrollbar.set(self.offset / total, min(1.0, (self.offset + len(self._pool)) / total))
+
+    def _on_configure(self, event):
+        if self._header_height is None and self._attached:
+            bbox = self.tree.bbox(self._pool[0])
+            if bbox:
+                self._header_height = bbox[1]
+        header = self._header_height if self._header_height is not None else self.row_height + 5
+        count = max(1, (event.height - header) // self.row_height)
+        if count == len(self._pool):
+            return
+
+        # Grow or shrink the recycled item pool to the number of visible rows
+        while len(self._pool) < count:
+            item_id = self.tree.insert('', tk.END)
+            self.tree.detach(item_id)
+            self._pool.append(item_id)
+        if len(self._pool) > count:
+            self.tree.delete(*self._pool[count:])
+            del self._pool[count:]
+        self._attached = min(self._attached, count)
+        self.offset = min(self.offset, self._max_offset())
+        self.refresh()
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        if selection and selection[0] in self._pool:
+            self.selected_index = self.offset + self._pool.index(selection[0])
+        elif self.selected_index is not None and \
+                self.offset <= self.selected_index < self.offset + self._attached:
+            self.selected_index = None
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.offset = int(float(amount) * len(self.rows))
+        elif unit == 'pages':
+            self.offset += int(amount) * self.visible_count()
+        else:
+            self.offset += int(amount)
+        self.offset = max(0, min(self.offset, self._max_offset()))
+        self.refresh()
+
+    def _on_mousewheel(self, event):
+        self._scroll_rows(-WHEEL_ROWS if event.delta > 0 else WHEEL_ROWS)
+        return "break"
+
+    def _scroll_rows(self, count):
+        self.offset = max(0, min(self.offset + count, self._max_offset()))
+        self.refresh()
+        return "break"
+
+    def _move_selection(self, step):
+        if not self.rows:
+            return "break"
+        if self.selected_index is None:
+            index = self.offset
+        else:
+            index = max(0, min(self.selected_index + step, len(self.rows) - 1))
+        self.selected_index = index
+        self.see(index)
+        return "break"